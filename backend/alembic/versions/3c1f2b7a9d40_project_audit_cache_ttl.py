@@ -0,0 +1,30 @@
+"""project audit cache ttl
+
+Revision ID: 3c1f2b7a9d40
+Revises: 984a34fd7bf9
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f2b7a9d40'
+down_revision: Union[str, Sequence[str], None] = '984a34fd7bf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('audit_cache_ttl', sa.Integer(), nullable=True))
+    op.create_check_constraint('ck_projects_audit_cache_ttl_non_negative', 'projects', 'audit_cache_ttl >= 0')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_projects_audit_cache_ttl_non_negative', 'projects', type_='check')
+    op.drop_column('projects', 'audit_cache_ttl')
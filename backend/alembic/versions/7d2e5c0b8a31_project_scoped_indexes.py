@@ -0,0 +1,39 @@
+"""project scoped indexes
+
+Revision ID: 7d2e5c0b8a31
+Revises: 3c1f2b7a9d40
+Create Date: 2026-10-17 11:04:22.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e5c0b8a31'
+down_revision: Union[str, Sequence[str], None] = '3c1f2b7a9d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_audit_reports_project_id_created_at', 'audit_reports',
+        ['project_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    )
+    op.create_index(
+        'ix_competitor_analyses_project_id_created_at', 'competitor_analyses',
+        ['project_id', sa.text('created_at DESC')]
+    )
+    # keywords has no created_at column; /keywords/saved only filters on project_id.
+    op.create_index('ix_keywords_project_id', 'keywords', ['project_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_keywords_project_id', table_name='keywords')
+    op.drop_index('ix_competitor_analyses_project_id_created_at', table_name='competitor_analyses')
+    op.drop_index('ix_audit_reports_project_id_created_at', table_name='audit_reports')
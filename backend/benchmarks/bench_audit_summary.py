@@ -0,0 +1,125 @@
+"""
+CPU time and allocations of the Lighthouse summary extraction: the previous
+two-pass/re-validating extractor vs AuditService.summarize_lighthouse.
+The payload is grown from frontend/example-audit.json to a realistic audit count.
+
+    python -m benchmarks.bench_audit_summary [iterations]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+warnings.simplefilter("ignore", DeprecationWarning)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("PAGESPEED_API_KEY", "benchmark")
+from services.AuditService import summarize_lighthouse
+from db.models.Schemas import PageSpeedData, Opportunity, Diagnostic, LighthouseData
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "example-audit.json")
+
+def build_payload(audit_count=180, items_per_audit=60):
+    with open(EXAMPLE) as f:
+        lh = dict(json.load(f)["lighthouse_mobile"])
+    audits = {}
+    for i in range(audit_count):
+        audits[f"audit-{i}"] = {
+            "id": f"audit-{i}",
+            "title": f"Audit {i}",
+            "description": "Lorem ipsum dolor sit amet " * 8,
+            "score": (i % 10) / 10,
+            "scoreDisplayMode": "informative" if i % 3 == 0 else "numeric",
+            "numericValue": i * 17.5,
+            "details": {
+                "type": "opportunity",
+                "overallSavingsMs": (i * 37) % 900,
+                "items": [{"url": f"https://example.com/asset-{i}-{j}.js", "totalBytes": j * 1024, "wastedMs": j} for j in range(items_per_audit)],
+            },
+        }
+    for metric in ("first-contentful-paint", "largest-contentful-paint", "cumulative-layout-shift", "max-potential-fid", "server-response-time"):
+        audits[metric] = {"id": metric, "title": metric, "description": "", "score": 0.5, "scoreDisplayMode": "numeric", "numericValue": 1234.5}
+    lh["audits"] = audits
+    return lh
+
+def legacy_summarize(lh):
+    """The extractor as it was before the single-pass rewrite."""
+    def extract_summary(lh):
+        audits = lh.get('audits', {})
+        categories_obj = lh.get('categories', {})
+        def safe_float(val):
+            try:
+                return float(val)
+            except Exception:
+                return 0.0
+        score_val = categories_obj.get('performance', {}).get('score', 0)
+        score_val = float(score_val) if score_val is not None else 0.0
+        opportunities = []
+        for a in audits.values():
+            savings = a.get('details', {}).get('overallSavingsMs', 0)
+            if savings > 100:
+                try:
+                    opportunities.append(Opportunity(title=a.get('title', ''), description=a.get('description', ''), savings_ms=float(savings)).dict())
+                except Exception:
+                    pass
+        diagnostics = []
+        for a in audits.values():
+            if a.get('scoreDisplayMode') == 'informative' and a.get('score') is not None:
+                try:
+                    diagnostics.append(Diagnostic(title=a.get('title', ''), description=a.get('description', ''), score=float(a.get('score', 0))).dict())
+                except Exception:
+                    pass
+        def metric(audit_id, divisor, decimals):
+            value = audits.get(audit_id, {}).get('numericValue')
+            return float(round(safe_float(value) / divisor, decimals)) if value is not None else 0.0
+        return dict(
+            performance_score=int(round(score_val * 100)),
+            fcp=metric('first-contentful-paint', 1000, 2),
+            lcp=metric('largest-contentful-paint', 1000, 2),
+            cls=metric('cumulative-layout-shift', 1, 3),
+            fid=metric('max-potential-fid', 1, 1),
+            ttfb=metric('server-response-time', 1, 1),
+            opportunities=opportunities,
+            diagnostics=diagnostics,
+        )
+    def extract_lighthouse_useful(lh):
+        return {
+            'finalUrl': lh.get('finalUrl'),
+            'fetchTime': lh.get('fetchTime'),
+            'categories': {k: {'score': v.get('score'), 'title': v.get('title'), 'description': v.get('description', None)} for k, v in lh.get('categories', {}).items()},
+            'configSettings': lh.get('configSettings'),
+            'environment': lh.get('environment'),
+            'runWarnings': lh.get('runWarnings'),
+            'categoryGroups': lh.get('categoryGroups'),
+            'auditRefs': lh.get('categoryGroups'),
+        }
+    summary = extract_summary(lh)
+    data = PageSpeedData(**summary)
+    stored = extract_lighthouse_useful(lh)
+    LighthouseData(**extract_lighthouse_useful(lh))
+    return data, stored
+
+def new_summarize(lh):
+    data, useful = summarize_lighthouse(lh)
+    LighthouseData(**useful)
+    return data, useful
+
+def measure(label, fn, lh, iterations):
+    assert legacy_summarize(lh)[0].dict() == new_summarize(lh)[0].dict()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(lh)
+    cpu_ms = (time.process_time() - start) * 1000 / iterations
+    tracemalloc.start()
+    fn(lh)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {cpu_ms:8.3f} ms CPU/call   peak allocated {peak / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lh = build_payload()
+    print(f"payload: {len(json.dumps(lh)) / 1e6:.1f} MB, {len(lh['audits'])} audits")
+    measure("legacy", legacy_summarize, lh, iterations)
+    measure("single", new_summarize, lh, iterations)
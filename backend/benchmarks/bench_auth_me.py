@@ -0,0 +1,105 @@
+"""
+Requests per second on GET /auth/me served by one uvicorn worker: the previous
+get_current_user (User query and a session per request) vs the cached one (verified JWT
+claims plus the user cache). Runs against a throw-away SQLite file unless DATABASE_URL is
+set; with PostgreSQL every uncached request also pays a network round trip.
+
+    python -m benchmarks.bench_auth_me [requests] [concurrency]
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_auth.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+import httpx
+import uvicorn
+from datetime import datetime, timezone
+from fastapi import Depends, FastAPI, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from core import jwt as jwt_utils
+from core.user_cache import user_cache
+from db.database import Base, SessionLocal, engine, get_db
+from db.models.user import User
+from endpoints.auth import get_current_user, router as auth_router
+
+def legacy_current_user(Authorization: str = Header(...), db: Session = Depends(get_db)) -> User:
+    """get_current_user as it was before the user cache."""
+    token = Authorization.replace("Bearer ", "")
+    payload = jwt_utils.verify_access_token(token)
+    if not payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    if not user or user.email != payload.get("email"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user")
+    exp_timestamp = payload.get("exp")
+    if exp_timestamp and datetime.now(timezone.utc) > datetime.fromtimestamp(exp_timestamp, tz=timezone.utc):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
+    return user
+
+app = FastAPI()
+app.include_router(auth_router)
+
+def seed_user() -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "bench@example.com").first()
+        if user is None:
+            user = User(username="bench", email="bench@example.com", hashed_password="x", is_verified=True)
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        return jwt_utils.create_access_token({"sub": user.id, "email": user.email})
+    finally:
+        db.close()
+
+def start_server():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+async def load(base, token, requests, concurrency):
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+    failures = 0
+
+    async def worker(client):
+        nonlocal failures
+        for _ in remaining:
+            response = await client.get("/auth/me", headers=headers)
+            failures += response.status_code != 200
+
+    async with httpx.AsyncClient(base_url=base, limits=httpx.Limits(max_connections=concurrency)) as client:
+        await client.get("/auth/me", headers=headers)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return time.perf_counter() - start, failures
+
+def main(requests=5000, concurrency=50):
+    token = seed_user()
+    server, base = start_server()
+    print(f"{requests} requests to /auth/me, {concurrency} concurrent, one uvicorn worker, {engine.url.get_backend_name()}")
+    for label, override in (("legacy", legacy_current_user), ("cached", None)):
+        if override is None:
+            app.dependency_overrides.pop(get_current_user, None)
+        else:
+            app.dependency_overrides[get_current_user] = override
+        user_cache.clear()
+        elapsed, failures = asyncio.run(load(base, token, requests, concurrency))
+        print(f"{label:<7} {requests / elapsed:8.0f} req/s  ({elapsed:5.2f}s, {failures} failed)")
+    server.should_exit = True
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
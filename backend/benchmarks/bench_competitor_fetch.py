@@ -0,0 +1,67 @@
+"""
+Wall time of CompetitorAnalysisService.extract_keywords_from_url over ten competitor URLs
+with the old blocking requests.get path vs the pooled async client. Runs against a local
+stub whose pages answer after 0.1s-1.0s; GOOGLE_API_KEY is unset so no LLM call is made.
+
+    python -m benchmarks.bench_competitor_fetch
+"""
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+os.environ.pop("GOOGLE_API_KEY", None)
+from services.CompetitorAnalysisService import CompetitorAnalysisService
+from services.PageSnapshotService import PageSnapshotService
+
+PAGE = ("<html><head><title>Acme running shoes</title><meta name='description' content='Trail and road running shoes'></head>"
+        "<body><h1>Running shoes</h1><h2>Trail running</h2>" + "<p>Lightweight trail running shoes with grip for every runner.</p>" * 200 + "</body></html>").encode()
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # /<n> answers after n/10 seconds.
+        time.sleep(int(self.path.strip("/")) / 10)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+async def blocking_extract(url):
+    # The previous implementation: requests.get inside an async def.
+    html = requests.get(url, timeout=150).text
+    return CompetitorAnalysisService.extract_candidate_keywords(PageSnapshotService.parse_html(html))[:5]
+
+async def gather(extract, urls):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(extract(url) for url in urls))
+    return time.perf_counter() - start, results
+
+async def main():
+    # Distinct hosts (127.0.0.x) so the per-host limit does not serialise the run.
+    servers = []
+    for i in range(1, 11):
+        server = StubServer((f"127.0.0.{i}", 0), SlowHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    urls = [f"http://127.0.0.{i + 1}:{s.server_address[1]}/{i + 1}" for i, s in enumerate(servers)]
+    print(f"{len(urls)} URLs, slowest page 1.00s, sum of page latencies {sum(range(1, 11)) / 10:.2f}s")
+    elapsed, _ = await gather(blocking_extract, urls)
+    print(f"{'blocking requests.get':<24} {elapsed:6.2f}s")
+    elapsed, results = await gather(CompetitorAnalysisService.extract_keywords_from_url, urls)
+    print(f"{'pooled async client':<24} {elapsed:6.2f}s  keywords={results[0]}")
+    await PageSnapshotService.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
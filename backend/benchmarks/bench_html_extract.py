@@ -0,0 +1,62 @@
+"""
+CPU cost of the HTML extraction backends in core.html_extract (bs4 = the previous
+BeautifulSoup tree walk) over a corpus of saved pages.
+
+    python -m benchmarks.bench_html_extract [fixtures_dir]
+
+fixtures_dir holds *.html files (e.g. competitor pages saved with curl). Without it a
+synthetic corpus of small, medium and large pages with inline scripts and styles is used.
+"""
+import importlib.util
+import pathlib
+import random
+import sys
+import time
+from core.html_extract import BACKENDS, MAX_PARSE_CHARS, extract_page
+
+WORDS = "running shoes trail road marathon cushioning grip lightweight runner training race pace mileage foam sole".split()
+
+def synthetic_page(rng, sections):
+    parts = ["<!doctype html><html><head><title>Acme running shoes</title>",
+             "<meta name='description' content='Trail and road running shoes'>",
+             "<style>" + ".c{color:red}" * 200 + "</style>",
+             "<script>" + "var data = {a: 1, b: [1, 2, 3]};" * 300 + "</script></head><body>",
+             "<nav>" + "".join(f"<a href='/p{i}'>{rng.choice(WORDS)}</a>" for i in range(50)) + "</nav>",
+             "<h1>Running shoes for every runner</h1>"]
+    for i in range(sections):
+        parts.append(f"<section><h2>{' '.join(rng.choices(WORDS, k=3))}</h2>")
+        parts.extend(f"<p>{' '.join(rng.choices(WORDS, k=40))} <b>{rng.choice(WORDS)}</b></p>" for _ in range(5))
+        parts.append("<script>track('section');</script><svg><path d='M0 0L10 10'/></svg></section>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def load_corpus(path):
+    if path:
+        return [(p.name, p.read_text(errors="replace")) for p in sorted(pathlib.Path(path).glob("*.html"))]
+    rng = random.Random(7)
+    return [(f"synthetic-{n}", synthetic_page(rng, n)) for n in (5, 20, 50, 100, 200, 400)]
+
+def main(path=None):
+    corpus = load_corpus(path)
+    total = sum(len(html) for _, html in corpus)
+    print(f"{len(corpus)} pages, {total / 1e6:.2f} MB of HTML (parse cap {MAX_PARSE_CHARS:,} chars)")
+    backends = [b for b in BACKENDS if b != "lxml" or importlib.util.find_spec("lxml")]
+    timings = {}
+    for backend in backends:
+        rounds = 3
+        start = time.process_time()
+        for _ in range(rounds):
+            for _, html in corpus:
+                extract_page(html, backend)
+        timings[backend] = (time.process_time() - start) / rounds
+    baseline = timings["bs4"]
+    for backend, elapsed in timings.items():
+        print(f"{backend:<8} {elapsed * 1000:8.1f} ms/corpus  {total / elapsed / 1e6:6.1f} MB/s  {baseline / elapsed:5.1f}x vs bs4")
+    # Sanity check: the backends should agree on the structured fields.
+    name, html = corpus[-1]
+    for backend in backends:
+        fields = extract_page(html, backend)
+        print(f"{backend:<8} {name}: title={fields['title']!r} h1={fields['h1_tags'][:40]!r} text={len(fields['text']):,} chars")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,52 @@
+"""
+Latency of local keyword clustering (core.keyword_cluster) for synthetic keyword lists that
+contain plural, reordered and modifier variants of a set of base keywords. Reports the first
+call (n-gram hashing not cached yet) and the best of several repeated calls.
+
+    python -m benchmarks.bench_keyword_cluster [candidates] [repeats]
+"""
+import random
+import sys
+import time
+from core import keyword_cluster
+from core.keyword_cluster import cluster_keywords
+
+MODIFIERS = ["best", "cheap", "top", "buy", "online", "near me", "guide", "review", "2024", "for beginners"]
+
+def synthetic_keywords(rng, count):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(max(count // 3, 10))]
+    keywords = []
+    while len(keywords) < count:
+        base = rng.sample(words, rng.randint(1, 2))
+        variant = rng.random()
+        if variant < 0.2:
+            base = base[::-1]
+        elif variant < 0.4:
+            base = base[:-1] + [base[-1] + "s"]
+        elif variant < 0.6:
+            base = base + [rng.choice(MODIFIERS)]
+        keywords.append(" ".join(base))
+    return keywords
+
+def main(candidates=1000, repeats=5):
+    rng = random.Random(3)
+    keywords = synthetic_keywords(rng, candidates)
+    scores = [rng.random() for _ in keywords]
+    keyword_cluster._ngram_columns.cache_clear()
+    start = time.perf_counter()
+    clusters = cluster_keywords(keywords, scores)
+    cold = time.perf_counter() - start
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cluster_keywords(keywords, scores)
+        timings.append(time.perf_counter() - start)
+    print(f"{candidates} candidates -> {len(clusters)} clusters (threshold {keyword_cluster.CLUSTER_THRESHOLD}, dim {keyword_cluster.CLUSTER_DIM})")
+    print(f"first call {cold * 1000:7.2f} ms   best of {repeats} {min(timings) * 1000:7.2f} ms")
+    largest = max(clusters, key=len)
+    print("largest cluster:", ", ".join(keywords[i] for i in largest[:8]))
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,86 @@
+"""
+Throughput of competitor keyword extraction: the previous path (two new YAKE extractors per
+page, full text, list dedupe) vs warm extractors with capped input, in-process and in the
+process pool, both in a plain process and in a daemonic one as Celery prefork children are
+(where the pool is a billiard pool). Reports pages per second and pages per second per core;
+run it on several cores, a single core cannot show the pool scaling.
+
+    python -m benchmarks.bench_keyword_extract [pages] [workers]
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+import billiard
+import yake
+from benchmarks.bench_html_extract import synthetic_page
+from core.html_extract import extract_page
+from core.keyword_extract import KeywordExtractionPool, STOPWORDS, aextract_candidates, extract_candidates
+import core.keyword_extract as keyword_extract
+
+def legacy_candidates(full_text, max_keywords=5):
+    kw_extractor1 = yake.KeywordExtractor(lan="en", n=1, top=max_keywords*4)
+    kw_extractor2 = yake.KeywordExtractor(lan="en", n=2, top=max_keywords*4)
+    keywords1 = [kw for kw, score in kw_extractor1.extract_keywords(full_text)]
+    keywords2 = [kw for kw, score in kw_extractor2.extract_keywords(full_text)]
+    cleaned = [re.sub(r'[^a-zA-Z0-9\- ]', '', kw).strip().lower() for kw in keywords1 + keywords2]
+    filtered = [kw for kw in cleaned if len(kw) > 2 and kw not in STOPWORDS]
+    candidate_keywords = []
+    for kw, _ in Counter(filtered).most_common():
+        if kw not in candidate_keywords:
+            candidate_keywords.append(kw)
+    return candidate_keywords
+
+def report(label, pages, elapsed, cores):
+    rate = pages / elapsed
+    print(f"{label:<34} {rate:7.2f} pages/s  {rate / cores:7.2f} pages/s/core  ({cores} core{'s' if cores > 1 else ''})")
+
+async def pooled(texts):
+    return await asyncio.gather(*(aextract_candidates(text) for text in texts))
+
+def timed_pool_run(texts, workers):
+    """Warm the pool, then time extracting every text through it; runs in the process under test."""
+    pool = keyword_extract.keyword_pool = KeywordExtractionPool(workers)
+    executor = pool.get()
+    executor.submit(keyword_extract._warm_worker).result()
+    start = time.perf_counter()
+    asyncio.run(pooled(texts))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return elapsed, type(executor).__name__
+
+def main(pages=24, workers=None):
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(11)
+    texts = []
+    for i in range(pages):
+        fields = extract_page(synthetic_page(rng, rng.choice((20, 50, 100))))
+        texts.append(f"{fields['title']} {fields['meta_desc']} {fields['h1_tags']} {fields['h2_tags']} {fields['text']}")
+    print(f"{pages} pages, mean {sum(map(len, texts)) / pages / 1000:.0f}k chars of text, {workers} pool worker(s)")
+
+    start = time.perf_counter()
+    for text in texts:
+        legacy_candidates(text)
+    report("legacy (cold, full text)", pages, time.perf_counter() - start, 1)
+
+    start = time.perf_counter()
+    for text in texts:
+        extract_candidates(text)
+    report("warm, capped, in-process", pages, time.perf_counter() - start, 1)
+
+    cores = min(workers, os.cpu_count() or 1)
+    elapsed, executor = timed_pool_run(texts, workers)
+    report(f"warm, capped, {executor}", pages, elapsed, cores)
+    # A daemonic child of a forked billiard pool stands in for a Celery prefork child.
+    with billiard.get_context("fork").Pool(1) as celery_like:
+        elapsed, executor = celery_like.apply(timed_pool_run, (texts, workers))
+    report(f"prefork child, {executor}", pages, elapsed, cores)
+    if cores == 1:
+        print("only one core available: the pool rows cannot show multi-core scaling")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
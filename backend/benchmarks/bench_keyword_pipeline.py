@@ -0,0 +1,63 @@
+"""
+End-to-end latency of keyword generation in "full" (five sequential LLM calls plus local
+clustering) and "fast" (one structured call plus local filtering) mode, with Gemini replaced
+by a stub that answers after a fixed delay. The LLM response cache is disabled.
+
+    python -m benchmarks.bench_keyword_pipeline [llm_latency_seconds]
+"""
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+os.environ["LLM_CACHE_TTL"] = "0"
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("GEMINI_BURST", "100")
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from services.KeywordGenerationService import KeywordGenerationService
+
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+LEVELS = ["very low", "low", "medium", "high", "very high"]
+KEYWORDS = [
+    {"keyword": f"{prefix} running shoes" if i % 3 else f"running shoes {suffix}",
+     "search_volume": LEVELS[i % 5], "keyword_difficulty": LEVELS[(i * 2) % 5],
+     "competitive_density": LEVELS[(i * 3) % 5], "intent": ["informational", "commercial", "navigational"][i % 3]}
+    for i, (prefix, suffix) in enumerate(zip(
+        ["best", "cheap", "trail", "women", "men", "kids", "wide", "light", "road", "buy"] * 4,
+        ["guide", "review", "sale", "near me", "2024", "brands", "size", "price", "tips", "deals"] * 4))
+]
+calls = []
+
+def stub_content(messages):
+    """Canned answer for a pipeline prompt."""
+    prompt = messages[-1].content
+    if "SeedAnalyzer" in messages[0].content:
+        return "1. Primary intent: Commercial\n2. Subtopics: trail shoes, road shoes, shoe reviews\n3. Modifiers: near me"
+    if "KeywordExpander" in messages[0].content:
+        return "\n".join(f"{k['keyword']}: {k['search_volume']}" for k in KEYWORDS)
+    if "primary intent" in prompt and "JSON only" in prompt:
+        return json.dumps({"intent": "commercial", "subtopics": ["trail shoes", "road shoes", "shoe reviews"], "keywords": KEYWORDS})
+    return json.dumps(KEYWORDS[:20])
+
+def stub_generate(self, messages, stop=None, run_manager=None, **kwargs):
+    calls.append(1)
+    time.sleep(LATENCY)
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=stub_content(messages)))])
+
+def main():
+    print(f"stub LLM latency {LATENCY:.2f}s per call")
+    with mock.patch("langchain_google_genai.ChatGoogleGenerativeAI._generate", stub_generate):
+        for mode in ("full", "fast"):
+            calls.clear()
+            start = time.perf_counter()
+            result = KeywordGenerationService.generate_keyword_suggestions("running shoes", mode=mode, top_n=10)
+            elapsed = time.perf_counter() - start
+            intents = [k["intent"] for k in result["keywords"]]
+            print(f"{mode:<5} {elapsed:6.2f}s  {len(calls)} LLM call(s)  {len(result['keywords'])} keywords  "
+                  f"informational={intents.count('informational')} commercial={intents.count('commercial')}")
+
+if __name__ == "__main__":
+    main()
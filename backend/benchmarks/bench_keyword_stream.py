@@ -0,0 +1,171 @@
+"""
+Load test for /keywords/generate-advanced-stream: how many concurrent SSE streams one uvicorn
+worker holds with the previous endpoint (sync generator iterated in Starlette's threadpool)
+vs the async one (KeywordPipeline.aevents on the event loop). Gemini is replaced by stubs that
+answer after a fixed delay, the async one in several chunks. Also checks that streams closed
+by the client cancel their in-flight LLM calls.
+
+    python -m benchmarks.bench_keyword_stream [streams] [llm_latency_seconds]
+"""
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from contextlib import aclosing
+from unittest import mock
+
+os.environ["LLM_CACHE_TTL"] = "0"
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ["GEMINI_QPS"] = "100000"
+os.environ["GEMINI_BURST"] = "100000"
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from sse_starlette.sse import EventSourceResponse
+from benchmarks import bench_keyword_pipeline
+from benchmarks.bench_keyword_pipeline import stub_content, stub_generate
+from services.KeywordGenerationService import KeywordGenerationService
+
+CHUNKS = 10
+
+class InFlight:
+    """Concurrent stub LLM calls, their peak, and calls abandoned before they finished."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.peak = self.abandoned = 0
+
+    def enter(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self, abandoned=False):
+        with self.lock:
+            self.current -= 1
+            self.abandoned += abandoned
+
+    def reset(self):
+        self.current = self.peak = self.abandoned = 0
+
+in_flight = InFlight()
+
+def counted_generate(self, messages, stop=None, run_manager=None, **kwargs):
+    in_flight.enter()
+    try:
+        return stub_generate(self, messages, stop, run_manager, **kwargs)
+    finally:
+        in_flight.leave()
+
+async def stub_astream(self, messages, stop=None, run_manager=None, **kwargs):
+    in_flight.enter()
+    finished = False
+    try:
+        latency = bench_keyword_pipeline.LATENCY
+        content = stub_content(messages)
+        size = max(len(content) // CHUNKS, 1)
+        # Half the latency to the first token, the rest spread over the chunks.
+        await asyncio.sleep(latency / 2)
+        for i in range(0, len(content), size):
+            await asyncio.sleep(latency / 2 / CHUNKS)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + size]))
+        finished = True
+    finally:
+        in_flight.leave(abandoned=not finished)
+
+app = FastAPI()
+
+@app.get("/legacy")
+async def legacy_stream(seed: str):
+    def event_generator():
+        for event in KeywordGenerationService.generate_keyword_suggestions_stream(seed):
+            yield event
+    return EventSourceResponse(event_generator())
+
+@app.get("/async")
+async def async_stream(request: Request, seed: str):
+    # Same body as endpoints.keyword.generate_keywords_stream.
+    async def event_generator():
+        async with aclosing(KeywordGenerationService.agenerate_keyword_suggestions_stream(seed)) as events:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                yield event
+    return EventSourceResponse(event_generator())
+
+def start_server():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", timeout_keep_alive=60))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+async def one_stream(client, url, stop_after_token=False):
+    start = time.perf_counter()
+    first_event = None
+    tokens = 0
+    async with client.stream("GET", url, params={"seed": "running shoes"}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            if first_event is None:
+                first_event = time.perf_counter() - start
+            if '"event": "token"' in line:
+                tokens += 1
+                if stop_after_token:
+                    return first_event, None, tokens
+            elif '"event": "complete"' in line:
+                return first_event, time.perf_counter() - start, tokens
+    return first_event, None, tokens
+
+async def load(base, path, streams):
+    limits = httpx.Limits(max_connections=streams + 10, max_keepalive_connections=streams + 10)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=600) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one_stream(client, path) for _ in range(streams)))
+        return time.perf_counter() - start, results
+
+async def disconnect(base, streams):
+    async with httpx.AsyncClient(base_url=base, limits=httpx.Limits(max_connections=streams + 10), timeout=60) as client:
+        await asyncio.gather(*(one_stream(client, "/async", stop_after_token=True) for _ in range(streams)))
+    # Give the server a moment to notice the closed connections.
+    for _ in range(50):
+        if in_flight.current == 0:
+            break
+        await asyncio.sleep(0.1)
+
+def report(label, streams, elapsed, results):
+    done = [r[1] for r in results if r[1] is not None]
+    first = sorted(r[0] for r in results if r[0] is not None)
+    p95 = first[int(len(first) * 0.95) - 1] if first else 0.0
+    print(f"{label:<7} {len(done)}/{streams} streams in {elapsed:6.2f}s  peak concurrent LLM calls {in_flight.peak:4d}  "
+          f"first event p50 {statistics.median(first):5.2f}s p95 {p95:5.2f}s  "
+          f"token events/stream {statistics.mean(r[2] for r in results):.0f}")
+
+def main(streams=200, latency=0.5):
+    bench_keyword_pipeline.LATENCY = latency
+    server, base = start_server()
+    print(f"{streams} concurrent streams, stub LLM latency {latency:.2f}s per call, one uvicorn worker")
+    with mock.patch("langchain_google_genai.ChatGoogleGenerativeAI._generate", counted_generate), \
+         mock.patch("langchain_google_genai.ChatGoogleGenerativeAI._astream", stub_astream):
+        for label, path in (("legacy", "/legacy"), ("async", "/async")):
+            in_flight.reset()
+            elapsed, results = asyncio.run(load(base, path, streams))
+            report(label, streams, elapsed, results)
+        in_flight.reset()
+        asyncio.run(disconnect(base, min(streams, 50)))
+        print(f"disconnect after first token: {in_flight.abandoned} in-flight LLM call(s) cancelled, {in_flight.current} still running")
+    server.should_exit = True
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200, float(args[1]) if len(args) > 1 else 0.5)
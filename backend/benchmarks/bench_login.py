@@ -0,0 +1,134 @@
+"""
+Login throughput of one uvicorn worker during a login storm, and how responsive the worker stays
+for other requests meanwhile: bcrypt in the request thread (the previous Hasher) vs the hashing
+process pool (core.hashing). Half of the seeded users have passwords hashed at a lower cost, so
+the run also shows the rehash-on-login upgrade. Runs against a throw-away SQLite file unless
+DATABASE_URL is set.
+
+    python -m benchmarks.bench_login [logins] [concurrency] [users]
+"""
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_login.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from passlib.context import CryptContext
+from core import hashing
+from core.hashing import BCRYPT_ROUNDS, Hasher, hashing_pool
+from db.database import Base, SessionLocal, engine
+from db.models.user import User
+from endpoints.auth import router as auth_router
+
+PASSWORD = "correct horse battery staple"
+
+app = FastAPI()
+app.include_router(auth_router)
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+def legacy_verify_and_update(plain_password, hashed_password):
+    # The previous Hasher: bcrypt in the request's threadpool thread of the API process.
+    return hashing.verify_and_update(plain_password, hashed_password)
+
+def seed_users(count: int) -> list[str]:
+    Base.metadata.create_all(bind=engine)
+    cheaper = CryptContext(schemes=["bcrypt"], bcrypt__rounds=max(BCRYPT_ROUNDS - 2, 4))
+    current, old = hashing.hash_password(PASSWORD), cheaper.hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.username.like("bench-login-%")).delete(synchronize_session=False)
+        emails = [f"bench-login-{i}@example.com" for i in range(count)]
+        db.add_all([
+            User(username=f"bench-login-{i}", email=email, hashed_password=old if i % 2 else current, is_verified=True)
+            for i, email in enumerate(emails)
+        ])
+        db.commit()
+        return emails
+    finally:
+        db.close()
+
+def count_at_current_cost() -> int:
+    db = SessionLocal()
+    try:
+        prefix = f"$2b${BCRYPT_ROUNDS:02d}$"
+        return sum(h.startswith(prefix) for (h,) in db.query(User.hashed_password).filter(User.username.like("bench-login-%")))
+    finally:
+        db.close()
+
+def start_server():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+async def storm(base, emails, logins, concurrency):
+    remaining = iter(range(logins))
+    failures = 0
+    pings = []
+    done = asyncio.Event()
+
+    async def login_worker(client):
+        nonlocal failures
+        for i in remaining:
+            response = await client.post("/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD})
+            failures += response.status_code != 200
+
+    async def pinger(client):
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/ping")
+            pings.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=base, limits=httpx.Limits(max_connections=concurrency + 5), timeout=600) as client:
+        ping_task = asyncio.create_task(pinger(client))
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(login_worker(client) for _ in range(concurrency)))
+        finally:
+            elapsed = time.perf_counter() - start
+            done.set()
+            await ping_task
+    pings.sort()
+    return elapsed, failures, pings
+
+def main(logins=200, concurrency=20, users=50):
+    server, base = start_server()
+    print(f"{logins} logins, {concurrency} concurrent, bcrypt cost {BCRYPT_ROUNDS}, "
+          f"hashing pool of {hashing.HASH_WORKERS} process(es), one uvicorn worker, {engine.url.get_backend_name()}")
+    for label in ("legacy", "pool"):
+        emails = seed_users(users)
+        before = count_at_current_cost()
+        if label == "legacy":
+            with mock.patch.object(Hasher, "verify_and_update", legacy_verify_and_update):
+                elapsed, failures, pings = asyncio.run(storm(base, emails, logins, concurrency))
+        else:
+            hashing_pool.get().submit(int).result()
+            elapsed, failures, pings = asyncio.run(storm(base, emails, logins, concurrency))
+        p95 = pings[int(len(pings) * 0.95) - 1] if pings else 0.0
+        print(f"{label:<7} {logins / elapsed:7.1f} logins/s ({failures} failed)  "
+              f"/ping during storm p50 {statistics.median(pings) * 1000:6.1f} ms p95 {p95 * 1000:6.1f} ms  "
+              f"hashes at cost {BCRYPT_ROUNDS}: {before} -> {count_at_current_cost()} of {users}")
+    hashing_pool.shutdown()
+    server.should_exit = True
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
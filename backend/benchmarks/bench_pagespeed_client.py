@@ -0,0 +1,68 @@
+"""
+Connection setup cost of PageSpeedService: one AsyncClient per request (old behaviour)
+vs the pooled, long-lived client. Runs against a local stub of the PageSpeed API.
+
+    python -m benchmarks.bench_pagespeed_client [requests]
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+
+os.environ.setdefault("PAGESPEED_API_KEY", "benchmark")
+from services.PageSpeedService import PageSpeedService
+
+BODY = json.dumps({"lighthouseResult": {"categories": {}, "audits": {}}}).encode()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+async def per_request_client(url, params):
+    async with httpx.AsyncClient(timeout=30) as client:
+        return (await client.get(url, params=params)).json()
+
+async def run(label, server, fetch, n):
+    server.connections = 0
+    start = time.perf_counter()
+    for _ in range(n):
+        await fetch()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {n} requests  {elapsed * 1000 / n:7.2f} ms/request  {server.connections} TCP connections")
+
+async def main(n):
+    server = CountingServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/runPagespeed"
+    service = PageSpeedService()
+    service.base_url = base_url
+    params = {"url": "https://example.com", "strategy": "mobile"}
+    await run("new client per call", server, lambda: per_request_client(base_url, params), n)
+    await run("pooled client", server, lambda: service.analyze_page("https://example.com"), n)
+    await service.aclose()
+    server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,65 @@
+"""
+Peak memory of turning a PageSpeed response into the lighthouseResult AuditService uses:
+response.json() on the whole body (old behaviour) vs the streaming path
+(DataUrlStripper over body chunks + project_lighthouse).
+
+    python -m benchmarks.bench_pagespeed_streaming [screenshot_mb]
+"""
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+import httpx
+
+os.environ.setdefault("PAGESPEED_API_KEY", "benchmark")
+from services.PageSpeedService import DataUrlStripper, project_lighthouse
+
+CHUNK_SIZE = 64 * 1024
+
+def build_body(screenshot_mb: float) -> bytes:
+    blob = lambda size: "data:image/webp;base64," + base64.b64encode(os.urandom(int(size))).decode()
+    audits = {
+        "final-screenshot": {"id": "final-screenshot", "details": {"type": "screenshot", "data": blob(60_000)}},
+        "screenshot-thumbnails": {"id": "screenshot-thumbnails", "details": {"items": [{"timing": i * 300, "data": blob(15_000)} for i in range(10)]}},
+        "network-requests": {"id": "network-requests", "details": {"items": [{"url": f"https://example.com/asset-{i}.js", "transferSize": i * 100, "resourceType": "Script"} for i in range(3000)]}},
+    }
+    for i in range(150):
+        audits[f"audit-{i}"] = {"id": f"audit-{i}", "title": f"Audit {i}", "description": "Lorem ipsum " * 20, "score": 0.5, "scoreDisplayMode": "numeric", "numericValue": i, "details": {"overallSavingsMs": i * 10, "items": [{"url": f"https://example.com/{i}/{j}"} for j in range(40)]}}
+    lighthouse = {
+        "finalUrl": "https://example.com/", "fetchTime": "2025-01-01T00:00:00.000Z",
+        "categories": {"performance": {"title": "Performance", "score": 0.9}},
+        "configSettings": {}, "environment": {}, "runWarnings": [], "categoryGroups": {},
+        "audits": audits,
+        "fullPageScreenshot": {"screenshot": {"data": blob(screenshot_mb * 1024 * 1024 * 3 / 4)}},
+        "i18n": {"rendererFormattedStrings": {f"s{i}": "x" * 50 for i in range(500)}},
+    }
+    return json.dumps({"lighthouseResult": lighthouse}).encode()
+
+def full_parse(body: bytes) -> dict:
+    response = httpx.Response(200, content=body)
+    return response.json()["lighthouseResult"]
+
+def streaming_parse(body: bytes) -> dict:
+    stripper = DataUrlStripper()
+    for i in range(0, len(body), CHUNK_SIZE):
+        stripper.feed(body[i:i + CHUNK_SIZE])
+    data = json.loads(stripper.getvalue())
+    return project_lighthouse(data.pop("lighthouseResult"))
+
+def measure(label, fn, body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kept = len(json.dumps(result))
+    print(f"{label:<10} peak {peak / 1e6:8.2f} MB   kept {kept / 1e6:6.2f} MB   {elapsed * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    body = build_body(float(sys.argv[1]) if len(sys.argv) > 1 else 8)
+    print(f"response body: {len(body) / 1e6:.1f} MB")
+    measure("json()", full_parse, body)
+    measure("streaming", streaming_parse, body)
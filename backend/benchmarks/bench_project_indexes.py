@@ -0,0 +1,99 @@
+"""
+Query plans and latencies of the project-scoped dashboard lookups with and without
+the (project_id, created_at DESC) indexes, on seeded copies of the tables.
+
+Runs against DATABASE_URL (PostgreSQL) inside a throw-away schema that is dropped afterwards.
+
+    python -m benchmarks.bench_project_indexes [rows ...]     # default: 10000 100000 1000000
+"""
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+SCHEMA = "bench_project_indexes"
+ROWS_PER_PROJECT = 100
+REPEAT = 20
+
+TABLES = {
+    "audit_reports": """
+        CREATE TABLE audit_reports (
+            id serial PRIMARY KEY, project_id varchar(36) NOT NULL, overall_score int,
+            pagespeed_data json, created_at timestamptz NOT NULL
+        )""",
+    "keywords": """
+        CREATE TABLE keywords (
+            id varchar(36) PRIMARY KEY, keyword varchar(500) NOT NULL, project_id varchar(36) NOT NULL
+        )""",
+    "competitor_analyses": """
+        CREATE TABLE competitor_analyses (
+            id varchar(36) PRIMARY KEY, project_id varchar(36) NOT NULL, content_gaps json,
+            created_at timestamptz NOT NULL
+        )""",
+}
+
+SEED = {
+    "audit_reports": """
+        INSERT INTO audit_reports (project_id, overall_score, pagespeed_data, created_at)
+        SELECT 'project-' || (g % :projects), g % 100, json_build_object('mobile', repeat('x', 200)),
+               now() - (g || ' seconds')::interval
+        FROM generate_series(1, :rows) g""",
+    "keywords": """
+        INSERT INTO keywords (id, keyword, project_id)
+        SELECT md5(g::text), 'keyword ' || g, 'project-' || (g % :projects)
+        FROM generate_series(1, :rows) g""",
+    "competitor_analyses": """
+        INSERT INTO competitor_analyses (id, project_id, content_gaps, created_at)
+        SELECT md5(g::text), 'project-' || (g % :projects), json_build_array(repeat('y', 200)),
+               now() - (g || ' seconds')::interval
+        FROM generate_series(1, :rows) g""",
+}
+
+QUERIES = {
+    "audit_reports": "SELECT id, overall_score, created_at FROM audit_reports WHERE project_id = :project ORDER BY created_at DESC, id DESC LIMIT 20",
+    "keywords": "SELECT * FROM keywords WHERE project_id = :project",
+    "competitor_analyses": "SELECT * FROM competitor_analyses WHERE project_id = :project ORDER BY created_at DESC",
+}
+
+INDEXES = {
+    "audit_reports": "CREATE INDEX ix_audit_reports_project_id_created_at ON audit_reports (project_id, created_at DESC, id DESC)",
+    "keywords": "CREATE INDEX ix_keywords_project_id ON keywords (project_id)",
+    "competitor_analyses": "CREATE INDEX ix_competitor_analyses_project_id_created_at ON competitor_analyses (project_id, created_at DESC)",
+}
+
+def run_query(conn, table, project):
+    plan = conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + QUERIES[table]), {"project": project}).scalars().all()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        conn.execute(text(QUERIES[table]), {"project": project}).all()
+    return (time.perf_counter() - start) * 1000 / REPEAT, plan
+
+def bench(engine, rows):
+    projects = max(1, rows // ROWS_PER_PROJECT)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        for table, ddl in TABLES.items():
+            conn.execute(text(ddl))
+            conn.execute(text(SEED[table]), {"rows": rows, "projects": projects})
+            conn.execute(text(f"ANALYZE {table}"))
+        print(f"\n=== {rows:,} rows per table, {projects:,} projects ===")
+        for table in TABLES:
+            before, plan_before = run_query(conn, table, "project-1")
+            conn.execute(text(INDEXES[table]))
+            conn.execute(text(f"ANALYZE {table}"))
+            after, plan_after = run_query(conn, table, "project-1")
+            print(f"\n{table}: {before:8.2f} ms -> {after:8.2f} ms")
+            print("  without index: " + "\n                 ".join(plan_before[:3]))
+            print("  with index:    " + "\n                 ".join(plan_after[:3]))
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    engine = create_engine(os.environ["DATABASE_URL"])
+    for rows in sizes:
+        bench(engine, rows)
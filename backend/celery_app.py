@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from dotenv import load_dotenv
 import urllib.parse
 
@@ -11,6 +12,8 @@ celery_app = Celery(
     "seo_agent",
     broker=REDIS_URL,
     backend=REDIS_URL,
+    # Every task publishes its progress and result to Redis pub/sub (endpoints/tasks.py pushes them to clients).
+    task_cls="core.progress:ProgressTask",
     include=["tasks.audit_tasks", "tasks.keyword_tasks", "tasks.competitor_analysis_tasks"]
 )
 
@@ -32,4 +35,21 @@ celery_app.conf.update(
         "tasks.competitor_analysis_tasks.*": {"queue": "competitor_analysis"},
     },
     task_default_queue="competitor_analysis",
-) 
\ No newline at end of file
+)
+
+@worker_process_init.connect
+def start_async_runtime(**kwargs):
+    from core.async_runtime import worker_runtime
+    worker_runtime.start()
+
+@worker_process_shutdown.connect
+def close_http_clients(**kwargs):
+    from core.async_runtime import worker_runtime
+    from services.PageSpeedService import PageSpeedService
+    from services.PageSnapshotService import PageSnapshotService
+    from core.keyword_extract import keyword_pool
+    # Pooled clients live on the runtime loop, so close them before stopping it.
+    PageSpeedService.close_all()
+    PageSnapshotService.close_all()
+    worker_runtime.shutdown()
+    keyword_pool.shutdown()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+class AsyncRuntime:
+    """
+    One asyncio event loop per process, running on a background thread.
+
+    Celery tasks are synchronous; instead of creating and closing a loop per task they
+    submit coroutines here with run(). Loop-bound resources (pooled httpx clients, the
+    async cache/rate-limit helpers) therefore live for the whole worker process.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def start(self):
+        """Start the loop thread if it is not running yet (idempotent, safe after fork)."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's thread does not exist here.
+                self._loop, self._thread, self._pid = None, None, os.getpid()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            def serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+            self._thread = threading.Thread(target=serve, name=self.name, daemon=True)
+            self._loop = loop
+            self._thread.start()
+            ready.wait()
+            logger.info(f"[AsyncRuntime] {self.name} started in pid {self._pid}")
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run coro on the runtime loop and block until it finishes; returns its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timeouts and Celery's SoftTimeLimitExceeded land here; do not leave the work running.
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float = 10.0):
+        """Cancel outstanding work, stop the loop and join its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        async def cancel_pending():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[AsyncRuntime] Failed to cancel pending work: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+        logger.info(f"[AsyncRuntime] {self.name} stopped")
+
+worker_runtime = AsyncRuntime("celery-async-runtime")
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+_REDIS_RETRY_SECONDS = 30
+# Hit/miss counters are added to the Redis totals at most this often per cache and process.
+STATS_FLUSH_SECONDS = float(os.getenv("CACHE_STATS_FLUSH_SECONDS", "10"))
+
+_redis_client = None
+_redis_down_until = 0.0
+
+def get_redis() -> Optional[redis.Redis]:
+    """Shared Redis client, or None when Redis is not configured or recently unreachable."""
+    global _redis_client
+    if not REDIS_URL or time.monotonic() < _redis_down_until:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    return _redis_client
+
+def mark_redis_down(error: Exception):
+    global _redis_down_until
+    logger.warning(f"[Cache] Redis unavailable, using in-process tier only for {_REDIS_RETRY_SECONDS}s: {error}")
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+class TwoTierCache:
+    """
+    In-process LRU in front of Redis. Values must be JSON serialisable.
+    A ttl of 0 disables caching for that entry. Hit/miss counters are kept per
+    process and aggregated across processes in Redis under cache:stats:<namespace>,
+    flushed every STATS_FLUSH_SECONDS so local hits never wait on the network.
+    With max_redis_entries set, the oldest Redis entries are evicted beyond that count.
+    """
+    registry: dict[str, "TwoTierCache"] = {}
+
+    def __init__(self, namespace: str, max_entries: int = 256, ttl: int = 3600, max_redis_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_redis_entries = max_redis_entries
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "sets": 0}
+        self._unflushed: dict[str, int] = {}
+        self._flushed_at = time.monotonic()
+        TwoTierCache.registry[namespace] = self
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+            self._unflushed[counter] = self._unflushed.get(counter, 0) + amount
+            due = time.monotonic() - self._flushed_at >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add the counts since the last flush to the Redis totals in one pipelined round trip."""
+        with self._lock:
+            pending, self._unflushed = self._unflushed, {}
+            self._flushed_at = time.monotonic()
+        client = get_redis()
+        if not pending or client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for counter, amount in pending.items():
+                pipe.hincrby(f"cache:stats:{self.namespace}", counter, amount)
+            pipe.execute()
+        except redis.RedisError as e:
+            mark_redis_down(e)
+
+    def record(self, counter: str, amount: int = 1):
+        """Add to a namespace-specific counter reported by stats() (e.g. tokens saved)."""
+        self._count(counter, amount)
+
+    def _evict_redis(self, client: redis.Redis, key: str, ttl: int):
+        # Insertion-ordered index of keys; the oldest ones beyond max_redis_entries are dropped.
+        index = self._redis_key("_index")
+        pipe = client.pipeline()
+        pipe.zadd(index, {key: time.time()})
+        pipe.expire(index, ttl)
+        pipe.zcard(index)
+        excess = pipe.execute()[-1] - self.max_redis_entries
+        if excess > 0:
+            evicted = client.zpopmin(index, excess)
+            if evicted:
+                client.delete(*[self._redis_key(k.decode()) for k, _ in evicted])
+
+    def _set_local(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._local.move_to_end(key)
+                else:
+                    del self._local[key]
+                    entry = None
+        if entry is not None:
+            self._count("local_hits")
+            return entry[1]
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                pipe.get(self._redis_key(key))
+                pipe.ttl(self._redis_key(key))
+                raw, remaining = pipe.execute()
+                if raw is not None:
+                    value = json.loads(raw)
+                    if remaining and remaining > 0:
+                        self._set_local(key, value, remaining)
+                    self._count("redis_hits")
+                    return value
+            except redis.RedisError as e:
+                mark_redis_down(e)
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._set_local(key, value, ttl)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), json.dumps(value, separators=(",", ":")), ex=ttl)
+                if self.max_redis_entries:
+                    self._evict_redis(client, key, ttl)
+            except redis.RedisError as e:
+                mark_redis_down(e)
+        self._count("sets")
+
+    def delete(self, key: str):
+        with self._lock:
+            self._local.pop(key, None)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+            except redis.RedisError as e:
+                mark_redis_down(e)
+
+    def clear(self):
+        """Drop every entry of this namespace, locally and in Redis."""
+        with self._lock:
+            self._local.clear()
+        client = get_redis()
+        if client is not None:
+            try:
+                keys = list(client.scan_iter(match=self._redis_key("*"), count=500))
+                for i in range(0, len(keys), 500):
+                    client.delete(*keys[i:i + 500])
+            except redis.RedisError as e:
+                mark_redis_down(e)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None):
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def stats(self) -> dict:
+        local = dict(self.counters)
+        lookups = local["local_hits"] + local["redis_hits"] + local["misses"]
+        local["hit_ratio"] = round((lookups - local["misses"]) / lookups, 4) if lookups else 0.0
+        local["local_entries"] = len(self._local)
+        stats = {"process": local}
+        self.flush_stats()
+        client = get_redis()
+        if client is not None:
+            try:
+                stats["global"] = {k.decode(): int(v) for k, v in client.hgetall(f"cache:stats:{self.namespace}").items()}
+            except redis.RedisError as e:
+                mark_redis_down(e)
+        return stats
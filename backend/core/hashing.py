@@ -1,12 +1,46 @@
+import os
+from typing import Optional
 from passlib.context import CryptContext
+from core.process_pool import LazyProcessPool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost (log2 of the key expansion rounds); every +1 doubles the time per hash.
+# Passwords hashed at another cost are rehashed at their owner's next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes for hashing per API process; 0 hashes in the calling thread. Each uvicorn
+# worker (WEB_CONCURRENCY of them) has its own pool, so by default they share the cores.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max((os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1")), 1))))
+
+# min_rounds == max_rounds: verify_and_update flags any hash not at BCRYPT_ROUNDS for rehashing.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """(valid, new hash or None); the new hash is set when the stored one uses another cost."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+hashing_pool = LazyProcessPool("Hashing", HASH_WORKERS)
 
 class Hasher:
     @staticmethod
     def verify_password(plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+        return hashing_pool.run(verify_and_update, plain_password, hashed_password)[0]
+
+    @staticmethod
+    def verify_and_update(plain_password, hashed_password) -> tuple[bool, Optional[str]]:
+        return hashing_pool.run(verify_and_update, plain_password, hashed_password)
 
     @staticmethod
     def get_password_hash(password):
-        return pwd_context.hash(password) 
\ No newline at end of file
+        return hashing_pool.run(hash_password, password)
+
+    @staticmethod
+    async def aget_password_hash(password):
+        return await hashing_pool.arun(hash_password, password)
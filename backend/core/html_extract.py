@@ -0,0 +1,132 @@
+import importlib.util
+import os
+from html.parser import HTMLParser
+from typing import Callable, Optional
+
+# Subtrees whose text is never rendered.
+SKIP_TAGS = frozenset(("script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "head"))
+# Characters of HTML handed to a parser; anything past this is ignored.
+MAX_PARSE_CHARS = int(os.getenv("HTML_MAX_PARSE_CHARS", "1000000"))
+
+# <head> is often left unclosed; its only text is <title> (handled separately) or inside skipped tags.
+_STREAM_SKIP_TAGS = SKIP_TAGS - {"head"}
+
+class _SinglePassExtractor(HTMLParser):
+    """Collects title, meta description, H1/H2 and visible text while tokenizing, without building a tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.in_title = False
+        # Only the document title counts: the first <title> outside <body> and outside skipped
+        # subtrees (SVG icons carry their own <title>s).
+        self.title_seen = False
+        self.in_body = False
+        self.heading: Optional[str] = None
+        self.title: list[str] = []
+        self.meta_desc = ""
+        self.headings: dict[str, list[str]] = {"h1": [], "h2": []}
+        self.heading_parts: list[str] = []
+        self.text: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            if not (self.title_seen or self.in_body or self.skip_depth):
+                self.in_title = True
+        elif tag == "body":
+            self.in_body = True
+        elif tag == "meta":
+            if not self.meta_desc:
+                attributes = dict(attrs)
+                if (attributes.get("name") or "").lower() == "description":
+                    self.meta_desc = attributes.get("content") or ""
+        elif tag in _STREAM_SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in ("h1", "h2") and self.heading is None and not self.skip_depth:
+            self.heading, self.heading_parts = tag, []
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            if self.in_title:
+                self.in_title, self.title_seen = False, True
+        elif tag in _STREAM_SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif tag == self.heading:
+            self.headings[tag].append("".join(self.heading_parts))
+            self.heading = None
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title.append(data)
+            return
+        if self.skip_depth:
+            return
+        stripped = data.strip()
+        if stripped:
+            self.text.append(stripped)
+            if self.heading is not None:
+                self.heading_parts.append(stripped)
+
+def _fields(title, meta_desc, h1, h2, text) -> dict:
+    return {
+        "title": (title or "").strip(),
+        "meta_desc": meta_desc or "",
+        "h1_tags": " ".join(h for h in h1 if h),
+        "h2_tags": " ".join(h for h in h2 if h),
+        "text": " ".join(text),
+    }
+
+def extract_stdlib(html: str) -> dict:
+    parser = _SinglePassExtractor()
+    parser.feed(html)
+    parser.close()
+    return _fields("".join(parser.title), parser.meta_desc, parser.headings["h1"], parser.headings["h2"], parser.text)
+
+def extract_lxml(html: str) -> dict:
+    from lxml import etree
+    from lxml import html as lxml_html
+    if not html.strip():
+        return _fields("", "", [], [], [])
+    # Bytes, so pages that start with an XML encoding declaration are accepted.
+    root = lxml_html.document_fromstring(html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+    title = root.findtext(".//title") or ""
+    meta_desc = ""
+    for meta in root.iter("meta"):
+        if (meta.get("name") or "").lower() == "description":
+            meta_desc = meta.get("content") or ""
+            break
+    etree.strip_elements(root, etree.Comment, *SKIP_TAGS, with_tail=False)
+    h1 = ["".join(s.strip() for s in h.itertext()) for h in root.iter("h1")]
+    h2 = ["".join(s.strip() for s in h.itertext()) for h in root.iter("h2")]
+    text = [s.strip() for s in root.itertext() if s.strip()]
+    return _fields(title, meta_desc, h1, h2, text)
+
+def extract_bs4(html: str) -> dict:
+    """The original BeautifulSoup tree walk, kept for comparison and as a fallback."""
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.string if soup.title else ''
+    meta_desc = ''
+    meta = soup.find('meta', attrs={'name': 'description'})
+    if isinstance(meta, Tag):
+        meta_desc = meta.get('content', '')
+    h1 = [h1.get_text(strip=True) for h1 in soup.find_all('h1')]
+    h2 = [h2.get_text(strip=True) for h2 in soup.find_all('h2')]
+    return _fields(str(title or ''), str(meta_desc or ''), h1, h2, list(soup.stripped_strings))
+
+BACKENDS: dict[str, Callable[[str], dict]] = {"lxml": extract_lxml, "stdlib": extract_stdlib, "bs4": extract_bs4}
+
+def default_backend() -> str:
+    """HTML_PARSER env var (lxml, stdlib or bs4); otherwise lxml when installed, else the stdlib single-pass parser."""
+    backend = os.getenv("HTML_PARSER", "auto").lower()
+    if backend in BACKENDS and (backend != "lxml" or importlib.util.find_spec("lxml") is not None):
+        return backend
+    return "lxml" if importlib.util.find_spec("lxml") is not None else "stdlib"
+
+def extract_page(html: str, backend: Optional[str] = None, max_chars: int = MAX_PARSE_CHARS) -> dict:
+    """Title, meta description, H1/H2 text and visible text of a page, parsing at most max_chars of it."""
+    return BACKENDS[backend or HTML_BACKEND](html[:max_chars])
+
+HTML_BACKEND = default_backend()
@@ -0,0 +1,106 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import urllib.parse
+from contextlib import asynccontextmanager
+import httpx
+
+logger = logging.getLogger(__name__)
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+class PooledAsyncClient:
+    """
+    Long-lived httpx.AsyncClient shared by a service.
+
+    httpx clients are bound to the event loop they were first used on, so one client
+    is kept per (process, event loop). Settings come from <PREFIX>_* env vars:
+    MAX_CONNECTIONS, MAX_KEEPALIVE, KEEPALIVE_EXPIRY, TIMEOUT and HTTP2.
+    """
+
+    def __init__(self, env_prefix: str, timeout: float = 30.0, max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 60.0, http2: bool = True, **client_kwargs):
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv(f"{env_prefix}_MAX_CONNECTIONS", max_connections)),
+            max_keepalive_connections=int(os.getenv(f"{env_prefix}_MAX_KEEPALIVE", max_keepalive)),
+            keepalive_expiry=float(os.getenv(f"{env_prefix}_KEEPALIVE_EXPIRY", keepalive_expiry)),
+        )
+        self.timeout = httpx.Timeout(float(os.getenv(f"{env_prefix}_TIMEOUT", timeout)))
+        # HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 keep-alive without it.
+        self.http2 = _env_bool(f"{env_prefix}_HTTP2", http2) and importlib.util.find_spec("h2") is not None
+        self.client_kwargs = client_kwargs
+        self._clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._pid = os.getpid()
+
+    def get(self) -> httpx.AsyncClient:
+        """Return the client for the running event loop, creating it on first use."""
+        if self._pid != os.getpid():
+            # Forked worker: connections belong to the parent process, never reuse them.
+            self._clients = {}
+            self._pid = os.getpid()
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            for stale in [l for l in self._clients if l.is_closed()]:
+                del self._clients[stale]
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2, **self.client_kwargs)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the client owned by the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close_all(self):
+        """Close clients from synchronous shutdown hooks (e.g. Celery worker signals)."""
+        clients, self._clients = self._clients, {}
+        for loop, client in clients.items():
+            if loop.is_closed() or client.is_closed:
+                continue
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=10)
+                else:
+                    loop.run_until_complete(client.aclose())
+            except Exception as e:
+                logger.warning(f"[HTTPClient] Failed to close pooled client: {e}")
+
+class HostLimiter:
+    """
+    Global and per-host concurrency caps for outbound fetches.
+
+    asyncio semaphores must not be shared between event loops, so one set is kept per loop.
+    A host's semaphore only exists while some fetch holds or waits for it, so the table does
+    not grow with every host a long-lived worker has seen. Limits come from <PREFIX>_MAX_CONCURRENCY and <PREFIX>_PER_HOST env vars.
+    """
+
+    def __init__(self, env_prefix: str, max_concurrency: int = 10, per_host: int = 2):
+        self.max_concurrency = int(os.getenv(f"{env_prefix}_MAX_CONCURRENCY", max_concurrency))
+        self.per_host = int(os.getenv(f"{env_prefix}_PER_HOST", per_host))
+        # Per loop: the global semaphore and, per host, its semaphore and the number of its users.
+        self._limits: dict[asyncio.AbstractEventLoop, tuple[asyncio.Semaphore, dict[str, tuple[asyncio.Semaphore, int]]]] = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """Hold a global slot and a slot for url's host for the duration of the block."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._limits:
+            for stale in [l for l in self._limits if l.is_closed()]:
+                del self._limits[stale]
+            self._limits[loop] = (asyncio.Semaphore(self.max_concurrency), {})
+        global_slots, host_slots = self._limits[loop]
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        host_slot, users = host_slots.get(host) or (asyncio.Semaphore(self.per_host), 0)
+        host_slots[host] = (host_slot, users + 1)
+        try:
+            async with host_slot, global_slots:
+                yield
+        finally:
+            host_slot, users = host_slots[host]
+            if users == 1:
+                del host_slots[host]
+            else:
+                host_slots[host] = (host_slot, users - 1)
@@ -0,0 +1,72 @@
+import os
+import zlib
+from functools import lru_cache
+from typing import Sequence
+import numpy as np
+
+# Width of the hashed feature space; a keyword has a few dozen n-grams, so collisions between
+# unrelated keywords add only a few hundredths of cosine similarity.
+CLUSTER_DIM = int(os.getenv("KEYWORD_CLUSTER_DIM", "512"))
+# Cosine similarity at or above which two keywords land in the same cluster.
+CLUSTER_THRESHOLD = float(os.getenv("KEYWORD_CLUSTER_THRESHOLD", "0.75"))
+NGRAM = 3
+
+def stem(word: str) -> str:
+    """Strip a plural "s", so "shoe" and "shoes" compare equal."""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+@lru_cache(maxsize=65536)
+def _ngram_columns(keyword: str, dim: int) -> tuple[int, ...]:
+    # Trigrams of each padded word stem, so word order does not matter.
+    grams = []
+    for word in keyword.lower().split():
+        padded = f" {stem(word)} "
+        grams.extend(padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1)))
+    # crc32 rather than hash(): the same keyword gets the same columns in every process.
+    return tuple(zlib.crc32(g.encode()) % dim for g in grams)
+
+def keyword_vectors(keywords: Sequence[str], dim: int = CLUSTER_DIM) -> np.ndarray:
+    """
+    L2-normalised hashed character trigram counts, one float32 row per keyword, TF-IDF weighted
+    over the list: n-grams that nearly every candidate shares (usually the seed keyword's) count
+    little, so "best running shoes" and "cheap running shoes" stay apart.
+    """
+    columns = [_ngram_columns(k, dim) for k in keywords]
+    rows = np.repeat(np.arange(len(keywords)), [len(c) for c in columns])
+    cols = np.fromiter((c for cs in columns for c in cs), dtype=np.int64, count=len(rows))
+    counts = np.bincount(rows * dim + cols, minlength=len(keywords) * dim)
+    vectors = counts.reshape(len(keywords), dim).astype(np.float32)
+    document_freq = np.count_nonzero(vectors, axis=0)
+    vectors *= (np.log((1 + len(keywords)) / (1 + document_freq)) + 1).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def cluster_keywords(keywords: Sequence[str], scores: Sequence[float], threshold: float = CLUSTER_THRESHOLD) -> list[list[int]]:
+    """
+    Threshold clustering on cosine similarity. Keywords are visited best score first; each one
+    not yet assigned starts a cluster and takes every unassigned keyword at least threshold
+    similar to it. Returns clusters as index lists, representative (highest score) first.
+    Deterministic: ties are broken by the keyword text.
+    """
+    if not keywords:
+        return []
+    order = sorted(range(len(keywords)), key=lambda i: (-scores[i], keywords[i]))
+    # Rows in visiting order, so the members found for a leader are already sorted by score.
+    vectors = keyword_vectors([keywords[i] for i in order])
+    close = (vectors @ vectors.T) >= threshold
+    # Most keywords have no neighbour but themselves; they need no array work in the loop.
+    alone = close.sum(axis=1) <= 1
+    assigned = np.zeros(len(order), dtype=bool)
+    clusters = []
+    for leader in range(len(order)):
+        if assigned[leader]:
+            continue
+        if alone[leader]:
+            clusters.append([order[leader]])
+            continue
+        members = np.flatnonzero(close[leader] & ~assigned)
+        assigned[members] = True
+        assigned[leader] = True
+        # The leader is similar to itself, except for an empty keyword (zero vector).
+        clusters.append([order[leader]] + [order[m] for m in members if m != leader])
+    return clusters
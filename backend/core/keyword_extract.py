@@ -0,0 +1,59 @@
+import asyncio
+import os
+import re
+from collections import Counter
+import yake
+from core.process_pool import LazyProcessPool
+
+# Characters of page text given to YAKE; its cost grows with text length, the ranking barely does.
+YAKE_MAX_CHARS = int(os.getenv("YAKE_MAX_CHARS", "20000"))
+# Worker processes for YAKE passes; 0 runs them in the calling process. Every Celery prefork
+# child has its own pool, so keep --concurrency x YAKE_WORKERS near the worker's core count.
+YAKE_WORKERS = int(os.getenv("YAKE_WORKERS", str(os.cpu_count() or 1)))
+NGRAM_SIZES = (1, 2)
+
+STOPWORDS = frozenset(["the","and","for","with","that","this","from","are","was","but","not","you","your","all","can","has","have","will","more","one","about","who","out","get","use","how","why","when","where","which","their","they","our","its","it's","on","in","at","to","of","by","as","an","or","is","be","if","it","a"])
+_NON_KEYWORD_CHARS = re.compile(r'[^a-zA-Z0-9\- ]')
+
+# Extractors are cheap to call but load YAKE's stopword list on construction; keep one per (n, top) per process.
+_extractors: dict[tuple[int, int], yake.KeywordExtractor] = {}
+
+def _extractor(n: int, top: int) -> yake.KeywordExtractor:
+    extractor = _extractors.get((n, top))
+    if extractor is None:
+        extractor = _extractors[(n, top)] = yake.KeywordExtractor(lan="en", n=n, top=top)
+    return extractor
+
+def _warm_worker():
+    _extractor(1, 20)
+    _extractor(2, 20)
+
+def yake_keywords(text: str, n: int, top: int) -> list[str]:
+    """One YAKE n-gram pass; runs inside the pool workers."""
+    return [kw for kw, score in _extractor(n, top).extract_keywords(text)]
+
+def rank_candidates(keyword_lists) -> list[str]:
+    """Clean, drop stopwords/short words and order by how many passes produced each keyword."""
+    cleaned = (_NON_KEYWORD_CHARS.sub('', kw).strip().lower() for keywords in keyword_lists for kw in keywords)
+    freq = Counter(kw for kw in cleaned if len(kw) > 2 and kw not in STOPWORDS)
+    # most_common() yields each keyword once, in rank order.
+    return [kw for kw, _ in freq.most_common()]
+
+class KeywordExtractionPool(LazyProcessPool):
+    """Process pool for YAKE passes with extractors kept warm in every worker."""
+
+    def __init__(self, workers: int):
+        super().__init__("KeywordExtraction", workers, initializer=_warm_worker)
+
+keyword_pool = KeywordExtractionPool(YAKE_WORKERS)
+
+def extract_candidates(text: str, max_keywords: int = 5) -> list[str]:
+    """Candidate keywords for text, computed in the calling process."""
+    text = text[:YAKE_MAX_CHARS]
+    return rank_candidates(yake_keywords(text, n, max_keywords * 4) for n in NGRAM_SIZES)
+
+async def aextract_candidates(text: str, max_keywords: int = 5) -> list[str]:
+    """Candidate keywords for text; the n-gram passes run in parallel in the process pool."""
+    text = text[:YAKE_MAX_CHARS]
+    passes = await asyncio.gather(*(keyword_pool.arun(yake_keywords, text, n, max_keywords * 4) for n in NGRAM_SIZES))
+    return rank_candidates(passes)
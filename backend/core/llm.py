@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import random
+from typing import Any, AsyncIterator, Optional, Sequence
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import messages_from_dict, message_to_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.runnables import Runnable
+from langchain_google_genai import ChatGoogleGenerativeAI
+from core.cache import TwoTierCache
+from core.rate_limit import GEMINI_BUCKET
+
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_MAX_ATTEMPTS = 4
+
+class ThrottledGemini(ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI that takes a token from the shared Gemini bucket per API call.
+    Throttling here rather than in front of the model means LLM cache hits never wait.
+    """
+
+    def _generate(self, *args, **kwargs):
+        GEMINI_BUCKET.acquire()
+        return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        await GEMINI_BUCKET.aacquire()
+        return await super()._agenerate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        GEMINI_BUCKET.acquire()
+        yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        await GEMINI_BUCKET.aacquire()
+        async for chunk in super()._astream(*args, **kwargs):
+            yield chunk
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain LLM cache on a TwoTierCache. LangChain passes the rendered prompt and an
+    llm_string that serialises the model name and call parameters (temperature included),
+    so the key is sha256(llm_string, prompt). Hit ratio and tokens saved are reported
+    under "llm" in /metrics/cache.
+    """
+
+    def __init__(self, ttl: int, max_local_entries: int, max_redis_entries: Optional[int]):
+        self.store = TwoTierCache("llm", max_entries=max_local_entries, ttl=ttl, max_redis_entries=max_redis_entries)
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    @staticmethod
+    def _dump(generation: Generation) -> dict:
+        if isinstance(generation, ChatGeneration):
+            return {"message": message_to_dict(generation.message)}
+        return {"text": generation.text}
+
+    @staticmethod
+    def _load(data: dict) -> Generation:
+        if "message" in data:
+            return ChatGeneration(message=messages_from_dict([data["message"]])[0])
+        return Generation(text=data["text"])
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        cached = self.store.get(self.key(prompt, llm_string))
+        if cached is None:
+            return None
+        generations = [self._load(g) for g in cached]
+        saved = sum((getattr(g, "message", None) and (g.message.usage_metadata or {}).get("total_tokens")) or 0 for g in generations)
+        if saved:
+            self.store.record("tokens_saved", saved)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.store.set(self.key(prompt, llm_string), [self._dump(g) for g in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+# LLM_CACHE_TTL=0 disables the response cache.
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 60 * 60)))
+LLM_CACHE = LLMResponseCache(
+    ttl=LLM_CACHE_TTL,
+    max_local_entries=int(os.getenv("LLM_CACHE_LOCAL_ENTRIES", "256")),
+    max_redis_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")) or None,
+)
+if LLM_CACHE_TTL > 0:
+    set_llm_cache(LLM_CACHE)
+
+def gemini_llm(api_key: str, model: str = GEMINI_MODEL, **kwargs) -> Runnable:
+    """
+    Gemini chat model behind the shared Gemini token bucket and the LLM response cache.
+    Every API attempt takes a token; 429/503 responses are retried with jittered exponential
+    backoff. Drop-in replacement for ChatGoogleGenerativeAI inside `prompt | llm | ...` chains.
+    """
+    # The client's own retry loop does not jitter or respect the bucket, so it is limited to one attempt.
+    llm = ThrottledGemini(model=model, google_api_key=api_key, max_retries=1, **kwargs)
+    return llm.with_retry(
+        retry_if_exception_type=(ResourceExhausted, ServiceUnavailable),
+        wait_exponential_jitter=True,
+        stop_after_attempt=GEMINI_MAX_ATTEMPTS,
+    )
+
+def gemini_structured_llm(api_key: str, schema, model: str = GEMINI_MODEL, **kwargs) -> Runnable:
+    """
+    Like gemini_llm, but the model answers in JSON mode and the chain returns an instance
+    of the pydantic schema instead of a message.
+    """
+    llm = ThrottledGemini(model=model, google_api_key=api_key, max_retries=1, **kwargs)
+    return llm.with_structured_output(schema, method="json_mode").with_retry(
+        retry_if_exception_type=(ResourceExhausted, ServiceUnavailable),
+        wait_exponential_jitter=True,
+        stop_after_attempt=GEMINI_MAX_ATTEMPTS,
+    )
+
+async def astream_with_retry(runnable: Runnable, inputs: Any) -> AsyncIterator[Any]:
+    """
+    runnable.astream(inputs) with gemini_llm's retry policy. with_retry() only covers invoke and
+    batch calls, so 429/503 errors raised before the first chunk are retried here; once chunks
+    have been yielded the error is raised.
+    """
+    for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+        started = False
+        try:
+            async for chunk in runnable.astream(inputs):
+                started = True
+                yield chunk
+            return
+        except (ResourceExhausted, ServiceUnavailable):
+            if started or attempt == GEMINI_MAX_ATTEMPTS:
+                raise
+            # Same schedule as with_retry(wait_exponential_jitter=True): 1s, 2s, 4s ... plus up to 1s.
+            await asyncio.sleep(min(2 ** (attempt - 1), 60) + random.uniform(0, 1))
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+def pool_context():
+    """
+    Start method for worker pools. uvicorn and Celery processes run threads (event loop helpers,
+    HTTP pools), and forking a threaded process can copy held locks into the child, so workers
+    come from a forkserver (spawn where it is unavailable) instead.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+class BilliardExecutor(Executor):
+    """
+    concurrent.futures front for a billiard pool. multiprocessing refuses to start children from
+    daemonic processes such as Celery prefork children; billiard (Celery's multiprocessing fork)
+    does not, so this is the pool used there. A lost worker fails its job with BrokenProcessPool.
+    """
+
+    def __init__(self, workers: int, initializer: Optional[Callable] = None):
+        import billiard
+        self._pool = billiard.get_context(pool_context().get_start_method()).Pool(workers, initializer=initializer)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        from billiard.exceptions import WorkerLostError
+        future: Future = Future()
+
+        def done(result):
+            if not future.done():
+                future.set_result(result)
+
+        def failed(error):
+            # Failures arrive as an ExceptionInfo; worker losses wrap the error once more.
+            error = getattr(error, "exception", error)
+            error = getattr(error, "exc", error)
+            if isinstance(error, WorkerLostError):
+                error = BrokenProcessPool(str(error))
+            if not future.done():
+                future.set_exception(error)
+
+        self._pool.apply_async(fn, args, kwargs, callback=done, error_callback=failed)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
+
+class LazyProcessPool:
+    """
+    Process pool created on first use and per process: a ProcessPoolExecutor, or a
+    BilliardExecutor inside daemonic processes (Celery prefork children). Disabled (callers run
+    the work in-process) when workers <= 0 or when the pool cannot be started. A pool that
+    breaks later (a worker was killed) is rebuilt on the next call.
+    """
+
+    def __init__(self, name: str, workers: int, initializer: Optional[Callable] = None):
+        self.name = name
+        self.workers = workers
+        self.initializer = initializer
+        self._pool: Optional[Executor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._disabled = workers <= 0
+
+    def get(self) -> Optional[Executor]:
+        if self._disabled:
+            return None
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                try:
+                    if multiprocessing.current_process().daemon:
+                        self._pool = BilliardExecutor(self.workers, self.initializer)
+                    else:
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context(), initializer=self.initializer)
+                    self._pid = os.getpid()
+                except Exception as e:
+                    self._disable(e)
+                    return None
+            return self._pool
+
+    def _disable(self, reason):
+        logger.warning(f"[{self.name}] Process pool unavailable, running in-process: {reason}")
+        self._disabled = True
+        self._pool = None
+
+    def failed(self, error: Exception):
+        """
+        Called when work submitted to the pool raised error. A broken pool is dropped and rebuilt
+        on the next call; any other failure (e.g. workers that may not start) disables the pool.
+        """
+        if isinstance(error, BrokenProcessPool):
+            logger.warning(f"[{self.name}] Process pool broke, rebuilding on next use: {error}")
+            self.shutdown()
+        else:
+            self.shutdown()
+            with self._lock:
+                self._disable(error)
+
+    def run(self, fn, *args):
+        """fn(*args) in the pool, waiting for the result in the calling thread."""
+        pool = self.get()
+        if pool is None:
+            return fn(*args)
+        try:
+            future = pool.submit(fn, *args)
+        except Exception as e:
+            self.failed(e)
+            return fn(*args)
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            self.failed(e)
+            return fn(*args)
+
+    async def arun(self, fn, *args):
+        """fn(*args) in the pool without blocking the event loop."""
+        pool = self.get()
+        if pool is None:
+            return await asyncio.to_thread(fn, *args)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except Exception as e:
+            self.failed(e)
+            return await asyncio.to_thread(fn, *args)
+        try:
+            return await future
+        except BrokenProcessPool as e:
+            self.failed(e)
+            return await asyncio.to_thread(fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+import redis
+import redis.asyncio as aioredis
+from celery import Task
+from core.cache import REDIS_URL, get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "task-progress:"
+# Latest event per task, so a client that subscribes late (or reconnects) starts from the current state.
+LAST_EVENT_PREFIX = "task-progress-last:"
+# User id that started the task; only that user may follow it over the push channel.
+OWNER_PREFIX = "task-progress-owner:"
+# Same lifetime as Celery results (result_expires).
+LAST_EVENT_TTL = int(os.getenv("TASK_PROGRESS_TTL", "3600"))
+TERMINAL_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+
+def progress_event(task_id: str, state: str, meta: Any = None) -> dict:
+    """
+    Progress event in the shape the task-status endpoints return: state plus status/current/total
+    for progress, result for success and error for failure. Task return values of the form
+    {"status": "FAILURE", "error": ...} are reported as failures.
+    """
+    meta = meta if meta is not None else {}
+    event = {"task_id": task_id, "state": state}
+    if state == "SUCCESS":
+        if isinstance(meta, dict) and meta.get("status") == "FAILURE" and "error" in meta:
+            event.update(state="FAILURE", error=meta["error"])
+        elif isinstance(meta, dict) and meta.get("status") == "SUCCESS" and "result" in meta:
+            event.update(result=meta["result"], current=meta.get("current"), total=meta.get("total"))
+        else:
+            event["result"] = meta
+    elif state == "FAILURE":
+        event["error"] = meta.get("error", "") if isinstance(meta, dict) else str(meta)
+    elif isinstance(meta, dict):
+        event.update(status=meta.get("status", state), current=meta.get("current"), total=meta.get("total"), meta=meta)
+    return event
+
+def publish_progress(task_id: str, state: str, meta: Any = None):
+    """Store the task's latest event and publish it on its channel; a no-op without Redis."""
+    client = get_redis()
+    if client is None or not task_id:
+        return
+    try:
+        payload = json.dumps(progress_event(task_id, state, meta), default=str)
+        pipe = client.pipeline()
+        pipe.set(f"{LAST_EVENT_PREFIX}{task_id}", payload, ex=LAST_EVENT_TTL)
+        pipe.publish(f"{CHANNEL_PREFIX}{task_id}", payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        mark_redis_down(e)
+
+def record_task_owner(task_id: str, user_id: str):
+    """Remember who started task_id; call right after queueing it."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.set(f"{OWNER_PREFIX}{task_id}", str(user_id), ex=LAST_EVENT_TTL)
+    except redis.RedisError as e:
+        mark_redis_down(e)
+
+class ProgressTask(Task):
+    """
+    Celery base task (celery_app task_cls) that publishes every update_state, retry and final
+    result to the task's progress channel, so clients are pushed updates instead of polling.
+    """
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        publish_progress(task_id or self.request.id, state, meta)
+
+    def on_success(self, retval, task_id, args, kwargs):
+        publish_progress(task_id, "SUCCESS", retval)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        publish_progress(task_id, "FAILURE", {"error": str(exc)})
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        publish_progress(task_id, "RETRY", {"status": f"Retrying after error: {exc}"})
+
+class ProgressHub:
+    """
+    Fans task progress out to the clients of one API process: a single Redis pattern
+    subscription, one asyncio.Queue per subscribed client. Events arrive as JSON strings.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._client: Optional[aioredis.Redis] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _redis(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(REDIS_URL)
+        return self._client
+
+    async def _ensure_reader(self):
+        async with self._lock:
+            if self._reader is not None and not self._reader.done():
+                return
+            pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            self._reader = asyncio.create_task(self._read(pubsub))
+
+    async def _read(self, pubsub):
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                task_id = message["channel"].decode()[len(CHANNEL_PREFIX):]
+                for queue in self._subscribers.get(task_id, ()):
+                    queue.put_nowait(message["data"].decode())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[Progress] Subscription lost: {e}")
+            # Wake every client; they resubscribe (and catch up from the stored last event).
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    queue.put_nowait(None)
+        finally:
+            await pubsub.aclose()
+
+    async def last_event(self, task_id: str) -> Optional[str]:
+        raw = await self._redis().get(f"{LAST_EVENT_PREFIX}{task_id}")
+        return raw.decode() if raw is not None else None
+
+    async def task_owner(self, task_id: str) -> Optional[str]:
+        raw = await self._redis().get(f"{OWNER_PREFIX}{task_id}")
+        return raw.decode() if raw is not None else None
+
+    @asynccontextmanager
+    async def subscribe(self, task_id: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        Queue receiving the task's events. The first item is its latest stored event, if any;
+        None means the subscription was lost and the caller should resubscribe.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        # Registered before reading the last event, so nothing published in between is missed.
+        self._subscribers[task_id].add(queue)
+        try:
+            await self._ensure_reader()
+            last = await self.last_event(task_id)
+            if last is not None:
+                queue.put_nowait(last)
+            yield queue
+        finally:
+            self._subscribers[task_id].discard(queue)
+            if not self._subscribers[task_id]:
+                del self._subscribers[task_id]
+
+    async def aclose(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+progress_hub = ProgressHub()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+import redis
+from core.cache import get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+# Refill and take tokens atomically; uses the Redis clock so every worker agrees on "now".
+# Returns how long the caller must wait before the requested tokens are available (0 = granted).
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+  tokens = tokens - requested
+else
+  wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for retry number attempt (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class TokenBucket:
+    """
+    Token bucket shared by every process through Redis (in-process fallback when Redis is down).
+    rate is tokens per second, capacity the burst size.
+    """
+    registry: dict[str, "TokenBucket"] = {}
+
+    def __init__(self, name: str, rate: float, capacity: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.key = f"ratelimit:{name}"
+        self._script = None
+        self._lock = threading.Lock()
+        self._local_tokens = self.capacity
+        self._local_ts = time.monotonic()
+        self.counters = {"acquired": 0, "throttled": 0}
+        TokenBucket.registry[name] = self
+
+    def _try_local(self, tokens: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._local_tokens = min(self.capacity, self._local_tokens + (now - self._local_ts) * self.rate)
+            self._local_ts = now
+            if self._local_tokens >= tokens:
+                self._local_tokens -= tokens
+                return 0.0
+            return (tokens - self._local_tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take tokens if available; otherwise return the seconds to wait before retrying."""
+        client = get_redis()
+        if client is not None:
+            try:
+                if self._script is None:
+                    self._script = client.register_script(_ACQUIRE_SCRIPT)
+                return float(self._script(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+            except redis.RedisError as e:
+                mark_redis_down(e)
+        return self._try_local(tokens)
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                self.counters["acquired"] += 1
+                return
+            self.counters["throttled"] += 1
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Rate limit '{self.name}' not available within {timeout}s")
+            # Jitter so workers woken together do not stampede the bucket.
+            time.sleep(wait + random.uniform(0, wait))
+
+    async def aacquire(self, tokens: float = 1, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if wait <= 0:
+                self.counters["acquired"] += 1
+                return
+            self.counters["throttled"] += 1
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Rate limit '{self.name}' not available within {timeout}s")
+            await asyncio.sleep(wait + random.uniform(0, wait))
+
+    def occupancy(self) -> dict:
+        """Tokens currently available (as last written to Redis) next to the bucket settings."""
+        available = None
+        client = get_redis()
+        if client is not None:
+            try:
+                state = client.hmget(self.key, "tokens", "ts")
+                if state[0] is not None:
+                    elapsed = max(0.0, time.time() - float(state[1]))
+                    available = min(self.capacity, float(state[0]) + elapsed * self.rate)
+                else:
+                    available = self.capacity
+            except redis.RedisError as e:
+                mark_redis_down(e)
+        if available is None:
+            with self._lock:
+                available = min(self.capacity, self._local_tokens + (time.monotonic() - self._local_ts) * self.rate)
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "available": round(available, 3),
+            "occupancy": round(1 - available / self.capacity, 3),
+            "process": dict(self.counters),
+        }
+
+PAGESPEED_BUCKET = TokenBucket(
+    "pagespeed",
+    rate=float(os.getenv("PAGESPEED_QPS", "4")),
+    capacity=float(os.getenv("PAGESPEED_BURST", "8")),
+)
+GEMINI_BUCKET = TokenBucket(
+    "gemini",
+    rate=float(os.getenv("GEMINI_QPS", "1")),
+    capacity=float(os.getenv("GEMINI_BURST", "5")),
+)
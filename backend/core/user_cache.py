@@ -0,0 +1,68 @@
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+from core.cache import TwoTierCache
+from db.database import SessionLocal
+from db.models.user import User
+
+# Other processes keep their in-process copy after invalidate_user until it expires,
+# so this bounds how long a deleted user or an old email address is still accepted there.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "30"))
+user_cache = TwoTierCache("auth_user", max_entries=int(os.getenv("USER_CACHE_LOCAL_ENTRIES", "4096")), ttl=USER_CACHE_TTL)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    The authenticated user as returned by get_current_user: the User columns endpoints read,
+    detached from any DB session. Query User by id when the row itself is needed.
+    """
+    id: str
+    email: str
+    username: str
+    full_name: Optional[str]
+    is_premium: bool
+    is_verified: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            is_premium=bool(user.is_premium),
+            is_verified=bool(user.is_verified),
+            created_at=user.created_at,
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat() if self.created_at is not None else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CurrentUser":
+        created_at = data.get("created_at")
+        return cls(**{**data, "created_at": datetime.fromisoformat(created_at) if created_at else None})
+
+def get_cached_user(user_id: str) -> Optional[CurrentUser]:
+    """The user from the cache, loaded from the database (own short session) on a miss; None if it does not exist."""
+    data = user_cache.get(user_id)
+    if data is not None:
+        return CurrentUser.from_dict(data)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        current = CurrentUser.from_user(user)
+    finally:
+        db.close()
+    user_cache.set(user_id, current.to_dict())
+    return current
+
+def invalidate_user(user_id: str):
+    """Drop the cached user; call after logout and after deleting or updating the user."""
+    user_cache.delete(str(user_id))
@@ -1,6 +1,6 @@
 # models/schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import List, Dict, Optional, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Dict, Literal, Optional, Any
 from datetime import datetime
 
 # User Schemas
@@ -27,6 +27,7 @@ class ProjectBase(BaseModel):
     name: str
     description: Optional[str] = None
     website_url: str
+    audit_cache_ttl: Optional[int] = Field(None, ge=0)
 
 class ProjectCreate(ProjectBase):
     pass
@@ -127,6 +128,13 @@ class AuditResult(BaseModel):
 class AuditRequest(BaseModel):
     project_id: str
     audit_type: str = "full"
+    force_refresh: bool = False
+
+class BatchAuditRequest(BaseModel):
+    project_ids: Optional[List[str]] = None
+    all_projects: bool = False  # audit every project owned by the current user
+    audit_type: str = "full"
+    force_refresh: bool = False
 
 class AuditReportResponse(BaseModel):
     id: int
@@ -146,12 +154,18 @@ class AuditReportResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditHistoryPage(BaseModel):
+    items: List[AuditReportResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to fetch the next page
+
 # Keyword Suggestion Schemas
 class KeywordSuggestionRequest(BaseModel):
     seed: str
     lang: Optional[str] = 'en'
     country: Optional[str] = 'us'
     top_n: Optional[int] = 20
+    # "full": six-stage LLM pipeline; "fast": one structured LLM call plus local filtering
+    mode: Optional[Literal['full', 'fast']] = 'full'
 
 class KeywordSuggestion(BaseModel):
     keyword: str
@@ -160,6 +174,19 @@ class KeywordSuggestion(BaseModel):
     competitive_density: str
     intent: str
 
+# Structured LLM output of the fast keyword pipeline
+class KeywordIdea(BaseModel):
+    keyword: str
+    search_volume: str
+    keyword_difficulty: str
+    competitive_density: str
+    intent: str
+
+class KeywordIdeas(BaseModel):
+    intent: str
+    subtopics: List[str]
+    keywords: List[KeywordIdea]
+
 class KeywordSuggestionResponse(BaseModel):
     keywords: List[KeywordSuggestion]
     metadata: dict
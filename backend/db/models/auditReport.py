@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Integer, JSON
+from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Integer, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.database import Base
@@ -40,4 +40,9 @@ class AuditReport(Base):
     project = relationship("Project", back_populates="audits")
 
     url = Column(String, nullable=True)
-    timestamp = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), nullable=True)
+
+    # History/dashboard lookups: WHERE project_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_audit_reports_project_id_created_at", project_id, created_at.desc(), id.desc()),
+    )
@@ -2,4 +2,5 @@ from pydantic import BaseModel
 
 class AuditRequest(BaseModel):
     project_id: str
-    audit_type: str = "full"
\ No newline at end of file
+    audit_type: str = "full"
+    force_refresh: bool = False
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, String, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.database import Base
@@ -18,4 +18,8 @@ class CompetitorAnalysis(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    project = relationship("Project", back_populates="competitor_analyses")
\ No newline at end of file
+    project = relationship("Project", back_populates="competitor_analyses")
+
+    __table_args__ = (
+        Index("ix_competitor_analyses_project_id_created_at", project_id, created_at.desc()),
+    )
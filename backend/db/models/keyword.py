@@ -11,5 +11,5 @@ class Keyword(Base):
     keyword_difficulty = Column(String(20))
     competitive_density = Column(String(20))
     intent = Column(String(30))
-    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
+    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False, index=True)
     project = relationship("Project", back_populates="keywords")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean, Integer
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean, Integer, CheckConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.database import Base
@@ -11,6 +11,7 @@ class Project(Base):
     name = Column(String(200), nullable=False)
     description = Column(Text)
     website_url = Column(String(500), nullable=False)
+    audit_cache_ttl = Column(Integer, nullable=True)  # seconds; None = LIGHTHOUSE_CACHE_TTL, 0 = never cache
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -21,4 +22,8 @@ class Project(Base):
     owner = relationship("User", back_populates="projects")
     keywords = relationship("Keyword", back_populates="project", cascade="all, delete-orphan")
     audits = relationship("AuditReport", back_populates="project", cascade="all, delete-orphan")
-    competitor_analyses = relationship("CompetitorAnalysis", back_populates="project", cascade="all, delete-orphan")
\ No newline at end of file
+    competitor_analyses = relationship("CompetitorAnalysis", back_populates="project", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        CheckConstraint("audit_cache_ttl >= 0", name="ck_projects_audit_cache_ttl_non_negative"),
+    )
\ No newline at end of file
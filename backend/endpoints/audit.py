@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Query
 from sqlalchemy.orm import Session
-from db.models.Schemas import AuditRequest, AuditResult, AuditReportResponse
-from db.models.user import User
+from celery import group
+from celery.result import GroupResult
+from db.models.Schemas import AuditRequest, AuditResult, AuditReportResponse, AuditHistoryPage, BatchAuditRequest
+from core.user_cache import CurrentUser
+from db.models.project import Project
 from services.AuditService import AuditService
+from services.PageSpeedService import PageSpeedService
 from db.database import get_db
 from endpoints.auth import get_current_user
+from core.cache import get_redis, mark_redis_down
+from core.progress import record_task_owner
 import traceback
+import json
+import os
+import redis
+from typing import List, Optional
 # Add import for Celery audit task
 def safe_import_generate_audit_task():
     try:
@@ -15,22 +25,37 @@ def safe_import_generate_audit_task():
         print(f"Failed to import generate_audit_task: {e}")
         return None
 
+def safe_import_generate_batch_audit_task():
+    try:
+        from tasks.audit_tasks import generate_batch_audit_task
+        return generate_batch_audit_task
+    except Exception as e:
+        print(f"Failed to import generate_batch_audit_task: {e}")
+        return None
+
 audit_service = AuditService()
 router = APIRouter(prefix="/audit", tags=["audit"])
 
 generate_audit_task = safe_import_generate_audit_task()
+generate_batch_audit_task = safe_import_generate_batch_audit_task()
+
+# Rate at which a batch's tasks are started (each unique URL costs two PageSpeed requests). This
+# only spreads the start times; PAGESPEED_BUCKET is what actually limits PageSpeed calls.
+PAGESPEED_BATCH_QPS = float(os.getenv("PAGESPEED_BATCH_QPS", "1"))
+BATCH_META_TTL = 24 * 60 * 60
 
 @router.post("", response_model=dict)
 async def create_audit(
     request: AuditRequest, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         if not generate_audit_task:
             raise HTTPException(status_code=500, detail="Celery task not available")
         # Queue the audit as a background task
         task = generate_audit_task.delay(request.dict(), str(current_user.id))
+        record_task_owner(task.id, current_user.id)
         return {
             "message": "Audit generation started",
             "task_id": task.id,
@@ -44,10 +69,132 @@ async def create_audit(
             detail=f"Failed to start audit generation: {str(e)}"
         )
 
+@router.post("/batch", response_model=dict)
+async def create_batch_audit(
+    request: BatchAuditRequest,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    try:
+        if not generate_batch_audit_task:
+            raise HTTPException(status_code=500, detail="Celery task not available")
+        query = db.query(Project).filter(Project.owner_id == current_user.id)
+        if not request.all_projects:
+            if not request.project_ids:
+                raise HTTPException(status_code=400, detail="Provide project_ids or set all_projects")
+            query = query.filter(Project.id.in_(request.project_ids))
+        projects = query.all()
+        if not projects:
+            raise HTTPException(status_code=404, detail="No projects found")
+        # Projects pointing at the same site share one Lighthouse fetch.
+        projects_by_url = {}
+        for project in projects:
+            projects_by_url.setdefault(PageSpeedService.normalize_url(str(project.website_url)), []).append(str(project.id))
+        # Staggered starts smooth the burst of a large batch; retries and cache hits are not
+        # accounted for, so the shared PAGESPEED_BUCKET remains the throttle.
+        interval = 2 / PAGESPEED_BATCH_QPS
+        audit_request = {"audit_type": request.audit_type, "force_refresh": request.force_refresh}
+        signatures = [
+            generate_batch_audit_task.s(audit_request, project_ids, str(current_user.id)).set(countdown=round(i * interval, 2))
+            for i, project_ids in enumerate(projects_by_url.values())
+        ]
+        batch_group = group(signatures)
+        frozen = batch_group.freeze()
+        # The owner is stored with the batch so only they can read its status (and results); it is
+        # stored before the tasks are queued, so a batch is never started without one.
+        record = {
+            "owner_id": str(current_user.id),
+            "children": {child.id: ids for child, ids in zip(frozen.results, projects_by_url.values())},
+        }
+        client = get_redis()
+        if client is None:
+            raise HTTPException(status_code=503, detail="Batch audits are temporarily unavailable")
+        try:
+            client.set(f"audit_batch:{frozen.id}", json.dumps(record), ex=BATCH_META_TTL)
+        except redis.RedisError as e:
+            mark_redis_down(e)
+            raise HTTPException(status_code=503, detail="Batch audits are temporarily unavailable")
+        batch = batch_group.apply_async()
+        batch.save()
+        return {
+            "message": "Batch audit started",
+            "batch_id": batch.id,
+            "projects": len(projects),
+            "unique_urls": len(projects_by_url),
+            "status": "PENDING"
+            # Frontend should poll /audit/batch-status/{batch_id} for aggregate progress
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start batch audit: {str(e)}"
+        )
+
+@router.get("/batch-status/{batch_id}")
+async def get_batch_audit_status(batch_id: str, current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Aggregate progress of a batch audit started with POST /audit/batch. Batches started by
+    other users (or whose record has expired) are reported as not found.
+    """
+    if not generate_batch_audit_task:
+        raise HTTPException(status_code=500, detail="Celery task not available")
+    client = get_redis()
+    if client is None:
+        raise HTTPException(status_code=503, detail="Batch status is temporarily unavailable")
+    try:
+        raw_record = client.get(f"audit_batch:{batch_id}")
+    except redis.RedisError as e:
+        mark_redis_down(e)
+        raise HTTPException(status_code=503, detail="Batch status is temporarily unavailable")
+    record = json.loads(raw_record) if raw_record else {}
+    if record.get("owner_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = GroupResult.restore(batch_id, app=generate_batch_audit_task.app)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    children = record.get("children", {})
+    tasks, progress, completed, failed = [], 0, 0, 0
+    for child in batch.results:
+        info = child.info if isinstance(child.info, dict) else {}
+        entry = {"task_id": child.id, "state": child.state, "project_ids": children.get(child.id, info.get("project_ids"))}
+        if child.state == "SUCCESS" and info.get("status") == "SUCCESS":
+            completed += 1
+            progress += 100
+            entry["results"] = info.get("results")
+            failed += sum(1 for r in (info.get("results") or {}).values() if r.get("status") == "FAILURE")
+        elif child.state in ("SUCCESS", "FAILURE"):
+            completed += 1
+            progress += 100
+            failed += len(entry["project_ids"] or [None])
+            entry["error"] = info.get("error", str(child.info))
+        else:
+            progress += info.get("current", 0)
+            entry["status"] = info.get("status", "Task is pending...")
+        tasks.append(entry)
+    total = len(batch.results)
+    if completed == total:
+        state = "SUCCESS"
+    elif any(t["state"] != "PENDING" for t in tasks):
+        state = "PROGRESS"
+    else:
+        state = "PENDING"
+    return {
+        "state": state,
+        "current": int(progress / total) if total else 100,
+        "total": 100,
+        "completed_tasks": completed,
+        "total_tasks": total,
+        "failed_projects": failed,
+        "tasks": tasks,
+    }
+
 @router.get("/user-audits")
 async def get_user_audits(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         return {
@@ -61,14 +208,36 @@ async def get_user_audits(
             detail=f"Failed to retrieve user audits: {str(e)}"
         )
 
+@router.get("/history/{project_id}", response_model=AuditHistoryPage)
+async def get_audit_history_page(
+    project_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include: List[str] = Query([], description="JSON fields to load: pagespeed_data, lighthouse_mobile, lighthouse_desktop"),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    try:
+        return audit_service.get_audit_page(project_id, db, limit=limit, cursor=cursor, include=include)
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve audit history: {str(e)}"
+        )
+
 @router.get("/project/{project_id}", response_model=list[AuditReportResponse])
 async def get_project_audits(
     project_id: str,
+    include_data: bool = True,
+    limit: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        audits = audit_service.get_audit_history(project_id, db)
+        audits = audit_service.get_audit_history(project_id, db, include_data=include_data, limit=limit)
         return audits
     except Exception as e:
         traceback.print_exc()
@@ -81,13 +250,15 @@ async def get_project_audits(
 async def get_latest_audit(
     project_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        audits = audit_service.get_audit_history(project_id, db)
-        if not audits:
+        audit = audit_service.get_latest_audit(project_id, db)
+        if not audit:
             raise HTTPException(status_code=404, detail="No audits found for this project")
-        return audits[0]  # audits are ordered by created_at desc
+        return audit
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -98,11 +269,13 @@ async def get_latest_audit(
 @router.get("/get-all-audits/{project_id}", response_model=list[AuditReportResponse])
 async def get_all_audits(
     project_id: str,
+    include_data: bool = True,
+    limit: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        audits = audit_service.get_audit_history(project_id, db)
+        audits = audit_service.get_audit_history(project_id, db, include_data=include_data, limit=limit)
         return audits
     except Exception as e:
         traceback.print_exc()
@@ -115,7 +288,7 @@ async def get_all_audits(
 async def get_audit_by_id(
     audit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         audit = audit_service.get_audit_by_id(audit_id, db)
@@ -133,7 +306,7 @@ async def get_audit_by_id(
 async def delete_audit(
     audit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         success = audit_service.delete_audit(audit_id, db)
@@ -148,7 +321,7 @@ async def delete_audit(
         )
 
 @router.get("/task-status/{task_id}")
-async def get_audit_task_status(task_id: str, current_user: User = Depends(get_current_user)):
+async def get_audit_task_status(task_id: str, current_user: CurrentUser = Depends(get_current_user)):
     """
     Poll the status/result of a Celery audit task.
     """
@@ -5,6 +5,7 @@ from db.database import get_db
 from pydantic import BaseModel, EmailStr, constr, Field
 from core.hashing import Hasher
 from core import jwt as jwt_utils
+from core.user_cache import CurrentUser, get_cached_user, invalidate_user
 from typing import Optional
 from datetime import timedelta, datetime, timezone
 from authlib.integrations.starlette_client import OAuth
@@ -96,14 +97,27 @@ def signup(user: SignupRequest, db: Session = Depends(get_db)):
 def login(request: LoginRequest, db: Session = Depends(get_db)):
     email = request.email.lower()
     user = db.query(User).filter(User.email == email).first()
-    if not user or not Hasher.verify_password(request.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    user_id, user_email, hashed_password, is_verified = user.id, user.email, user.hashed_password, bool(user.is_verified)
+    # End the read transaction so the connection returns to the pool while bcrypt runs in the
+    # hashing pool; holding it for the wait exhausts the DB pool during a login storm.
+    db.rollback()
+    valid, new_hash = Hasher.verify_and_update(request.password, hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not bool(user.is_verified):
+    if not is_verified:
         raise HTTPException(status_code=403, detail="Please verify your email before logging in.")
-    access_token = jwt_utils.create_access_token({"sub": user.id, "email": user.email})
-    refresh_token = jwt_utils.create_refresh_token({"sub": user.id, "email": user.email})
-    user.__setattr__('refresh_token', refresh_token)
-    user.__setattr__('refresh_token_expiry', datetime.now(timezone.utc) + timedelta(minutes=jwt_utils.REFRESH_TOKEN_EXPIRE_MINUTES))
+    access_token = jwt_utils.create_access_token({"sub": user_id, "email": user_email})
+    refresh_token = jwt_utils.create_refresh_token({"sub": user_id, "email": user_email})
+    values = {
+        User.refresh_token: refresh_token,
+        User.refresh_token_expiry: datetime.now(timezone.utc) + timedelta(minutes=jwt_utils.REFRESH_TOKEN_EXPIRE_MINUTES),
+    }
+    if new_hash:
+        # Stored at another BCRYPT_ROUNDS cost; upgraded now that the plain password is known.
+        values[User.hashed_password] = new_hash
+    db.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
     db.commit()
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
@@ -170,7 +184,7 @@ async def google_auth(request: Request, db: Session = Depends(get_db)):
             user = User(
                 username=username,
                 email=email,
-                hashed_password=Hasher.get_password_hash(os.urandom(16).hex()),
+                hashed_password=await Hasher.aget_password_hash(os.urandom(16).hex()),
                 full_name=user_info.get('name', ''),
             )
             setattr(user, 'is_verified', True)
@@ -187,6 +201,7 @@ async def google_auth(request: Request, db: Session = Depends(get_db)):
                 setattr(user, 'is_verified', True)
                 db.commit()
                 logging.info(f"Marked existing user {email} as verified via Google login.")
+                invalidate_user(user.id)
             # Update provider if missing or not google
             if not getattr(user, 'auth_provider', None) or getattr(user, 'auth_provider', None) != 'google':
                 setattr(user, 'auth_provider', 'google')
@@ -207,7 +222,7 @@ async def google_auth(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=f"OAuth authentication failed: {str(e)}")
 
 @router.post("/validate-token", response_model=TokenValidationResponse)
-def validate_token(Authorization: str = Header(...), db: Session = Depends(get_db)):
+def validate_token(Authorization: str = Header(...)):
     try:
         if not Authorization.startswith("Bearer "):
             return TokenValidationResponse(valid=False, message="Invalid authorization header format. Expected 'Bearer <token>'")
@@ -219,17 +234,11 @@ def validate_token(Authorization: str = Header(...), db: Session = Depends(get_d
         email = payload.get("email")
         if not user_id or not email:
             return TokenValidationResponse(valid=False, message="Token payload missing required user information")
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_cached_user(user_id)
         if not user:
             return TokenValidationResponse(valid=False, message="User no longer exists in database")
         if user.email != email:
             return TokenValidationResponse(valid=False, message="User email mismatch")
-        exp_timestamp = payload.get("exp")
-        if exp_timestamp:
-            exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-            now = datetime.now(timezone.utc)
-            if now > exp_datetime:
-                return TokenValidationResponse(valid=False, message="Token has expired")
         return TokenValidationResponse(valid=True, payload=payload, user_id=user_id, email=email, message="Token is valid")
     except Exception as e:
         return TokenValidationResponse(valid=False, message=f"Token validation error: {str(e)}")
@@ -280,7 +289,11 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
         logging.error(f"Exception in refresh-token: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Token refresh error: {str(e)}")
 
-def get_current_user(Authorization: str = Header(...), db: Session = Depends(get_db)) -> User:
+def get_current_user(Authorization: str = Header(...)) -> CurrentUser:
+    """
+    Authenticated user from the verified access token (signature and expiry are checked by
+    jose) and the short-lived user cache, so authenticated endpoints open no DB session for it.
+    """
     try:
         if not Authorization.startswith("Bearer "):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authorization header format. Expected 'Bearer <token>'")
@@ -292,17 +305,11 @@ def get_current_user(Authorization: str = Header(...), db: Session = Depends(get
         email = payload.get("email")
         if not user_id or not email:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token payload missing required user information")
-        user = db.query(User).filter(User.id == user_id).first()
+        user = get_cached_user(user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User no longer exists in database")
         if user.email != email:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User email mismatch")
-        exp_timestamp = payload.get("exp")
-        if exp_timestamp:
-            exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-            now = datetime.now(timezone.utc)
-            if now > exp_datetime:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
         return user
     except HTTPException:
         raise
@@ -310,7 +317,7 @@ def get_current_user(Authorization: str = Header(...), db: Session = Depends(get
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Authentication error: {str(e)}")
 
 @router.get("/me", response_model=dict)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "username": current_user.username,
@@ -335,6 +342,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     user.verification_token = None #type:ignore
     user.verification_token_expiry = None #type:ignore
     db.commit()
+    invalidate_user(user.id)
     logging.info(f"Email verification success for user {user.email}")
     access_token = jwt_utils.create_access_token({"sub": user.id, "email": user.email})
     return RedirectResponse(url=f"{FRONTEND_URL}/auth/callback?token={access_token}")
@@ -425,6 +433,7 @@ def logout(Authorization: str = Header(...), db: Session = Depends(get_db)):
         user.__setattr__('refresh_token', None)
         user.__setattr__('refresh_token_expiry', None)
         db.commit()
+        invalidate_user(user_id)
         return {"message": "Logged out successfully."}
     except Exception as e:
         logging.error(f"Logout error: {e}")
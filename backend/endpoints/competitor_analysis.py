@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends, status, Body
 from sqlalchemy.orm import Session
 from db.database import get_db
 from endpoints.auth import get_current_user
-from db.models.user import User
+from core.user_cache import CurrentUser
+from core.progress import record_task_owner
 from services.CompetitorAnalysisService import CompetitorAnalysisService
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from tasks.competitor_analysis_tasks import scrape_competitor_keywords
 from celery.result import AsyncResult
 from tasks.competitor_analysis_tasks import analyze_content_gap_task
@@ -17,15 +18,16 @@ router = APIRouter(prefix="/competitor-analysis", tags=["competitor-analysis"])
 
 class KeywordRequest(BaseModel):
     keywords: List[str]
+    locale: Optional[str] = None  # DuckDuckGo region code, e.g. "us-en"
 
 @router.post("/competitors", response_model=List[str])
 async def get_competitors(
     request: KeywordRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        competitors = await CompetitorAnalysisService.get_duckduckgo_competitors(request.keywords)
+        competitors = await CompetitorAnalysisService.get_duckduckgo_competitors(request.keywords, request.locale)
         return competitors
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -37,10 +39,11 @@ class CompetitorUrlsRequest(BaseModel):
 async def keywords_for_competitors(
     request: CompetitorUrlsRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         task = scrape_competitor_keywords.delay(request.urls)
+        record_task_owner(task.id, current_user.id)
         return {"task_id": task.id, "status": "PENDING"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,15 +66,18 @@ async def keywords_task_status(task_id: str):
 class ContentGapRequest(BaseModel):
     user_keywords: List[str]
     competitor_keywords_dict: dict
+    user_url: Optional[str] = None
+    competitor_urls: Optional[List[str]] = None  # defaults to the keys of competitor_keywords_dict
 
 @router.post("/content-gap-analysis", response_model=dict)
 async def content_gap_analysis(
     request: ContentGapRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
-        task = analyze_content_gap_task.delay(request.user_keywords, request.competitor_keywords_dict)
+        task = analyze_content_gap_task.delay(request.user_keywords, request.competitor_keywords_dict, request.user_url, request.competitor_urls)
+        record_task_owner(task.id, current_user.id)
         return {"task_id": task.id, "status": "PENDING"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -98,7 +104,7 @@ class ExtractKeywordsRequest(BaseModel):
 async def extract_keywords(
     request: ExtractKeywordsRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         logging.info(f"Received extract-keywords request: {request}")
@@ -112,7 +118,7 @@ async def extract_keywords(
 async def save_competitor_analysis(
     analysis: CompetitorAnalysisCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         obj = CompetitorAnalysisService.save_analysis(analysis, db)
@@ -124,7 +130,7 @@ async def save_competitor_analysis(
 async def get_all_analyses(
     project_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         analyses = db.query(CompetitorAnalysis).filter(CompetitorAnalysis.project_id == project_id).order_by(CompetitorAnalysis.created_at.desc()).all()
@@ -136,7 +142,7 @@ async def get_all_analyses(
 async def delete_competitor_analysis(
     analysis_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         obj = db.query(CompetitorAnalysis).filter(CompetitorAnalysis.id == analysis_id).first()
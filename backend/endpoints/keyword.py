@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from services.KeywordGenerationService import KeywordGenerationService
 from db.models.Schemas import KeywordSuggestionRequest, KeywordSuggestion, KeywordSuggestionResponse, KeywordResponse, SaveKeywordRequest
 from db.database import get_db
 from db.models.keyword import Keyword as KeywordModel
 import uuid
+from contextlib import aclosing
 
 router = APIRouter(prefix="/keywords", tags=["keywords"])
 
@@ -18,7 +19,8 @@ def generate_keyword_suggestions(request: KeywordSuggestionRequest):
         seed=request.seed,
         lang=request.lang or 'en',
         country=request.country or 'us',
-        top_n=request.top_n or 20
+        top_n=request.top_n or 20,
+        mode=request.mode or 'full'
     )
     keywords = result["keywords"]
     metadata = result["metadata"]
@@ -35,10 +37,16 @@ def generate_keyword_suggestions(request: KeywordSuggestionRequest):
     return KeywordSuggestionResponse(keywords=keyword_objs, metadata=metadata)
 
 @router.get("/generate-advanced-stream")
-async def generate_keywords_stream(seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10):
-    def event_generator():
-        for event in KeywordGenerationService.generate_keyword_suggestions_stream(seed, lang, country, top_n):
-            yield f"data: {event}\n\n"
+async def generate_keywords_stream(request: Request, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10, mode: Literal['full', 'fast'] = 'full'):
+    async def event_generator():
+        # Runs on the event loop; EventSourceResponse frames each JSON string as an SSE "data:" event.
+        # aclosing() stops the pipeline, and with it the in-flight Gemini request, once the client is gone.
+        async with aclosing(KeywordGenerationService.agenerate_keyword_suggestions_stream(seed, lang, country, top_n, mode)) as events:
+            async for event in events:
+                if await request.is_disconnected():
+                    print(f"[KeywordGen] Client disconnected, stopping stream for '{seed}'")
+                    break
+                yield event
     return EventSourceResponse(event_generator())
 
 @router.post("/save", response_model=KeywordResponse)
@@ -90,18 +98,20 @@ def safe_import_generate_keyword_suggestions_task():
 generate_keyword_suggestions_task = safe_import_generate_keyword_suggestions_task()
 
 from endpoints.auth import get_current_user
-from db.models.user import User
+from core.user_cache import CurrentUser
+from core.progress import record_task_owner
 from fastapi import Depends
 
 @router.post("/suggestions-async", response_model=dict)
 async def queue_keyword_suggestions(
     request: KeywordSuggestionRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     try:
         if not generate_keyword_suggestions_task:
             raise HTTPException(status_code=500, detail="Celery task not available")
         task = generate_keyword_suggestions_task.delay(request.dict(), str(current_user.id))
+        record_task_owner(task.id, current_user.id)
         return {
             "message": "Keyword generation started",
             "task_id": task.id,
@@ -112,7 +122,7 @@ async def queue_keyword_suggestions(
         raise HTTPException(status_code=500, detail=f"Failed to start keyword generation: {str(e)}")
 
 @router.get("/task-status/{task_id}")
-async def get_keyword_task_status(task_id: str, current_user: User = Depends(get_current_user)):
+async def get_keyword_task_status(task_id: str, current_user: CurrentUser = Depends(get_current_user)):
     if not generate_keyword_suggestions_task:
         raise HTTPException(status_code=500, detail="Celery task not available")
     task = generate_keyword_suggestions_task.AsyncResult(task_id)
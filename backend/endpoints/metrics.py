@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from core.cache import TwoTierCache
+from core.rate_limit import TokenBucket
+from endpoints.auth import get_current_user
+
+# Operational counters, not meant to be public: every route requires a signed-in user.
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(get_current_user)])
+
+@router.get("/cache", response_model=dict)
+def get_cache_metrics():
+    """Hit/miss counters for every cache registered in this process (plus Redis-wide totals)."""
+    return {namespace: cache.stats() for namespace, cache in TwoTierCache.registry.items()}
+
+@router.get("/rate-limits", response_model=dict)
+def get_rate_limit_metrics():
+    """Current occupancy of the shared outbound token buckets (PageSpeed, Gemini)."""
+    return {name: bucket.occupancy() for name, bucket in TokenBucket.registry.items()}
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from db.models import Project
 from db.database import get_db
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 router = APIRouter(prefix="/project", tags=["project"])
@@ -12,12 +12,14 @@ class ProjectCreate(BaseModel):
     description: Optional[str] = None
     website_url: str
     owner_id: str
+    audit_cache_ttl: Optional[int] = Field(None, ge=0)
 
 class ProjectUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     website_url: Optional[str] = None
     owner_id: Optional[str] = None
+    audit_cache_ttl: Optional[int] = Field(None, ge=0)
 
 @router.post("/create-project")
 def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
@@ -25,7 +27,8 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         name=project.name,
         description=project.description,
         website_url=project.website_url,
-        owner_id=project.owner_id
+        owner_id=project.owner_id,
+        audit_cache_ttl=project.audit_cache_ttl
     )
     db.add(db_project)
     db.commit()
@@ -36,6 +39,7 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         "description": db_project.description,
         "website_url": db_project.website_url,
         "owner_id": db_project.owner_id,
+        "audit_cache_ttl": db_project.audit_cache_ttl,
         "created_at": db_project.created_at,
         "updated_at": db_project.updated_at
     }
@@ -55,6 +59,7 @@ def update_project(project_id: str, project_update: ProjectUpdate, db: Session =
         "description": project.description,
         "website_url": project.website_url,
         "owner_id": project.owner_id,
+        "audit_cache_ttl": project.audit_cache_ttl,
         "created_at": project.created_at,
         "updated_at": project.updated_at
     }
@@ -70,6 +75,7 @@ def get_project_by_id(project_id: str, db: Session = Depends(get_db)):
         "description": project.description,
         "website_url": project.website_url,
         "owner_id": project.owner_id,
+        "audit_cache_ttl": project.audit_cache_ttl,
         "created_at": project.created_at,
         "updated_at": project.updated_at
     }
@@ -93,6 +99,7 @@ def get_all_projects(db: Session = Depends(get_db)):
             "description": project.description,
             "website_url": project.website_url,
             "owner_id": project.owner_id,
+            "audit_cache_ttl": project.audit_cache_ttl,
             "created_at": project.created_at,
             "updated_at": project.updated_at
         }
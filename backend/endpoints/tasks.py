@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from endpoints.auth import get_current_user
+from celery_app import celery_app
+from core.progress import progress_event, progress_hub, TERMINAL_STATES
+from typing import Optional
+import asyncio
+import json
+import logging
+import os
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+# Seconds without a published event after which the task's state is read from the result backend.
+# Covers events that were never published (Redis unreachable from the worker) and is a heartbeat.
+TASK_PROGRESS_IDLE_TIMEOUT = float(os.getenv("TASK_PROGRESS_IDLE_TIMEOUT", "15"))
+
+def backend_event(task_id: str) -> str:
+    """The task's current state from the Celery result backend, as a progress event."""
+    result = celery_app.AsyncResult(task_id)
+    state = result.state
+    if state == "PENDING":
+        return json.dumps({"task_id": task_id, "state": "PENDING", "status": "Task is pending...", "current": 0, "total": 100})
+    info = {"error": str(result.info)} if state == "FAILURE" else result.info
+    return json.dumps(progress_event(task_id, state, info), default=str)
+
+@router.websocket("/ws")
+async def task_progress(websocket: WebSocket):
+    """
+    Push channel for Celery task progress (audit, keyword and competitor analysis tasks),
+    replacing the */task-status polling endpoints. The first message authenticates:
+    {"token": "<access token>", "subscribe": ["<task_id>", ...]}; later messages may subscribe
+    to more tasks. Each task's events have the shape of /audit/task-status plus task_id: the
+    current state first, then every update until SUCCESS or FAILURE; after
+    TASK_PROGRESS_IDLE_TIMEOUT seconds without one, the state is re-read from the result backend.
+    Only tasks the authenticated user started can be followed. A task that cannot be followed
+    (unknown, someone else's, Redis unreachable) gets {"state": "UNAVAILABLE"}; the client then
+    falls back to polling the task-status endpoints.
+    """
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+        user = await run_in_threadpool(get_current_user, f"Bearer {message.get('token') or ''}")
+    except HTTPException as e:
+        await websocket.close(code=4401, reason=str(e.detail))
+        return
+    except (WebSocketDisconnect, ValueError, AttributeError):
+        return
+    send_lock = asyncio.Lock()
+    forwarders: dict[str, asyncio.Task] = {}
+
+    async def send(event: str):
+        async with send_lock:
+            await websocket.send_text(event)
+
+    async def unavailable(task_id: str, error: str):
+        await send(json.dumps({"task_id": task_id, "state": "UNAVAILABLE", "error": error}))
+
+    async def next_event(queue: asyncio.Queue, task_id: str) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(queue.get(), TASK_PROGRESS_IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return await run_in_threadpool(backend_event, task_id)
+
+    async def forward(task_id: str):
+        try:
+            if await progress_hub.task_owner(task_id) != str(user.id):
+                await unavailable(task_id, "Task not found")
+                return
+            while True:
+                async with progress_hub.subscribe(task_id) as queue:
+                    if queue.empty():
+                        # Nothing stored: the worker may not have published (e.g. Redis was down there).
+                        queue.put_nowait(await run_in_threadpool(backend_event, task_id))
+                    while (event := await next_event(queue, task_id)) is not None:
+                        await send(event)
+                        if json.loads(event).get("state") in TERMINAL_STATES:
+                            return
+                # Subscription lost: resubscribe, starting again from the stored last event.
+                await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"[Progress] Cannot follow task {task_id}: {e}")
+            try:
+                await unavailable(task_id, str(e))
+            except Exception:
+                pass
+
+    try:
+        while True:
+            for task_id in message.get("subscribe") or []:
+                if task_id not in forwarders:
+                    forwarders[task_id] = asyncio.create_task(forward(str(task_id)))
+            message = await websocket.receive_json()
+    except (WebSocketDisconnect, ValueError, AttributeError):
+        pass
+    finally:
+        for forwarder in forwarders.values():
+            forwarder.cancel()
+        await asyncio.gather(*forwarders.values(), return_exceptions=True)
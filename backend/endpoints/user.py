@@ -5,6 +5,7 @@ from db.database import get_db
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from core.hashing import Hasher
+from core.user_cache import invalidate_user
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -80,6 +81,7 @@ def update_user(user_id: str, user_update: UserUpdate, db: Session = Depends(get
     if user_update.is_premium is not None:
         setattr(user, 'is_premium', user_update.is_premium)
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
 
@@ -90,4 +92,5 @@ def delete_user(user_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return {"detail": f"User with id {user_id} deleted successfully."} 
\ No newline at end of file
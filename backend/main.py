@@ -11,9 +11,16 @@ from endpoints.user import router as user_router
 from endpoints.auth import router as auth_router
 from endpoints.keyword import router as keyword_router
 from endpoints.competitor_analysis import router as competitor_analysis_router
+from endpoints.metrics import router as metrics_router
+from endpoints.tasks import router as tasks_router
 from dotenv import load_dotenv
 import os
 import tasks.competitor_analysis_tasks
+from services.PageSpeedService import PageSpeedService
+from services.PageSnapshotService import PageSnapshotService
+from core.keyword_extract import keyword_pool
+from core.progress import progress_hub
+from core.hashing import hashing_pool
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +29,11 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     yield
+    await PageSpeedService.aclose()
+    await PageSnapshotService.aclose()
+    keyword_pool.shutdown()
+    await progress_hub.aclose()
+    hashing_pool.shutdown()
 
 app = FastAPI(title="SEO Audit API", version="1.0.0", lifespan=lifespan)
 
@@ -45,4 +57,6 @@ app.include_router(audit_router)
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(keyword_router)
-app.include_router(competitor_analysis_router)
\ No newline at end of file
+app.include_router(competitor_analysis_router)
+app.include_router(metrics_router)
+app.include_router(tasks_router)
\ No newline at end of file
@@ -1,14 +1,104 @@
 # services/audit.py
 from datetime import datetime
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from services.PageSpeedService import PageSpeedService
-from db.models.Schemas import AuditResult, AuditRequest, AuditReportResponse, PageSpeedData as SchemaPageSpeedData, Opportunity, Diagnostic, LighthouseData
+from db.models.Schemas import AuditResult, AuditRequest, AuditReportResponse, AuditHistoryPage, PageSpeedData as SchemaPageSpeedData, Opportunity, Diagnostic, LighthouseData
 from db.models.auditReport import AuditReport
 from db.models.project import Project
 from db.database import get_db
 from fastapi import HTTPException
 import traceback
-from typing import Optional
+import base64
+from typing import Optional, Iterable
+
+# Columns returned by history queries by default; the JSON blobs are only selected on request.
+AUDIT_SCALAR_COLUMNS = (
+    AuditReport.id, AuditReport.project_id, AuditReport.audit_type, AuditReport.overall_score,
+    AuditReport.mobile_performance_score, AuditReport.desktop_performance_score,
+    AuditReport.recommendations, AuditReport.created_at, AuditReport.url, AuditReport.timestamp,
+)
+AUDIT_BLOB_COLUMNS = {
+    'pagespeed_data': AuditReport.pagespeed_data,
+    'lighthouse_mobile': AuditReport.lighthouse_mobile,
+    'lighthouse_desktop': AuditReport.lighthouse_desktop,
+}
+
+def _encode_cursor(created_at: datetime, audit_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{audit_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, audit_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(audit_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Lighthouse audit id -> (summary field, divisor, decimals)
+_SUMMARY_METRICS = {
+    'first-contentful-paint': ('fcp', 1000, 2),
+    'largest-contentful-paint': ('lcp', 1000, 2),
+    'cumulative-layout-shift': ('cls', 1, 3),
+    'max-potential-fid': ('fid', 1, 1),
+    'server-response-time': ('ttfb', 1, 1),
+}
+
+def _to_float(val, default=0.0):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+def summarize_lighthouse(lh: dict) -> tuple[SchemaPageSpeedData, dict]:
+    """
+    Build the PageSpeedData summary (scores, metrics, opportunities, diagnostics) and the
+    stored "useful" Lighthouse subset in a single pass over lh['audits'].
+    """
+    audits = lh.get('audits') or {}
+    categories = lh.get('categories') or {}
+    opportunities = []
+    diagnostics = []
+    for audit in audits.values():
+        details = audit.get('details')
+        savings = _to_float(details.get('overallSavingsMs'), 0.0) if details else 0.0
+        if savings > 100:
+            title, description = audit.get('title', ''), audit.get('description', '')
+            if isinstance(title, str) and isinstance(description, str):
+                opportunities.append(Opportunity(title=title, description=description, savings_ms=savings))
+        if audit.get('scoreDisplayMode') == 'informative' and audit.get('score') is not None:
+            title, description, score = audit.get('title', ''), audit.get('description', ''), _to_float(audit['score'], None)
+            if isinstance(title, str) and isinstance(description, str) and score is not None:
+                diagnostics.append(Diagnostic(title=title, description=description, score=score))
+    metrics = {}
+    for audit_id, (field, divisor, decimals) in _SUMMARY_METRICS.items():
+        value = (audits.get(audit_id) or {}).get('numericValue')
+        metrics[field] = round(_to_float(value) / divisor, decimals) if value is not None else 0.0
+    score = (categories.get('performance') or {}).get('score')
+    performance_score = int(round(_to_float(score) * 100)) if score is not None else 0
+    # Validated once here; the model instances are not re-validated by PageSpeedData.
+    data = SchemaPageSpeedData(
+        performance_score=performance_score,
+        opportunities=opportunities,
+        diagnostics=diagnostics,
+        **metrics
+    )
+    useful = {
+        'finalUrl': lh.get('finalUrl'),
+        'fetchTime': lh.get('fetchTime'),
+        'categories': {
+            k: {
+                'score': v.get('score'),
+                'title': v.get('title'),
+                'description': v.get('description', None)
+            } for k, v in categories.items()
+        },
+        'configSettings': lh.get('configSettings'),
+        'environment': lh.get('environment'),
+        'runWarnings': lh.get('runWarnings'),
+        'categoryGroups': lh.get('categoryGroups'),
+        'auditRefs': lh.get('categoryGroups'),
+    }
+    return data, useful
 
 class AuditService:
     def __init__(self):
@@ -22,120 +112,36 @@ class AuditService:
                 raise HTTPException(status_code=404, detail="Project not found")
             
             categories = ["performance", "accessibility", "best-practices", "seo", "pwa"]
-            if mobile_lighthouse is None:
-                mobile_lighthouse = await self.pagespeed.analyze_page(str(project.website_url), "mobile", categories=categories)
-            if desktop_lighthouse is None:
-                desktop_lighthouse = await self.pagespeed.analyze_page(str(project.website_url), "desktop", categories=categories)
-
-            def extract_summary(lh):
-                audits = lh.get('audits', {})
-                categories_obj = lh.get('categories', {})
-                def safe_int(val):
-                    try:
-                        return int(val)
-                    except Exception:
-                        return 0
-                def safe_float(val):
-                    try:
-                        return float(val)
-                    except Exception:
-                        return 0.0
-                score_val = categories_obj.get('performance', {}).get('score', 0)
-                if score_val is not None:
-                    try:
-                        score_val = float(score_val)
-                    except Exception:
-                        score_val = 0.0
-                else:
-                    score_val = 0.0
-                # Build opportunities and diagnostics as list of dicts
-                opportunities = []
-                for a in audits.values():
-                    savings = a.get('details', {}).get('overallSavingsMs', 0)
-                    if savings > 100:
-                        try:
-                            op = Opportunity(
-                                title=a.get('title', ''),
-                                description=a.get('description', ''),
-                                savings_ms=float(savings)
-                            )
-                            opportunities.append(op.dict())
-                        except Exception:
-                            pass
-                diagnostics = []
-                for a in audits.values():
-                    if a.get('scoreDisplayMode') == 'informative' and a.get('score') is not None:
-                        try:
-                            diag = Diagnostic(
-                                title=a.get('title', ''),
-                                description=a.get('description', ''),
-                                score=float(a.get('score', 0))
-                            )
-                            diagnostics.append(diag.dict())
-                        except Exception:
-                            pass
-                summary = dict(
-                    performance_score=int(round(score_val * 100)),
-                    fcp=float(round(safe_float(audits.get('first-contentful-paint', {}).get('numericValue', 0)) / 1000, 2)) if audits.get('first-contentful-paint', {}).get('numericValue') is not None else 0.0,
-                    lcp=float(round(safe_float(audits.get('largest-contentful-paint', {}).get('numericValue', 0)) / 1000, 2)) if audits.get('largest-contentful-paint', {}).get('numericValue') is not None else 0.0,
-                    cls=float(round(safe_float(audits.get('cumulative-layout-shift', {}).get('numericValue', 0)), 3)) if audits.get('cumulative-layout-shift', {}).get('numericValue') is not None else 0.0,
-                    fid=float(round(safe_float(audits.get('max-potential-fid', {}).get('numericValue', 0)), 1)) if audits.get('max-potential-fid', {}).get('numericValue') is not None else 0.0,
-                    ttfb=float(round(safe_float(audits.get('server-response-time', {}).get('numericValue', 0)), 1)) if audits.get('server-response-time', {}).get('numericValue') is not None else 0.0,
-                    opportunities=opportunities,
-                    diagnostics=diagnostics
+            missing = tuple(s for s, lh in (("mobile", mobile_lighthouse), ("desktop", desktop_lighthouse)) if lh is None)
+            if missing:
+                fetched, errors = await self.pagespeed.analyze_strategies(
+                    str(project.website_url), missing, categories=categories,
+                    cache_ttl=project.audit_cache_ttl, force_refresh=request.force_refresh
                 )
-                return summary
+                if errors:
+                    raise next(iter(errors.values()))
+                mobile_lighthouse = fetched.get("mobile", mobile_lighthouse)
+                desktop_lighthouse = fetched.get("desktop", desktop_lighthouse)
+        except HTTPException:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+        return self.save_audit(request, db, mobile_lighthouse, desktop_lighthouse)
 
-            def extract_lighthouse_useful(lh):
-                return {
-                    'finalUrl': lh.get('finalUrl'),
-                    'fetchTime': lh.get('fetchTime'),
-                    'categories': {
-                        k: {
-                            'score': v.get('score'),
-                            'title': v.get('title'),
-                            'description': v.get('description', None)
-                        } for k, v in lh.get('categories', {}).items()
-                    },
-                    'configSettings': lh.get('configSettings'),
-                    'environment': lh.get('environment'),
-                    'runWarnings': lh.get('runWarnings'),
-                    'categoryGroups': lh.get('categoryGroups'),
-                    'auditRefs': lh.get('categoryGroups'),
-                }
+    def save_audit(self, request: AuditRequest, db: Session, mobile_lighthouse: dict, desktop_lighthouse: dict) -> AuditResult:
+        """
+        Summarize fetched Lighthouse reports and store them as an audit report. Blocking DB work:
+        callers that fetched the reports on an event loop call this from their own thread.
+        """
+        try:
+            project = db.query(Project).filter(Project.id == request.project_id).first()
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
 
-            mobile_summary = extract_summary(mobile_lighthouse)
-            desktop_summary = extract_summary(desktop_lighthouse)
-            def safe_get(d, k, typ, default):
-                v = d.get(k, default)
-                if isinstance(v, typ):
-                    return v
-                try:
-                    return typ(v)
-                except Exception:
-                    return default
+            mobile_data, mobile_useful = summarize_lighthouse(mobile_lighthouse)
+            desktop_data, desktop_useful = summarize_lighthouse(desktop_lighthouse)
 
-            mobile_data = SchemaPageSpeedData(
-                performance_score=safe_get(mobile_summary, 'performance_score', int, 0),
-                fcp=safe_get(mobile_summary, 'fcp', float, 0.0),
-                lcp=safe_get(mobile_summary, 'lcp', float, 0.0),
-                cls=safe_get(mobile_summary, 'cls', float, 0.0),
-                fid=safe_get(mobile_summary, 'fid', float, 0.0),
-                ttfb=safe_get(mobile_summary, 'ttfb', float, 0.0),
-                opportunities=mobile_summary['opportunities'] if isinstance(mobile_summary['opportunities'], list) else [],
-                diagnostics=mobile_summary['diagnostics'] if isinstance(mobile_summary['diagnostics'], list) else []
-            )
-            desktop_data = SchemaPageSpeedData(
-                performance_score=safe_get(desktop_summary, 'performance_score', int, 0),
-                fcp=safe_get(desktop_summary, 'fcp', float, 0.0),
-                lcp=safe_get(desktop_summary, 'lcp', float, 0.0),
-                cls=safe_get(desktop_summary, 'cls', float, 0.0),
-                fid=safe_get(desktop_summary, 'fid', float, 0.0),
-                ttfb=safe_get(desktop_summary, 'ttfb', float, 0.0),
-                opportunities=desktop_summary['opportunities'] if isinstance(desktop_summary['opportunities'], list) else [],
-                diagnostics=desktop_summary['diagnostics'] if isinstance(desktop_summary['diagnostics'], list) else []
-            )
-            
             overall_score = self._calculate_overall_score(mobile_data, desktop_data)
             
             recommendations = self._generate_recommendations(mobile_data, desktop_data)
@@ -157,8 +163,8 @@ class AuditService:
                     "desktop": desktop_data.dict()
                 },
                 recommendations=recommendations,
-                lighthouse_mobile=extract_lighthouse_useful(mobile_lighthouse),
-                lighthouse_desktop=extract_lighthouse_useful(desktop_lighthouse),
+                lighthouse_mobile=mobile_useful,
+                lighthouse_desktop=desktop_useful,
                 audit_date_start=datetime.now(),
                 audit_date_end=datetime.now(),
                 url=str(project.website_url),
@@ -176,8 +182,8 @@ class AuditService:
                 pagespeed_desktop=desktop_data,
                 overall_score=overall_score,
                 recommendations=recommendations,
-                lighthouse_mobile=LighthouseData(**extract_lighthouse_useful(mobile_lighthouse)),
-                lighthouse_desktop=LighthouseData(**extract_lighthouse_useful(desktop_lighthouse))
+                lighthouse_mobile=LighthouseData(**mobile_useful),
+                lighthouse_desktop=LighthouseData(**desktop_useful)
             )
         except HTTPException:
             raise
@@ -185,12 +191,43 @@ class AuditService:
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
     
-    def get_audit_history(self, project_id: str, db: Session) -> list[AuditReportResponse]:
-        audits = db.query(AuditReport).filter(
+    def _history_query(self, project_id: str, db: Session, include: Iterable[str]):
+        unknown = set(include) - AUDIT_BLOB_COLUMNS.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown audit fields: {', '.join(sorted(unknown))}")
+        columns = list(AUDIT_SCALAR_COLUMNS) + [AUDIT_BLOB_COLUMNS[name] for name in include]
+        return db.query(*columns).filter(
             AuditReport.project_id == project_id
-        ).order_by(AuditReport.created_at.desc()).all()
-        
-        return [AuditReportResponse.from_orm(audit) for audit in audits]
+        ).order_by(AuditReport.created_at.desc(), AuditReport.id.desc())
+
+    def get_audit_history(self, project_id: str, db: Session, include_data: bool = True, limit: Optional[int] = None) -> list[AuditReportResponse]:
+        include = AUDIT_BLOB_COLUMNS.keys() if include_data else ()
+        query = self._history_query(project_id, db, include)
+        if limit:
+            query = query.limit(limit)
+        return [AuditReportResponse(**row._mapping) for row in query]
+
+    def get_audit_page(self, project_id: str, db: Session, limit: int = 20, cursor: Optional[str] = None, include: Iterable[str] = ()) -> AuditHistoryPage:
+        """Keyset-paginated history, newest first. Only scalar columns unless blobs are named in include."""
+        query = self._history_query(project_id, db, include)
+        if cursor:
+            created_at, audit_id = _decode_cursor(cursor)
+            query = query.filter(or_(
+                AuditReport.created_at < created_at,
+                and_(AuditReport.created_at == created_at, AuditReport.id < audit_id),
+            ))
+        rows = query.limit(limit + 1).all()
+        items = [AuditReportResponse(**row._mapping) for row in rows[:limit]]
+        next_cursor = _encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+        return AuditHistoryPage(items=items, next_cursor=next_cursor)
+
+    def get_latest_audit(self, project_id: str, db: Session) -> Optional[AuditReportResponse]:
+        audit = db.query(AuditReport).filter(
+            AuditReport.project_id == project_id
+        ).order_by(AuditReport.created_at.desc(), AuditReport.id.desc()).first()
+        if audit:
+            return AuditReportResponse.from_orm(audit)
+        return None
     
     def get_audit_by_id(self, audit_id: int, db: Session) -> Optional[AuditReportResponse]:
         audit = db.query(AuditReport).filter(AuditReport.id == audit_id).first()
@@ -1,10 +1,16 @@
+import asyncio
+import hashlib
+import logging
+import unicodedata
 import time
 import random
-import requests
 from bs4 import BeautifulSoup
-import yake
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from core.llm import gemini_llm
+from core.http_client import HostLimiter
+from core.cache import TwoTierCache
+from core.keyword_extract import extract_candidates, aextract_candidates
+from services.PageSnapshotService import PageSnapshotService, EMPTY_FIELDS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda
 from bs4.element import Tag
@@ -13,123 +19,296 @@ from db.models.competitorAnalysis import CompetitorAnalysis
 from db.models.Schemas import CompetitorAnalysisCreate
 from sqlalchemy.orm import Session
 
+DUCKDUCKGO_URL = "https://html.duckduckgo.com/html/"
+# DuckDuckGo region code ("kl"); wt-wt means no region.
+DEFAULT_LOCALE = "wt-wt"
+MAX_COMPETITORS = 10
+LINKS_PER_KEYWORD = 2
+# Estimated prompt tokens of page descriptions per batched keyword-ranking request.
+RANKING_BATCH_TOKENS = int(os.getenv("KEYWORD_RANKING_BATCH_TOKENS", "6000"))
+SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "gov", "edu", "ac", "ltd", "plc"}
+
 class CompetitorAnalysisService:
+    # Page and SERP fetches share one connection pool and the per-host limits.
+    http = PageSnapshotService.http
+    limiter = PageSnapshotService.limiter
+    serp_limiter = HostLimiter("SERP", max_concurrency=4, per_host=4)
+    serp_cache = TwoTierCache(
+        "serp",
+        max_entries=int(os.getenv("SERP_CACHE_LOCAL_ENTRIES", "512")),
+        ttl=int(os.getenv("SERP_CACHE_TTL", str(24 * 60 * 60))),
+    )
+    fetch_deadline = PageSnapshotService.fetch_deadline
+
     @staticmethod
-    async def get_duckduckgo_competitors(keywords):
-        import logging
-        import requests
-        from bs4 import BeautifulSoup
-        all_links = []
+    def registered_domain(url):
+        """
+        Approximate registrable domain of url ("https://blog.example.co.uk/x" -> "example.co.uk"),
+        used to keep one result per competitor site.
+        """
+        host = (urllib.parse.urlsplit(url).hostname or "").lower().rstrip(".")
+        labels = host.split(".")
+        if len(labels) < 2:
+            return host
+        # Country-code second-level suffixes such as co.uk or com.au.
+        if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+            return ".".join(labels[-3:])
+        return ".".join(labels[-2:])
+
+    @staticmethod
+    def parse_serp_links(html):
+        soup = BeautifulSoup(html, "html.parser")
+        links = []
+        for a in soup.find_all("a", class_="result__a"):
+            if isinstance(a, Tag) and a.has_attr('href'):
+                href = str(a['href'])
+                parsed = urllib.parse.urlparse(href)
+                qs = urllib.parse.parse_qs(parsed.query)
+                real_url = qs.get('uddg', [None])[0]
+                if real_url:
+                    links.append(urllib.parse.unquote(real_url))
+        return links
+
+    @staticmethod
+    def serp_cache_key(keyword, locale=None):
+        """Case, width and whitespace variants of a keyword share one SERP cache entry per locale."""
+        normalized = " ".join(unicodedata.normalize("NFKC", keyword).casefold().split())
+        return hashlib.sha256(f"{(locale or DEFAULT_LOCALE).lower()}|{normalized}".encode()).hexdigest()
+
+    @classmethod
+    async def fetch_serp_links(cls, keyword, locale=None):
+        key = cls.serp_cache_key(keyword, locale)
+        cached = await cls.serp_cache.aget(key)
+        if cached is not None:
+            return cached
+        async with cls.serp_limiter.limit(DUCKDUCKGO_URL):
+            logging.info(f"[CompetitorAnalysis] Searching: {keyword}")
+            params = {"q": keyword, "kl": (locale or DEFAULT_LOCALE).lower()}
+            response = await asyncio.wait_for(cls.http.get().get(DUCKDUCKGO_URL, params=params), cls.fetch_deadline)
+        response.raise_for_status()
+        links = await asyncio.to_thread(cls.parse_serp_links, response.text)
+        logging.info(f"[CompetitorAnalysis] Links for '{keyword}': {links}")
+        # An empty page is usually DuckDuckGo throttling us rather than a real answer.
+        if links:
+            await cls.serp_cache.aset(key, links)
+        return links
+
+    @classmethod
+    async def get_duckduckgo_competitors(cls, keywords, locale=None):
+        """
+        Search keywords on DuckDuckGo in parallel (served from the SERP cache when possible) and
+        return up to MAX_COMPETITORS result URLs, one per registered domain. Results are consumed
+        in keyword order, so the output matches a sequential search; outstanding searches are
+        cancelled once enough domains are found.
+        """
+        logging.info(f"[CompetitorAnalysis] Keywords: {keywords}")
+        searches = [asyncio.ensure_future(cls.fetch_serp_links(kw, locale)) for kw in keywords]
+        competitors, domains, errors = [], set(), []
         try:
-            logging.info(f"[CompetitorAnalysis] Keywords: {keywords}")
-            for kw in keywords:
-                search_url = f"https://html.duckduckgo.com/html/?q={kw}"
-                logging.info(f"[CompetitorAnalysis] Searching: {search_url}")
-                resp = requests.get(search_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-                soup = BeautifulSoup(resp.text, "html.parser")
-                results = soup.find_all("a", class_="result__a")
-                links = []
-                for a in results:
-                    if isinstance(a, Tag) and a.has_attr('href'):
-                        href = str(a['href'])
-                        parsed = urllib.parse.urlparse(href)
-                        qs = urllib.parse.parse_qs(parsed.query)
-                        real_url = qs.get('uddg', [None])[0]
-                        if real_url:
-                            real_url = urllib.parse.unquote(real_url)
-                            links.append(real_url)
-                logging.info(f"[CompetitorAnalysis] Links for '{kw}': {links}")
-                all_links.extend(links[:2])
-                if len(all_links) >= 10:
+            for kw, search in zip(keywords, searches):
+                try:
+                    links = await search
+                except Exception as e:
+                    logging.warning(f"[CompetitorAnalysis] Search for '{kw}' failed: {e}")
+                    errors.append(e)
+                    continue
+                taken = 0
+                for link in links:
+                    domain = cls.registered_domain(link)
+                    if not domain or domain in domains:
+                        continue
+                    domains.add(domain)
+                    competitors.append(link)
+                    taken += 1
+                    if taken == LINKS_PER_KEYWORD or len(competitors) >= MAX_COMPETITORS:
+                        break
+                if len(competitors) >= MAX_COMPETITORS:
                     break
-            logging.info(f"[CompetitorAnalysis] All links: {all_links}")
-            return all_links[:10]
-        except Exception as e:
-            logging.error(f"[CompetitorAnalysis] DuckDuckGo scraping failed: {e}")
-            raise Exception(f"DuckDuckGo scraping failed: {e}")
+        finally:
+            for search in searches:
+                search.cancel()
+            # Retrieve every outcome so unread failures are not logged and cancellations complete.
+            await asyncio.gather(*searches, return_exceptions=True)
+        if errors and len(errors) == len(keywords):
+            logging.error(f"[CompetitorAnalysis] DuckDuckGo scraping failed: {errors[0]}")
+            raise Exception(f"DuckDuckGo scraping failed: {errors[0]}")
+        logging.info(f"[CompetitorAnalysis] All links: {competitors}")
+        return competitors
 
     @staticmethod
-    async def extract_keywords_from_url(url, max_keywords=5):
+    def page_text(page):
+        """Title, meta description, headings and visible text of a page snapshot, as one YAKE input."""
+        return f"{page['title']} {page['meta_desc']} {page['h1_tags']} {page['h2_tags']} {page['text']}"
+
+    @classmethod
+    def extract_candidate_keywords(cls, page, max_keywords=5):
+        """Rank YAKE candidates for a page snapshot in the calling process."""
+        return extract_candidates(cls.page_text(page), max_keywords)
+
+    @classmethod
+    async def extract_keywords_from_url(cls, url, max_keywords=5):
         try:
-            response = requests.get(url, timeout=150)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # Extract visible text
-            text = ' '.join([t for t in soup.stripped_strings])
-            # Add title and meta description for better context
-            title = soup.title.string if soup.title else ''
-            meta_desc = ''
-            meta = soup.find('meta', attrs={'name': 'description'})
-            if isinstance(meta, Tag):
-                meta_desc = meta.get('content', '')
-            # Extract H1 and H2 tags
-            h1_tags = ' '.join([h1.get_text(strip=True) for h1 in soup.find_all('h1')])
-            h2_tags = ' '.join([h2.get_text(strip=True) for h2 in soup.find_all('h2')])
-            # Combine all context
-            full_text = f"{title} {meta_desc} {h1_tags} {h2_tags} {text}"
-            # Use YAKE for keyword extraction (n=1 and n=2)
-            kw_extractor1 = yake.KeywordExtractor(lan="en", n=1, top=max_keywords*4)
-            kw_extractor2 = yake.KeywordExtractor(lan="en", n=2, top=max_keywords*4)
-            keywords1 = [kw for kw, score in kw_extractor1.extract_keywords(full_text)]
-            keywords2 = [kw for kw, score in kw_extractor2.extract_keywords(full_text)]
-            # Combine, deduplicate, and filter stopwords/short words
-            import re
-            from collections import Counter
-            stopwords = set(["the","and","for","with","that","this","from","are","was","but","not","you","your","all","can","has","have","will","more","one","about","who","out","get","use","how","why","when","where","which","their","they","our","its","it's","on","in","at","to","of","by","as","an","or","is","be","if","it","a"])
-            all_keywords = keywords1 + keywords2
-            # Clean and filter
-            cleaned = [re.sub(r'[^a-zA-Z0-9\- ]', '', kw).strip().lower() for kw in all_keywords]
-            filtered = [kw for kw in cleaned if len(kw) > 2 and kw not in stopwords]
-            # Prioritize by frequency
-            freq = Counter(filtered)
-            sorted_keywords = [kw for kw, _ in freq.most_common()]
-            # Get unique candidate keywords
-            candidate_keywords = []
-            for kw in sorted_keywords:
-                if kw not in candidate_keywords:
-                    candidate_keywords.append(kw)
-            # Use LLM to filter and rank for business relevance
-            api_key = os.getenv('GOOGLE_API_KEY')
-            if not api_key or not candidate_keywords:
-                # fallback to YAKE only if LLM not available
-                return candidate_keywords[:max_keywords]
-            llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=api_key)
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert SEO strategist."),
-                ("user", (
-                    "Given the following information about a website, select the most business-relevant, short, SEO-friendly keywords that best represent the website's main topics and offerings.\n"
-                    "Title: {title}\n"
-                    "Meta Description: {meta_desc}\n"
-                    "H1 Tags: {h1_tags}\n"
-                    "H2 Tags: {h2_tags}\n"
-                    "Candidate Keywords: {candidate_keywords}\n"
-                    "Return a JSON array of the top {max_keywords} keywords, each as a string. Do not include explanations or extra text."
-                ))
-            ])
-            chain = prompt | llm | RunnableLambda(lambda x: x.content)
-            result = chain.invoke({
-                "title": title,
-                "meta_desc": meta_desc,
-                "h1_tags": h1_tags,
-                "h2_tags": h2_tags,
-                "candidate_keywords": ', '.join(candidate_keywords[:max_keywords*6]),
-                "max_keywords": max_keywords
-            })
-            import json, re
-            try:
-                match = re.search(r'\[.*\]', result, re.DOTALL)
-                if match:
-                    return json.loads(match.group(0))
-                return json.loads(result)
-            except Exception:
-                # fallback to YAKE if LLM output is not parseable
-                return candidate_keywords[:max_keywords]
+            page = await PageSnapshotService.get_snapshot(url)
+            candidate_keywords = await aextract_candidates(cls.page_text(page), max_keywords)
+            return await cls.rank_page_keywords(page, candidate_keywords, max_keywords)
         except Exception as e:
             # Log or handle error as needed
             return []
 
     @staticmethod
-    def analyze_content_gap_and_recommend(user_keywords, competitor_keywords_dict, user_url=None, competitor_urls=None):
+    async def rank_page_keywords(page, candidate_keywords, max_keywords=5):
+        """Let the LLM pick the top keywords of one page from its YAKE candidates."""
+        title, meta_desc, h1_tags, h2_tags = page["title"], page["meta_desc"], page["h1_tags"], page["h2_tags"]
+        # Use LLM to filter and rank for business relevance
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key or not candidate_keywords:
+            # fallback to YAKE only if LLM not available
+            return candidate_keywords[:max_keywords]
+        llm = gemini_llm(api_key)
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are an expert SEO strategist."),
+            ("user", (
+                "Given the following information about a website, select the most business-relevant, short, SEO-friendly keywords that best represent the website's main topics and offerings.\n"
+                "Title: {title}\n"
+                "Meta Description: {meta_desc}\n"
+                "H1 Tags: {h1_tags}\n"
+                "H2 Tags: {h2_tags}\n"
+                "Candidate Keywords: {candidate_keywords}\n"
+                "Return a JSON array of the top {max_keywords} keywords, each as a string. Do not include explanations or extra text."
+            ))
+        ])
+        chain = prompt | llm | RunnableLambda(lambda x: x.content)
+        result = await chain.ainvoke({
+            "title": title,
+            "meta_desc": meta_desc,
+            "h1_tags": h1_tags,
+            "h2_tags": h2_tags,
+            "candidate_keywords": ', '.join(candidate_keywords[:max_keywords*6]),
+            "max_keywords": max_keywords
+        })
+        import json, re
+        try:
+            match = re.search(r'\[.*\]', result, re.DOTALL)
+            if match:
+                return json.loads(match.group(0))
+            return json.loads(result)
+        except Exception:
+            # fallback to YAKE if LLM output is not parseable
+            return candidate_keywords[:max_keywords]
+
+    @staticmethod
+    def batch_ranking_inputs(pages, max_keywords=5, token_budget=RANKING_BATCH_TOKENS):
+        """
+        Split (index, url, page, candidates) items into batches whose prompt blocks fit token_budget
+        (estimated at 4 characters per token). Returns a list of [(index, url, candidates, block)].
+        """
+        batches, current, used = [], [], 0
+        for index, url, page, candidates in pages:
+            block = (
+                f"[{index}] URL: {url}\n"
+                f"Title: {page['title'][:200]}\nMeta Description: {page['meta_desc'][:300]}\n"
+                f"H1 Tags: {page['h1_tags'][:300]}\nH2 Tags: {page['h2_tags'][:500]}\n"
+                f"Candidate Keywords: {', '.join(candidates[:max_keywords*6])}"
+            )
+            tokens = len(block) // 4 + 1
+            if current and used + tokens > token_budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append((index, url, candidates, block))
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def parse_batch_ranking(result, indexes, max_keywords=5):
+        """Map {"<index>": [keywords]} LLM output to {index: keywords}; malformed entries are left out."""
+        import json, re
+        try:
+            match = re.search(r'\{.*\}', result, re.DOTALL)
+            data = json.loads(match.group(0) if match else result)
+        except Exception:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        ranked = {}
+        for index in indexes:
+            keywords = data.get(str(index))
+            if isinstance(keywords, list) and keywords and all(isinstance(kw, str) for kw in keywords):
+                ranked[index] = keywords[:max_keywords]
+        return ranked
+
+    @classmethod
+    async def extract_keywords_for_urls(cls, urls, max_keywords=5):
+        """
+        Keywords for several competitor URLs with one LLM ranking request per batch of pages
+        (batches sized by RANKING_BATCH_TOKENS) instead of one per URL. Pages missing from a
+        batch answer are ranked individually. Returns {url: [keywords]}; failed pages map to [].
+        """
+        urls = list(dict.fromkeys(urls))
+        snapshots = await asyncio.gather(*(PageSnapshotService.get_snapshot(url) for url in urls), return_exceptions=True)
+        pages = []
+        results = {}
+        for url, page in zip(urls, snapshots):
+            if isinstance(page, BaseException):
+                logging.warning(f"[CompetitorAnalysis] Failed to fetch {url}: {page}")
+                results[url] = []
+            else:
+                pages.append((url, page))
+        candidates = await asyncio.gather(*(aextract_candidates(cls.page_text(page), max_keywords) for _, page in pages), return_exceptions=True)
+        items = []
+        for (url, page), cands in zip(pages, candidates):
+            if isinstance(cands, BaseException):
+                logging.warning(f"[CompetitorAnalysis] Keyword extraction failed for {url}: {cands}")
+                cands = []
+            items.append((url, page, cands))
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key:
+            # fallback to YAKE only if LLM not available
+            results.update({url: cands[:max_keywords] for url, _, cands in items})
+            return {url: results[url] for url in urls}
+        llm = gemini_llm(api_key)
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are an expert SEO strategist."),
+            ("user", (
+                "For each website below, select the most business-relevant, short, SEO-friendly keywords that best represent the website's main topics and offerings, choosing from its candidate keywords.\n\n"
+                "{pages}\n\n"
+                "Return a JSON object mapping each website's number (as a string, e.g. \"0\") to a JSON array of its top {max_keywords} keywords. "
+                "Include every website. Do not include explanations or extra text."
+            ))
+        ])
+        chain = prompt | llm | RunnableLambda(lambda x: x.content)
+        ranked = {}
+        # Pages without candidates have nothing to rank.
+        rankable = [(index, url, page, cands) for index, (url, page, cands) in enumerate(items) if cands]
+        for batch in cls.batch_ranking_inputs(rankable, max_keywords):
+            indexes = [index for index, _, _, _ in batch]
+            try:
+                result = await chain.ainvoke({
+                    "pages": "\n\n".join(block for _, _, _, block in batch),
+                    "max_keywords": max_keywords,
+                })
+                ranked.update(cls.parse_batch_ranking(result, indexes, max_keywords))
+            except Exception as e:
+                logging.warning(f"[CompetitorAnalysis] Batch keyword ranking failed: {e}")
+        missing = [i for i in range(len(items)) if i not in ranked and items[i][2]]
+        if missing:
+            logging.info(f"[CompetitorAnalysis] Ranking {len(missing)} page(s) individually")
+            async def rank_one(index):
+                url, page, cands = items[index]
+                try:
+                    return await cls.rank_page_keywords(page, cands, max_keywords)
+                except Exception as e:
+                    logging.warning(f"[CompetitorAnalysis] Keyword ranking failed for {url}: {e}")
+                    return cands[:max_keywords]
+            for index, keywords in zip(missing, await asyncio.gather(*(rank_one(i) for i in missing))):
+                ranked[index] = keywords
+        for index, (url, _, cands) in enumerate(items):
+            results[url] = ranked.get(index, cands[:max_keywords])
+        return {url: results[url] for url in urls}
+
+    @staticmethod
+    async def analyze_content_gap_and_recommend(user_keywords, competitor_keywords_dict, user_url=None, competitor_urls=None):
         """
         user_keywords: list of str
         competitor_keywords_dict: dict of {url: [keywords]}
@@ -140,40 +319,20 @@ class CompetitorAnalysisService:
         api_key = os.getenv('GOOGLE_API_KEY')
         if not api_key:
             return {"content_gaps": [], "recommendations": ["GOOGLE_API_KEY not found, cannot run LLM workflow."]}
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=api_key)
+        llm = gemini_llm(api_key)
 
-        # Helper to scrape and summarize content
-        def scrape_content(url):
-            try:
-                resp = requests.get(url, timeout=150)
-                resp.raise_for_status()
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                title = soup.title.string if soup.title else ''
-                meta_desc = ''
-                meta = soup.find('meta', attrs={'name': 'description'})
-                if isinstance(meta, Tag):
-                    meta_desc = meta.get('content', '')
-                h1_tags = ' '.join([h1.get_text(strip=True) for h1 in soup.find_all('h1')])
-                h2_tags = ' '.join([h2.get_text(strip=True) for h2 in soup.find_all('h2')])
-                text = ' '.join([t for t in soup.stripped_strings])
-                return {
-                    "title": title,
-                    "meta_desc": meta_desc,
-                    "h1_tags": h1_tags,
-                    "h2_tags": h2_tags,
-                    "text": text[:3000]  # limit to 3000 chars for LLM
-                }
-            except Exception:
-                return {"title": "", "meta_desc": "", "h1_tags": "", "h2_tags": "", "text": ""}
-
-        # Scrape user and competitor content if URLs provided
-        user_content = scrape_content(user_url) if user_url else {"title": "", "meta_desc": "", "h1_tags": "", "h2_tags": "", "text": ""}
-        competitor_contents = {}
+        # Page snapshots are shared with keyword extraction, so pages it already fetched are not downloaded again
+        urls = ([user_url] if user_url else []) + list(competitor_urls or [])
+        snapshots = await PageSnapshotService.get_snapshots(urls) if urls else {}
+        def page_content(url):
+            page = snapshots.get(url, EMPTY_FIELDS)
+            return {**page, "text": page["text"][:3000]}  # limit to 3000 chars for LLM
+
+        user_content = page_content(user_url) if user_url else dict(EMPTY_FIELDS)
         if competitor_urls:
-            for url in competitor_urls:
-                competitor_contents[url] = scrape_content(url)
+            competitor_contents = {url: page_content(url) for url in competitor_urls}
         else:
-            competitor_contents = {url: {"title": "", "meta_desc": "", "h1_tags": "", "h2_tags": "", "text": ""} for url in competitor_keywords_dict.keys()}
+            competitor_contents = {url: dict(EMPTY_FIELDS) for url in competitor_keywords_dict.keys()}
 
         # Flatten competitor keywords
         competitor_keywords = set()
@@ -217,7 +376,7 @@ class CompetitorAnalysisService:
             ))
         ])
         chain = content_gap_prompt | llm | RunnableLambda(lambda x: x.content)
-        result = chain.invoke({
+        result = await chain.ainvoke({
             "user_url": user_url or "",
             "user_title": user_content["title"],
             "user_meta": user_content["meta_desc"],
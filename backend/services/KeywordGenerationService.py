@@ -1,229 +1,311 @@
+import asyncio
 import os
+import hashlib
+import json
 import logging
-from typing import Dict, Any, Generator
-from langchain_google_genai import ChatGoogleGenerativeAI
+import re
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, Generator, Iterator, Optional
+from core.cache import TwoTierCache
+from core.keyword_cluster import cluster_keywords, stem
+from core.llm import astream_with_retry, gemini_llm, gemini_structured_llm
+from db.models.Schemas import KeywordIdeas
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda
 from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
 
+LEVELS = {"very low": 0, "low": 1, "medium": 2, "high": 3, "very high": 4}
+INTENTS = ("informational", "commercial", "navigational")
+# QA constraints of the fast pipeline, same as the QAEditor prompt asks for.
+MIN_KEYWORDS_PER_INTENT = {"informational": 3, "commercial": 3}
+FAST_IDEA_COUNT = 40
+# Keywords kept by the local Cluster & Deduplicate step, same as the ClusterDeduplicator prompt asked for.
+CLUSTER_MIN_KEYWORDS = 10
+# Stage outputs of a checkpointed pipeline run are kept this long, so a retried task can resume.
+KEYWORD_CHECKPOINT_TTL = int(os.getenv("KEYWORD_CHECKPOINT_TTL", str(6 * 60 * 60)))
+
+fast_keyword_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert SEO keyword researcher using industry benchmarks."),
+    ("user", (
+        "Analyze the seed keyword \"{seed_keyword}\" for language '{lang}' and country '{country}'.\n"
+        "1. Give its primary intent (informational/commercial/navigational) and the top 3 highly related, trending subtopics.\n"
+        "2. Generate {count} keyword ideas for those subtopics. Each keyword must be short (1-3 words), highly relevant to the seed, "
+        "best for SEO (high search intent, trending, and commonly searched) and suitable for real-world SEO campaigns. "
+        "Do not include generic, broad, or unrelated terms. Include informational and commercial keywords.\n"
+        "3. For each keyword estimate search_volume, keyword_difficulty and competitive_density, each one of: "
+        "'very high', 'high', 'medium', 'low', 'very low'; and intent, one of: 'informational', 'commercial', 'navigational'.\n"
+        "Respond with JSON only: {{\"intent\": ..., \"subtopics\": [...], \"keywords\": [{{\"keyword\": ..., \"search_volume\": ..., "
+        "\"keyword_difficulty\": ..., \"competitive_density\": ..., \"intent\": ...}}]}}"
+    ))
+])
+
+seed_analyzer_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are \"SeedAnalyzer,\" an expert SEO strategist."),
+    ("user", (
+        "Please analyze the intent and context behind the seed keyword: \"{seed_keyword}\".\n"
+        "Focus on the most relevant, trending, and SEO-optimized search topics that are closely related to the seed.\n"
+        "All subtopics must be short (1-3 words), highly relevant, and best for SEO.\n"
+        "Reject any subtopic that is not short, not highly relevant, or not SEO-optimized.\n"
+        "Do not include explanations, rationales, or any extra text.\n"
+        "All subtopics must be suitable for real-world SEO campaigns.\n"
+        "Output:\n"
+        "1. Primary intent (informational/commercial/navigational).\n"
+        "2. Top 3 highly related, trending subtopics or angles (avoid generic or off-topic ideas).\n"
+        "3. Suggested geographic or audience modifiers (if any)."
+    ))
+])
+keyword_expander_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are \"KeywordExpander,\" a creative SEO keyword researcher."),
+    ("user", (
+        "Based on intent {intent} and subtopics {subtopics}, generate 50 keyword ideas.\n"
+        "Each keyword must be short (1-3 words), highly relevant to the seed, best for SEO (high search intent, trending, and commonly searched).\n"
+        "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
+        "Do not include generic, broad, or unrelated terms.\n"
+        "Do not include explanations, rationales, or any extra text.\n"
+        "All keywords must be suitable for real-world SEO campaigns.\n"
+        "For each, include only the following fields in your output: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
+        "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
+        "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
+        "Output as a JSON array, e.g.:\n"
+        "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
+        "Do not include any other fields or explanations."
+    ))
+])
+metric_estimator_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are \"MetricEstimator,\" an SEO analyst using industry benchmarks."),
+    ("user", (
+        "For each keyword in the JSON array below, estimate and output only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
+        "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
+        "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
+        "Do not include explanations, rationales, or any extra text.\n"
+        "All keywords must be suitable for real-world SEO campaigns.\n"
+        "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
+        "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
+        "Output as a JSON array, e.g.:\n"
+        "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
+        "Do not include any other fields or explanations.\n"
+        "Here is the list:\n{keywords}"
+    ))
+])
+filter_prioritizer_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are \"FilterPrioritizer,\" a data-driven SEO optimizer."),
+    ("user", (
+        "From the JSON array below, rank keywords by relevance and SEO potential.\n"
+        "Return the top 20 keywords, each as an object with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
+        "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
+        "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
+        "Do not include explanations, rationales, or any extra text.\n"
+        "All keywords must be suitable for real-world SEO campaigns.\n"
+        "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
+        "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
+        "Output as a JSON array, e.g.:\n"
+        "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
+        "Seed keyword: {seed_keyword}\nJSON array:\n{keywords}"
+    ))
+])
+final_qa_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are \"QAEditor,\" an SEO perfectionist."),
+    ("user", (
+        "Review the finalists below for the seed keyword: {seed_keyword}\n{keywords}\n"
+        "1. Ensure at least 3 informational and 3 commercial keywords.\n"
+        "2. Verify no blatant duplicates.\n"
+        "3. Ensure all keywords are short (1-3 words), trending, and highly relevant to the seed keyword.\n"
+        "4. All keywords must be best for SEO and suitable for real-world SEO campaigns.\n"
+        "5. Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
+        "6. If there are fewer than 10 keywords, add more from the previous list to ensure at least 10 are present. All must be unique, short, and highly relevant.\n"
+        "7. Do not include explanations, rationales, or any extra text.\n"
+        "8. Output as a JSON array, each with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
+        "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
+        "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
+        "Do not include any other fields or explanations."
+    ))
+])
+
+def parse_seed_analysis(output) -> Dict[str, Any]:
+    intent = None
+    subtopics = []
+    modifiers = []
+    if isinstance(output, list):
+        output = '\n'.join(str(x) for x in output)
+    lines = output.splitlines()
+    for line in lines:
+        if 'intent' in line.lower():
+            intent = re.sub(r'[^a-zA-Z]', '', line.split(':')[-1]).strip().capitalize()
+        elif 'subtopic' in line.lower() or 'angle' in line.lower():
+            subtopics = [s.strip() for s in re.split(r'[,;]', line.split(':')[-1]) if s.strip()]
+        elif 'modifier' in line.lower():
+            modifiers = [m.strip() for m in re.split(r'[,;]', line.split(':')[-1]) if m.strip()]
+    return {
+        'intent': intent or 'Informational',
+        'subtopics': subtopics or [],
+        'modifiers': modifiers or []
+    }
+
+def parse_expanded_keywords(output) -> list:
+    if isinstance(output, list):
+        output = '\n'.join(str(x) for x in output)
+    keywords = []
+    for line in output.splitlines():
+        if ':' in line:
+            kw = line.split(':', 1)[0].strip()
+            if kw:
+                keywords.append(kw)
+    return keywords
+
+def parse_json_array(output) -> list:
+    if isinstance(output, list):
+        output = '\n'.join(str(x) for x in output)
+    try:
+        match = re.search(r'\[.*\]', output, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        return json.loads(output)
+    except Exception:
+        return []
+
+@lru_cache(maxsize=4)
+def fast_keyword_chain(api_key: str):
+    return fast_keyword_prompt | gemini_structured_llm(api_key, KeywordIdeas)
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed message chunk; Gemini may send a list of content parts."""
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in chunk.content)
+
+@lru_cache(maxsize=4)
+def stage_chains(api_key: str) -> Dict[str, Any]:
+    """prompt | llm chains of the pipeline's LLM stages, built once per process (and API key)."""
+    llm = gemini_llm(api_key)
+    return {
+        "seed_analysis": seed_analyzer_prompt | llm,
+        "expansion": keyword_expander_prompt | llm,
+        "metrics": metric_estimator_prompt | llm,
+        "filtered": filter_prioritizer_prompt | llm,
+        "final": final_qa_prompt | llm,
+    }
+
 class KeywordGenerationService:
+    _stem = staticmethod(stem)
+
     @staticmethod
-    def generate_keyword_suggestions(seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10) -> Dict[str, Any]:
+    def clean_keyword_ideas(ideas) -> list:
+        """Normalise LLM keyword ideas and drop the ones that break the output contract."""
+        cleaned = []
+        for idea in ideas:
+            # LLM stage output may hold bare strings or other JSON values; only objects carry the fields.
+            if not isinstance(idea, dict):
+                if not hasattr(idea, "dict"):
+                    continue
+                idea = idea.dict()
+            keyword = " ".join(str(idea.get("keyword", "")).lower().split())
+            fields = {f: " ".join(str(idea.get(f, "")).lower().replace("_", " ").split()) for f in ("search_volume", "keyword_difficulty", "competitive_density", "intent")}
+            if not keyword or not 1 <= len(keyword.split()) <= 3:
+                continue
+            if fields["intent"] not in INTENTS or any(fields[f] not in LEVELS for f in ("search_volume", "keyword_difficulty", "competitive_density")):
+                continue
+            cleaned.append({"keyword": keyword, **fields})
+        return cleaned
+
+    @classmethod
+    def keyword_scorer(cls, seed: str):
+        """Score function for cleaned ideas: seed word overlap plus the volume/difficulty/density labels."""
+        seed_stems = {cls._stem(w) for w in seed.lower().split()}
+        def score(idea):
+            stems = {cls._stem(w) for w in idea["keyword"].split()}
+            overlap = len(stems & seed_stems) / len(stems | seed_stems) if stems else 0.0
+            return (2 * overlap + LEVELS[idea["search_volume"]]
+                    - 0.5 * LEVELS[idea["keyword_difficulty"]] - 0.25 * LEVELS[idea["competitive_density"]])
+        return score
+
+    @classmethod
+    def dedupe_keywords(cls, ideas, seed: str, min_keywords: int = 0) -> list:
+        """
+        Local replacement for the ClusterDeduplicator LLM step: cluster the cleaned ideas by
+        character n-gram similarity and keep the best-scoring keyword of each cluster. When that
+        leaves fewer than min_keywords, the best clustered-away keywords are appended.
+        """
+        score = cls.keyword_scorer(seed)
+        cleaned = cls.clean_keyword_ideas(ideas)
+        scores = [score(idea) for idea in cleaned]
+        clusters = cluster_keywords([idea["keyword"] for idea in cleaned], scores)
+        selected = [cleaned[cluster[0]] for cluster in clusters]
+        if len(selected) < min_keywords:
+            seen = {idea["keyword"] for idea in selected}
+            for i in sorted((i for cluster in clusters for i in cluster[1:]), key=lambda i: (-scores[i], cleaned[i]["keyword"])):
+                if len(selected) >= min_keywords:
+                    break
+                if cleaned[i]["keyword"] not in seen:
+                    seen.add(cleaned[i]["keyword"])
+                    selected.append(cleaned[i])
+        return selected
+
+    @classmethod
+    def select_keywords(cls, ideas, seed: str, top_n: int = 10) -> list:
+        """
+        Deterministic replacement for FilterPrioritizer, ClusterDeduplicator and QAEditor:
+        score each idea by seed overlap and estimated metrics, keep the best keyword per cluster
+        (dedupe_keywords), then enforce MIN_KEYWORDS_PER_INTENT.
+        """
+        score = cls.keyword_scorer(seed)
+        ranked = cls.dedupe_keywords(ideas, seed)
+        selected, rest = ranked[:top_n], ranked[top_n:]
+        for intent, minimum in MIN_KEYWORDS_PER_INTENT.items():
+            missing = minimum - sum(1 for idea in selected if idea["intent"] == intent)
+            candidates = [idea for idea in rest if idea["intent"] == intent][:max(missing, 0)]
+            for candidate in candidates:
+                # Replace the weakest keyword whose intent has more than its own minimum.
+                for i in range(len(selected) - 1, -1, -1):
+                    other = selected[i]["intent"]
+                    if sum(1 for idea in selected if idea["intent"] == other) > MIN_KEYWORDS_PER_INTENT.get(other, 0):
+                        rest.append(selected.pop(i))
+                        break
+                else:
+                    break
+                selected.append(candidate)
+                rest.remove(candidate)
+        return sorted(selected, key=lambda idea: (-score(idea), idea["keyword"]))
+
+    @classmethod
+    def generate_keyword_suggestions_fast(cls, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10) -> Dict[str, Any]:
+        """
+        One structured Gemini call for seed analysis, expansion and metrics; filtering,
+        clustering, dedupe and QA run locally in select_keywords.
+        """
         api_key = os.getenv('GOOGLE_API_KEY')
         if not api_key:
             logger.error("[KeywordGen] GOOGLE_API_KEY not found, cannot run LLM workflow.")
             return {"keywords": [], "metadata": {}, "ranking": [], "llm_metrics": []}
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=api_key)
-
-        # Prompt templates
-        seed_analyzer_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"SeedAnalyzer,\" an expert SEO strategist."),
-            ("user", (
-                "Please analyze the intent and context behind the seed keyword: \"{seed_keyword}\".\n"
-                "Focus on the most relevant, trending, and SEO-optimized search topics that are closely related to the seed.\n"
-                "All subtopics must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any subtopic that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All subtopics must be suitable for real-world SEO campaigns.\n"
-                "Output:\n"
-                "1. Primary intent (informational/commercial/navigational).\n"
-                "2. Top 3 highly related, trending subtopics or angles (avoid generic or off-topic ideas).\n"
-                "3. Suggested geographic or audience modifiers (if any)."
-            ))
-        ])
-        keyword_expander_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"KeywordExpander,\" a creative SEO keyword researcher."),
-            ("user", (
-                "Based on intent {intent} and subtopics {subtopics}, generate 50 keyword ideas.\n"
-                "Each keyword must be short (1-3 words), highly relevant to the seed, best for SEO (high search intent, trending, and commonly searched).\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include generic, broad, or unrelated terms.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "For each, include only the following fields in your output: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-        metric_estimator_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"MetricEstimator,\" an SEO analyst using industry benchmarks."),
-            ("user", (
-                "For each keyword in the JSON array below, estimate and output only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Do not include any other fields or explanations.\n"
-                "Here is the list:\n{keywords}"
-            ))
-        ])
-        filter_prioritizer_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"FilterPrioritizer,\" a data-driven SEO optimizer."),
-            ("user", (
-                "From the JSON array below, rank keywords by relevance and SEO potential.\n"
-                "Return the top 20 keywords, each as an object with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Seed keyword: {seed_keyword}\nJSON array:\n{keywords}"
-            ))
-        ])
-        cluster_dedup_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"ClusterDeduplicator,\" an SEO grouping specialist."),
-            ("user", (
-                "Cluster these top 20 keywords by semantic similarity,\n"
-                "then for each cluster choose one representative with the highest score and closest relation to the seed keyword.\n"
-                "You must output at least 10 unique keywords. If there are not enough clusters, select the next most relevant keywords to reach 10.\n"
-                "Output 10 or more finalists as a JSON array, each with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Seed keyword: {seed_keyword}\nJSON array:\n{keywords}"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-        final_qa_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"QAEditor,\" an SEO perfectionist."),
-            ("user", (
-                "Review the finalists below for the seed keyword: {seed_keyword}\n{keywords}\n"
-                "1. Ensure at least 3 informational and 3 commercial keywords.\n"
-                "2. Verify no blatant duplicates.\n"
-                "3. Ensure all keywords are short (1-3 words), trending, and highly relevant to the seed keyword.\n"
-                "4. All keywords must be best for SEO and suitable for real-world SEO campaigns.\n"
-                "5. Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "6. If there are fewer than 10 keywords, add more from the previous list to ensure at least 10 are present. All must be unique, short, and highly relevant.\n"
-                "7. Do not include explanations, rationales, or any extra text.\n"
-                "8. Output as a JSON array, each with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-
-        def parse_seed_analysis(output: str) -> Dict[str, Any]:
-            import re
-            intent = None
-            subtopics = []
-            modifiers = []
-            if isinstance(output, list):
-                output = '\n'.join(str(x) for x in output)
-            lines = output.splitlines()
-            for line in lines:
-                if 'intent' in line.lower():
-                    intent = re.sub(r'[^a-zA-Z]', '', line.split(':')[-1]).strip().capitalize()
-                elif 'subtopic' in line.lower() or 'angle' in line.lower():
-                    subtopics = [s.strip() for s in re.split(r'[,;]', line.split(':')[-1]) if s.strip()]
-                elif 'modifier' in line.lower():
-                    modifiers = [m.strip() for m in re.split(r'[,;]', line.split(':')[-1]) if m.strip()]
-            return {
-                'intent': intent or 'Informational',
-                'subtopics': subtopics or [],
-                'modifiers': modifiers or []
-            }
+        print("[KeywordGen] Fast mode: running structured expansion...")
+        ideas = fast_keyword_chain(api_key).invoke({"seed_keyword": seed, "lang": lang, "country": country, "count": FAST_IDEA_COUNT})
+        return cls.fast_result(ideas, seed, lang, country, top_n)
 
-        def parse_json_array(output: str):
-            import json, re
-            if isinstance(output, list):
-                output = '\n'.join(str(x) for x in output)
-            try:
-                match = re.search(r'\[.*\]', output, re.DOTALL)
-                if match:
-                    return json.loads(match.group(0))
-                return json.loads(output)
-            except Exception:
-                return []
-
-        seed_analyzer_chain = seed_analyzer_prompt | llm | RunnableLambda(lambda x: x.content)
-        keyword_expander_chain = keyword_expander_prompt | llm | RunnableLambda(lambda x: x.content)
-        metric_estimator_chain = metric_estimator_prompt | llm | RunnableLambda(lambda x: x.content)
-        filter_prioritizer_chain = filter_prioritizer_prompt | llm | RunnableLambda(lambda x: x.content)
-        cluster_dedup_chain = cluster_dedup_prompt | llm | RunnableLambda(lambda x: x.content)
-        final_qa_chain = final_qa_prompt | llm | RunnableLambda(lambda x: x.content)
-
-        print("[KeywordGen] Step 1: Running Seed Analyzer...")
-        seed_analysis = seed_analyzer_chain.invoke({"seed_keyword": seed})
-        print("[KeywordGen] Step 1 complete.")
-        logger.info(f"[KeywordGen] Seed Analyzer output: {seed_analysis}")
-        parsed_seed = parse_seed_analysis(seed_analysis)
-        print("[KeywordGen] Step 2: Running Keyword Expander...")
-        expander_input = {
-            'intent': parsed_seed['intent'],
-            'subtopics': ', '.join(parsed_seed['subtopics'])
-        }
-        keyword_expansion = keyword_expander_chain.invoke(expander_input)
-        print("[KeywordGen] Step 2 complete.")
-        logger.info(f"[KeywordGen] Keyword Expander output: {keyword_expansion}")
-        if isinstance(keyword_expansion, list):
-            keyword_expansion = '\n'.join(str(x) for x in keyword_expansion)
-        keywords = []
-        for line in keyword_expansion.splitlines():
-            if ':' in line:
-                kw = line.split(':', 1)[0].strip()
-                if kw:
-                    keywords.append(kw)
-        print("[KeywordGen] Step 3: Running Metric Estimator...")
-        metric_input = '\n'.join(keywords)
-        metrics_output = metric_estimator_chain.invoke({"keywords": metric_input})
-        print("[KeywordGen] Step 3 complete.")
-        logger.info(f"[KeywordGen] Metric Estimator output: {metrics_output}")
-        metrics = parse_json_array(metrics_output)
-        print("[KeywordGen] Step 4: Running Filter & Prioritizer...")
-        import json
-        filter_input = json.dumps(metrics, ensure_ascii=False)
-        filtered_output = filter_prioritizer_chain.invoke({"keywords": filter_input, "seed_keyword": seed})
-        print("[KeywordGen] Step 4 complete.")
-        logger.info(f"[KeywordGen] Filter & Prioritizer output: {filtered_output}")
-        filtered = parse_json_array(filtered_output)
-        print("[KeywordGen] Step 5: Running Cluster & Deduplicate...")
-        cluster_input = json.dumps(filtered, ensure_ascii=False)
-        cluster_output = cluster_dedup_chain.invoke({"keywords": cluster_input, "seed_keyword": seed})
-        print("[KeywordGen] Step 5 complete.")
-        logger.info(f"[KeywordGen] Cluster & Deduplicate output: {cluster_output}")
-        clustered = parse_json_array(cluster_output)
-        print("[KeywordGen] Step 6: Running Final QA & Formatting...")
-        final_input = json.dumps(clustered, ensure_ascii=False)
-        final_output = final_qa_chain.invoke({"keywords": final_input, "seed_keyword": seed})
-        print("[KeywordGen] Step 6 complete.")
-        logger.info(f"[KeywordGen] Final QA output: {final_output}")
-        final_keywords = parse_json_array(final_output)
+    @classmethod
+    async def agenerate_keyword_suggestions_fast(cls, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10) -> Dict[str, Any]:
+        """generate_keyword_suggestions_fast with the async Gemini client."""
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key:
+            logger.error("[KeywordGen] GOOGLE_API_KEY not found, cannot run LLM workflow.")
+            return {"keywords": [], "metadata": {}, "ranking": [], "llm_metrics": []}
+        ideas = await fast_keyword_chain(api_key).ainvoke({"seed_keyword": seed, "lang": lang, "country": country, "count": FAST_IDEA_COUNT})
+        return cls.fast_result(ideas, seed, lang, country, top_n)
 
-        keywords_out = []
-        for k in final_keywords:
-            keywords_out.append({
-                "id": str(uuid.uuid4()),
-                "keyword": k.get("keyword", ""),
-                "search_volume": k.get("search_volume", ""),
-                "keyword_difficulty": k.get("keyword_difficulty", ""),
-                "competitive_density": k.get("competitive_density", ""),
-                "intent": k.get("intent", "")
-            })
-        print(f"[KeywordGen] Workflow complete. {len(keywords_out)} keywords generated.")
+    @classmethod
+    def fast_result(cls, ideas: KeywordIdeas, seed: str, lang: str, country: str, top_n: int) -> Dict[str, Any]:
+        logger.info(f"[KeywordGen] Structured expansion returned {len(ideas.keywords)} ideas")
+        final_keywords = cls.select_keywords(ideas.keywords, seed, top_n)
+        keywords_out = [{"id": str(uuid.uuid4()), **k} for k in final_keywords]
+        print(f"[KeywordGen] Fast workflow complete. {len(keywords_out)} keywords generated.")
         metadata = {
             "query": seed,
             "country": country,
             "language": lang,
             "timestamp": datetime.utcnow().isoformat() + "Z",
-            "total_results": len(keywords_out)
+            "total_results": len(keywords_out),
+            "mode": "fast",
         }
-        logger.info(f"[KeywordGen] Returning {len(keywords_out)} keywords with metadata: {metadata}")
         return {
             "keywords": keywords_out,
             "metadata": metadata,
@@ -231,214 +313,120 @@ class KeywordGenerationService:
             "llm_metrics": []
         }
 
-    @staticmethod
-    def generate_keyword_suggestions_stream(seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10) -> Generator[str, None, None]:
+    @classmethod
+    def generate_keyword_suggestions(cls, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10, mode: str = 'full') -> Dict[str, Any]:
+        if mode == 'fast':
+            return cls.generate_keyword_suggestions_fast(seed, lang, country, top_n)
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key:
+            logger.error("[KeywordGen] GOOGLE_API_KEY not found, cannot run LLM workflow.")
+            return {"keywords": [], "metadata": {}, "ranking": [], "llm_metrics": []}
+        return KeywordPipeline(api_key, seed, lang, country, top_n).run()
+
+    @classmethod
+    def generate_keyword_suggestions_stream(cls, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10, mode: str = 'full') -> Generator[str, None, None]:
         """
         Generator version for SSE streaming. Yields JSON strings with progress updates.
         """
-        import json
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if not api_key:
+            yield json.dumps({"event": "error", "message": "GOOGLE_API_KEY not found, cannot run LLM workflow."})
+            return
+
+        if mode == 'fast':
+            yield json.dumps({"event": "progress", "step": 1, "message": "Running structured keyword expansion..."})
+            result = cls.generate_keyword_suggestions_fast(seed, lang, country, top_n)
+            yield json.dumps({"event": "progress", "step": 2, "message": "Filtering, clustering and QA complete."})
+            yield json.dumps({"event": "complete", **result})
+            return
+
+        for event in KeywordPipeline(api_key, seed, lang, country, top_n).events():
+            yield json.dumps(event)
 
+    @classmethod
+    async def agenerate_keyword_suggestions_stream(cls, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10, mode: str = 'full') -> AsyncIterator[str]:
+        """
+        Async generator for SSE streaming on the event loop: no threadpool thread is held while
+        Gemini answers. Like generate_keyword_suggestions_stream, plus "token" events with the
+        partial text of each LLM stage.
+        """
         api_key = os.getenv('GOOGLE_API_KEY')
         if not api_key:
             yield json.dumps({"event": "error", "message": "GOOGLE_API_KEY not found, cannot run LLM workflow."})
             return
 
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=api_key)
-
-        # Prompt templates
-        seed_analyzer_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"SeedAnalyzer,\" an expert SEO strategist."),
-            ("user", (
-                "Please analyze the intent and context behind the seed keyword: \"{seed_keyword}\".\n"
-                "Focus on the most relevant, trending, and SEO-optimized search topics that are closely related to the seed.\n"
-                "All subtopics must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any subtopic that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All subtopics must be suitable for real-world SEO campaigns.\n"
-                "Output:\n"
-                "1. Primary intent (informational/commercial/navigational).\n"
-                "2. Top 3 highly related, trending subtopics or angles (avoid generic or off-topic ideas).\n"
-                "3. Suggested geographic or audience modifiers (if any)."
-            ))
-        ])
-        keyword_expander_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"KeywordExpander,\" a creative SEO keyword researcher."),
-            ("user", (
-                "Based on intent {intent} and subtopics {subtopics}, generate 50 keyword ideas.\n"
-                "Each keyword must be short (1-3 words), highly relevant to the seed, best for SEO (high search intent, trending, and commonly searched).\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include generic, broad, or unrelated terms.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "For each, include only the following fields in your output: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-        metric_estimator_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"MetricEstimator,\" an SEO analyst using industry benchmarks."),
-            ("user", (
-                "For each keyword in the JSON array below, estimate and output only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Do not include any other fields or explanations.\n"
-                "Here is the list:\n{keywords}"
-            ))
-        ])
-        filter_prioritizer_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"FilterPrioritizer,\" a data-driven SEO optimizer."),
-            ("user", (
-                "From the JSON array below, rank keywords by relevance and SEO potential.\n"
-                "Return the top 20 keywords, each as an object with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Output as a JSON array, e.g.:\n"
-                "[\n  {{\"keyword\": \"marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}},\n  {{\"keyword\": \"social media marketing\", \"search_volume\": \"medium\", \"keyword_difficulty\": \"high\", \"competitive_density\": \"high\", \"intent\": \"informational\"}}\n]\n"
-                "Seed keyword: {seed_keyword}\nJSON array:\n{keywords}"
-            ))
-        ])
-        cluster_dedup_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"ClusterDeduplicator,\" an SEO grouping specialist."),
-            ("user", (
-                "Cluster these top 20 keywords by semantic similarity,\n"
-                "then for each cluster choose one representative with the highest score and closest relation to the seed keyword.\n"
-                "You must output at least 10 unique keywords. If there are not enough clusters, select the next most relevant keywords to reach 10.\n"
-                "Output 10 or more finalists as a JSON array, each with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "All keywords must be short (1-3 words), highly relevant, and best for SEO.\n"
-                "Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "Do not include explanations, rationales, or any extra text.\n"
-                "All keywords must be suitable for real-world SEO campaigns.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Seed keyword: {seed_keyword}\nJSON array:\n{keywords}"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-        final_qa_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are \"QAEditor,\" an SEO perfectionist."),
-            ("user", (
-                "Review the finalists below for the seed keyword: {seed_keyword}\n{keywords}\n"
-                "1. Ensure at least 3 informational and 3 commercial keywords.\n"
-                "2. Verify no blatant duplicates.\n"
-                "3. Ensure all keywords are short (1-3 words), trending, and highly relevant to the seed keyword.\n"
-                "4. All keywords must be best for SEO and suitable for real-world SEO campaigns.\n"
-                "5. Reject any keyword that is not short, not highly relevant, or not SEO-optimized.\n"
-                "6. If there are fewer than 10 keywords, add more from the previous list to ensure at least 10 are present. All must be unique, short, and highly relevant.\n"
-                "7. Do not include explanations, rationales, or any extra text.\n"
-                "8. Output as a JSON array, each with only the following fields: keyword, search_volume, keyword_difficulty, competitive_density, intent.\n"
-                "The values for search_volume, keyword_difficulty, and competitive_density must be one of: 'very high', 'high', 'medium', 'low', 'very low'.\n"
-                "The value for intent must be one of: 'informational', 'commercial', or 'navigational'.\n"
-                "Do not include any other fields or explanations."
-            ))
-        ])
-
-        def parse_seed_analysis(output: str) -> Dict[str, Any]:
-            import re
-            intent = None
-            subtopics = []
-            modifiers = []
-            if isinstance(output, list):
-                output = '\n'.join(str(x) for x in output)
-            lines = output.splitlines()
-            for line in lines:
-                if 'intent' in line.lower():
-                    intent = re.sub(r'[^a-zA-Z]', '', line.split(':')[-1]).strip().capitalize()
-                elif 'subtopic' in line.lower() or 'angle' in line.lower():
-                    subtopics = [s.strip() for s in re.split(r'[,;]', line.split(':')[-1]) if s.strip()]
-                elif 'modifier' in line.lower():
-                    modifiers = [m.strip() for m in re.split(r'[,;]', line.split(':')[-1]) if m.strip()]
+        if mode == 'fast':
+            yield json.dumps({"event": "progress", "step": 1, "message": "Running structured keyword expansion..."})
+            result = await cls.agenerate_keyword_suggestions_fast(seed, lang, country, top_n)
+            yield json.dumps({"event": "progress", "step": 2, "message": "Filtering, clustering and QA complete."})
+            yield json.dumps({"event": "complete", **result})
+            return
+
+        async for event in KeywordPipeline(api_key, seed, lang, country, top_n).aevents():
+            yield json.dumps(event)
+
+class KeywordPipeline:
+    """
+    The six-stage keyword workflow (SeedAnalyzer, KeywordExpander, MetricEstimator,
+    FilterPrioritizer, local Cluster & Deduplicate, QAEditor) shared by the sync, SSE and
+    Celery entry points. With a run_id, every finished stage's parsed output is checkpointed
+    in a TwoTierCache (Redis when configured); a later run with the same run_id and inputs,
+    e.g. a retried or redelivered Celery task, resumes after the last finished stage.
+    """
+    STAGES = (
+        ("seed_analysis", "Seed Analyzer"),
+        ("expansion", "Keyword Expander"),
+        ("metrics", "Metric Estimator"),
+        ("filtered", "Filter & Prioritizer"),
+        ("clustered", "Cluster & Deduplicate"),
+        ("final", "Final QA & Formatting"),
+    )
+    # Parsers of the LLM stages' text output; "clustered" runs locally.
+    PARSERS = {
+        "seed_analysis": parse_seed_analysis,
+        "expansion": parse_expanded_keywords,
+        "metrics": parse_json_array,
+        "filtered": parse_json_array,
+        "final": parse_json_array,
+    }
+    checkpoints = TwoTierCache("keyword_pipeline", max_entries=64, ttl=KEYWORD_CHECKPOINT_TTL)
+
+    def __init__(self, api_key: str, seed: str, lang: str = 'en', country: str = 'us', top_n: int = 10, run_id: Optional[str] = None):
+        self.api_key = api_key
+        self.seed = seed
+        self.lang = lang
+        self.country = country
+        self.top_n = top_n
+        self.checkpoint_key = None
+        if run_id:
+            inputs = hashlib.sha256(json.dumps([seed, lang, country, top_n]).encode()).hexdigest()[:16]
+            self.checkpoint_key = f"{run_id}:{inputs}"
+
+    def _stage_input(self, name: str, done: Dict[str, Any]) -> Dict[str, Any]:
+        if name == "seed_analysis":
+            return {"seed_keyword": self.seed}
+        if name == "expansion":
+            parsed_seed = done["seed_analysis"]
             return {
-                'intent': intent or 'Informational',
-                'subtopics': subtopics or [],
-                'modifiers': modifiers or []
+                'intent': parsed_seed['intent'],
+                'subtopics': ', '.join(parsed_seed['subtopics'])
             }
+        if name == "metrics":
+            return {"keywords": '\n'.join(done["expansion"])}
+        if name == "filtered":
+            return {"keywords": json.dumps(done["metrics"], ensure_ascii=False), "seed_keyword": self.seed}
+        return {"keywords": json.dumps(done["clustered"], ensure_ascii=False), "seed_keyword": self.seed}
 
-        def parse_json_array(output: str):
-            import json, re
-            if isinstance(output, list):
-                output = '\n'.join(str(x) for x in output)
-            try:
-                match = re.search(r'\[.*\]', output, re.DOTALL)
-                if match:
-                    return json.loads(match.group(0))
-                return json.loads(output)
-            except Exception:
-                return []
-
-        seed_analyzer_chain = seed_analyzer_prompt | llm | RunnableLambda(lambda x: x.content)
-        keyword_expander_chain = keyword_expander_prompt | llm | RunnableLambda(lambda x: x.content)
-        metric_estimator_chain = metric_estimator_prompt | llm | RunnableLambda(lambda x: x.content)
-        filter_prioritizer_chain = filter_prioritizer_prompt | llm | RunnableLambda(lambda x: x.content)
-        cluster_dedup_chain = cluster_dedup_prompt | llm | RunnableLambda(lambda x: x.content)
-        final_qa_chain = final_qa_prompt | llm | RunnableLambda(lambda x: x.content)
-
-        # --- Step 1: Seed Analyzer ---
-        yield json.dumps({"event": "progress", "step": 1, "message": "Running Seed Analyzer..."})
-        seed_analyzer_chain = seed_analyzer_prompt | llm | RunnableLambda(lambda x: x.content)
-        seed_analysis = seed_analyzer_chain.invoke({"seed_keyword": seed})
-        parsed_seed = parse_seed_analysis(seed_analysis)
-        yield json.dumps({"event": "progress", "step": 1, "message": "Seed Analyzer complete.", "data": parsed_seed})
-
-        # --- Step 2: Keyword Expander ---
-        yield json.dumps({"event": "progress", "step": 2, "message": "Running Keyword Expander..."})
-        expander_input = {
-            'intent': parsed_seed['intent'],
-            'subtopics': ', '.join(parsed_seed['subtopics'])
-        }
-        keyword_expansion = keyword_expander_chain.invoke(expander_input)
-        yield json.dumps({"event": "progress", "step": 2, "message": "Keyword Expander complete."})
-
-        # --- Step 3: Metric Estimator ---
-        yield json.dumps({"event": "progress", "step": 3, "message": "Running Metric Estimator..."})
-        if isinstance(keyword_expansion, list):
-            keyword_expansion = '\n'.join(str(x) for x in keyword_expansion)
-        keywords = []
-        for line in keyword_expansion.splitlines():
-            if ':' in line:
-                kw = line.split(':', 1)[0].strip()
-                if kw:
-                    keywords.append(kw)
-        metric_input = '\n'.join(keywords)
-        metrics_output = metric_estimator_chain.invoke({"keywords": metric_input})
-        yield json.dumps({"event": "progress", "step": 3, "message": "Metric Estimator complete."})
-
-        # --- Step 4: Filter & Prioritizer ---
-        yield json.dumps({"event": "progress", "step": 4, "message": "Running Filter & Prioritizer..."})
-        import json as _json
-        metrics = parse_json_array(metrics_output)
-        filter_input = _json.dumps(metrics, ensure_ascii=False)
-        filtered_output = filter_prioritizer_chain.invoke({"keywords": filter_input, "seed_keyword": seed})
-        yield json.dumps({"event": "progress", "step": 4, "message": "Filter & Prioritizer complete."})
-
-        # --- Step 5: Cluster & Deduplicate ---
-        yield json.dumps({"event": "progress", "step": 5, "message": "Running Cluster & Deduplicate..."})
-        filtered = parse_json_array(filtered_output)
-        cluster_input = _json.dumps(filtered, ensure_ascii=False)
-        cluster_output = cluster_dedup_chain.invoke({"keywords": cluster_input, "seed_keyword": seed})
-        yield json.dumps({"event": "progress", "step": 5, "message": "Cluster & Deduplicate complete."})
-
-        # --- Step 6: Final QA & Formatting ---
-        yield json.dumps({"event": "progress", "step": 6, "message": "Running Final QA & Formatting..."})
-        clustered = parse_json_array(cluster_output)
-        final_input = _json.dumps(clustered, ensure_ascii=False)
-        final_output = final_qa_chain.invoke({"keywords": final_input, "seed_keyword": seed})
-        yield json.dumps({"event": "progress", "step": 6, "message": "Final QA complete."})
-
-        # --- Final Output ---
-        final_keywords = parse_json_array(final_output)
+    def _cluster(self, done):
+        return KeywordGenerationService.dedupe_keywords(done["filtered"], self.seed, CLUSTER_MIN_KEYWORDS)
+
+    def _progress(self, step: int, name: str, label: str, done: Dict[str, Any]) -> Dict[str, Any]:
+        event = {"event": "progress", "step": step, "message": f"{label} complete."}
+        if name == "seed_analysis":
+            event["data"] = done[name]
+        return event
+
+    def result(self, final_keywords) -> Dict[str, Any]:
         keywords_out = []
         for k in final_keywords:
             keywords_out.append({
@@ -450,16 +438,78 @@ class KeywordGenerationService:
                 "intent": k.get("intent", "")
             })
         metadata = {
-            "query": seed,
-            "country": country,
-            "language": lang,
+            "query": self.seed,
+            "country": self.country,
+            "language": self.lang,
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "total_results": len(keywords_out)
         }
-        yield json.dumps({
-            "event": "complete",
+        return {
             "keywords": keywords_out,
             "metadata": metadata,
             "ranking": [],
             "llm_metrics": []
-        }) 
\ No newline at end of file
+        }
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """
+        Runs the stages in order, yielding a "progress" event before and after each one and a
+        final "complete" event carrying the result. Checkpointed stages are not run again.
+        """
+        done = (self.checkpoint_key and self.checkpoints.get(self.checkpoint_key)) or {}
+        if done:
+            logger.info(f"[KeywordGen] Resuming {self.checkpoint_key} after {len(done)} finished stage(s)")
+        for step, (name, label) in enumerate(self.STAGES, 1):
+            if name not in done:
+                yield {"event": "progress", "step": step, "message": f"Running {label}..."}
+                if name == "clustered":
+                    done[name] = self._cluster(done)
+                else:
+                    output = stage_chains(self.api_key)[name].invoke(self._stage_input(name, done))
+                    done[name] = self.PARSERS[name](output.content)
+                logger.info(f"[KeywordGen] {label} output: {done[name]}")
+                if self.checkpoint_key:
+                    self.checkpoints.set(self.checkpoint_key, done)
+            yield self._progress(step, name, label, done)
+        result = self.result(done["final"])
+        if self.checkpoint_key:
+            self.checkpoints.delete(self.checkpoint_key)
+        yield {"event": "complete", **result}
+
+    async def aevents(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async events(): LLM stages are streamed with astream and every text chunk is yielded
+        as a "token" event (step, delta) as it arrives. Cancelling the consumer cancels the
+        in-flight Gemini request. Streamed calls bypass the LLM response cache, which only
+        LangChain's generate path consults.
+        """
+        done = (self.checkpoint_key and await self.checkpoints.aget(self.checkpoint_key)) or {}
+        for step, (name, label) in enumerate(self.STAGES, 1):
+            if name not in done:
+                yield {"event": "progress", "step": step, "message": f"Running {label}..."}
+                if name == "clustered":
+                    done[name] = self._cluster(done)
+                else:
+                    parts = []
+                    async for chunk in astream_with_retry(stage_chains(self.api_key)[name], self._stage_input(name, done)):
+                        delta = chunk_text(chunk)
+                        if delta:
+                            parts.append(delta)
+                            yield {"event": "token", "step": step, "delta": delta}
+                    done[name] = self.PARSERS[name]("".join(parts))
+                logger.info(f"[KeywordGen] {label} output: {done[name]}")
+                if self.checkpoint_key:
+                    await self.checkpoints.aset(self.checkpoint_key, done)
+            yield self._progress(step, name, label, done)
+        result = self.result(done["final"])
+        if self.checkpoint_key:
+            await asyncio.to_thread(self.checkpoints.delete, self.checkpoint_key)
+        yield {"event": "complete", **result}
+
+    def run(self) -> Dict[str, Any]:
+        for event in self.events():
+            if event["event"] == "complete":
+                del event["event"]
+                print(f"[KeywordGen] Workflow complete. {len(event['keywords'])} keywords generated.")
+                return event
+            print(f"[KeywordGen] Step {event['step']}: {event['message']}")
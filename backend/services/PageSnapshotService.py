@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from core.cache import TwoTierCache
+from core.http_client import PooledAsyncClient, HostLimiter
+from core.html_extract import extract_page
+from services.PageSpeedService import PageSpeedService
+
+# Characters of visible text kept per snapshot; keyword extraction and gap analysis read a prefix of it.
+SNAPSHOT_TEXT_CHARS = int(os.getenv("PAGE_SNAPSHOT_TEXT_CHARS", "20000"))
+EMPTY_FIELDS = {"title": "", "meta_desc": "", "h1_tags": "", "h2_tags": "", "text": ""}
+
+class PageSnapshotService:
+    """
+    Fetches competitor pages and keeps the fields the analyses use (title, meta description,
+    H1/H2 and visible text), not the HTML. Snapshots carry the page's ETag/Last-Modified and
+    are revalidated with a conditional GET once older than PAGE_SNAPSHOT_FRESH seconds.
+    """
+    http = PooledAsyncClient("COMPETITOR_HTTP", timeout=15.0, follow_redirects=True, headers={"User-Agent": "Mozilla/5.0"})
+    limiter = HostLimiter("COMPETITOR_HTTP", max_concurrency=10, per_host=2)
+    # Upper bound for a whole fetch; the client timeout only applies per network operation.
+    fetch_deadline = float(os.getenv("COMPETITOR_FETCH_DEADLINE", "30"))
+    fresh_for = int(os.getenv("PAGE_SNAPSHOT_FRESH", "600"))
+    cache = TwoTierCache(
+        "page_snapshot",
+        max_entries=int(os.getenv("PAGE_SNAPSHOT_LOCAL_ENTRIES", "256")),
+        ttl=int(os.getenv("PAGE_SNAPSHOT_TTL", str(7 * 24 * 60 * 60))),
+    )
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        return hashlib.sha256(PageSpeedService.normalize_url(url).encode()).hexdigest()
+
+    @staticmethod
+    def parse_html(html: str) -> dict:
+        """Extract the snapshot fields from a page; CPU-bound, run off the event loop."""
+        fields = extract_page(html)
+        fields["text"] = fields["text"][:SNAPSHOT_TEXT_CHARS]
+        return fields
+
+    @classmethod
+    async def get_snapshot(cls, url: str) -> dict:
+        """
+        Snapshot fields for url. Fresh snapshots are returned without a request; stale ones are
+        revalidated (304 keeps the stored fields). Raises on network or HTTP errors.
+        """
+        key = cls.cache_key(url)
+        cached = await cls.cache.aget(key)
+        if cached is not None and time.time() - cached["checked_at"] < cls.fresh_for:
+            return cached["fields"]
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        async with cls.limiter.limit(url):
+            response = await asyncio.wait_for(cls.http.get().get(url, headers=headers), cls.fetch_deadline)
+        if response.status_code == 304 and cached is not None:
+            logging.info(f"[PageSnapshot] Not modified: {url}")
+            fields = cached["fields"]
+            etag = response.headers.get("etag", cached.get("etag"))
+            last_modified = response.headers.get("last-modified", cached.get("last_modified"))
+        else:
+            response.raise_for_status()
+            fields = await asyncio.to_thread(cls.parse_html, response.text)
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+        await cls.cache.aset(key, {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+            "fields": fields,
+        })
+        return fields
+
+    @classmethod
+    async def get_snapshots(cls, urls) -> dict:
+        """Snapshots for several URLs fetched concurrently; failed pages get empty fields."""
+        async def safe_get(url):
+            try:
+                return await cls.get_snapshot(url)
+            except Exception as e:
+                logging.warning(f"[PageSnapshot] Failed to fetch {url}: {e}")
+                return dict(EMPTY_FIELDS)
+        snapshots = await asyncio.gather(*(safe_get(url) for url in urls))
+        return dict(zip(urls, snapshots))
+
+    @classmethod
+    async def aclose(cls):
+        await cls.http.aclose()
+
+    @classmethod
+    def close_all(cls):
+        cls.http.close_all()
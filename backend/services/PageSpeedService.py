@@ -1,18 +1,141 @@
 # services/pagespeed.py
+import asyncio
+import hashlib
 import httpx
+import json
 import os
+import urllib.parse
 from dotenv import load_dotenv
 load_dotenv()
-from db.models.pageSpeedData import PageSpeedData
+from core.http_client import PooledAsyncClient
+from core.cache import TwoTierCache
+from core.rate_limit import PAGESPEED_BUCKET, backoff_delay
+
+# Top-level lighthouseResult keys kept after parsing; audits are reduced separately.
+LIGHTHOUSE_KEYS = ("requestedUrl", "finalUrl", "fetchTime", "lighthouseVersion", "categories", "configSettings", "environment", "runWarnings", "categoryGroups")
+AUDIT_KEYS = ("id", "title", "description", "score", "scoreDisplayMode", "numericValue")
+
+class DataUrlStripper:
+    """
+    Incrementally copies a JSON byte stream while emptying every string that starts with
+    "data:" (base64 screenshots, thumbnails, full-page screenshot). The end of a blob is the
+    next unescaped '"'; non-base64 data URLs (inline SVG) may contain escaped quotes, and the
+    escape state is carried across chunk boundaries.
+    """
+    MARKER = b'"data:'
+
+    def __init__(self):
+        self.out = bytearray()
+        self._tail = b""
+        self._skipping = False
+        # The last byte seen while skipping was a backslash, so the next byte is escaped.
+        self._escaped = False
+        self.dropped = 0
+
+    def feed(self, chunk: bytes):
+        buf = self._tail + chunk if self._tail else chunk
+        self._tail = b""
+        pos = 0
+        while True:
+            if self._skipping:
+                end = self._string_end(buf, pos)
+                if end == -1:
+                    self.dropped += len(buf) - pos
+                    return
+                self.dropped += end - pos
+                self._skipping = False
+                pos = end
+            idx = buf.find(self.MARKER, pos)
+            if idx == -1:
+                # Keep a few bytes back in case the marker straddles two chunks.
+                cut = max(pos, len(buf) - len(self.MARKER) + 1)
+                self.out += buf[pos:cut]
+                self._tail = buf[cut:]
+                return
+            # A quote preceded by a backslash is inside a string, not the start of one.
+            escaped = (buf[idx - 1:idx] if idx else self.out[-1:]) == b"\\"
+            self.out += buf[pos:idx + 1]
+            pos = idx + 1
+            self._skipping = not escaped
+
+    def _string_end(self, buf: bytes, pos: int) -> int:
+        """Index of the next unescaped quote in buf from pos, or -1 (escape state kept for the next chunk)."""
+        while pos < len(buf):
+            if self._escaped:
+                self._escaped = False
+                pos += 1
+                continue
+            quote = buf.find(b'"', pos)
+            backslash = buf.find(b"\\", pos, quote if quote != -1 else len(buf))
+            if backslash == -1:
+                return quote
+            self._escaped = True
+            pos = backslash + 1
+        return -1
+
+    def getvalue(self) -> bytearray:
+        self.out += self._tail
+        self._tail = b""
+        return self.out
+
+def project_lighthouse(lh: dict) -> dict:
+    """Keep only the parts of a lighthouseResult that AuditService reads."""
+    projected = {key: lh[key] for key in LIGHTHOUSE_KEYS if key in lh}
+    audits = {}
+    for audit_id, audit in (lh.get("audits") or {}).items():
+        kept = {key: audit[key] for key in AUDIT_KEYS if key in audit}
+        details = audit.get("details")
+        if isinstance(details, dict) and "overallSavingsMs" in details:
+            kept["details"] = {"overallSavingsMs": details["overallSavingsMs"]}
+        audits[audit_id] = kept
+    projected["audits"] = audits
+    return projected
 
 class PageSpeedService:
+    # Shared by every instance so TLS sessions and connections to googleapis.com are reused.
+    http = PooledAsyncClient("PAGESPEED", timeout=300.0)
+    # Lighthouse results keyed on (normalized URL, strategy, categories).
+    cache = TwoTierCache(
+        "lighthouse",
+        max_entries=int(os.getenv("LIGHTHOUSE_CACHE_LOCAL_ENTRIES", "16")),
+        ttl=int(os.getenv("LIGHTHOUSE_CACHE_TTL", "900")),
+    )
+
+    max_retries = int(os.getenv("PAGESPEED_MAX_RETRIES", "3"))
+
     def __init__(self):
         self.api_key = os.environ["PAGESPEED_API_KEY"]
         self.base_url = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-    
-    async def analyze_page(self, url: str, strategy: str = "mobile", categories=None) -> dict:
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Canonical form used for cache keys and de-duplication: lower-case scheme/host, no default port, fragment or trailing slash."""
+        parsed = urllib.parse.urlsplit(url.strip())
+        scheme = (parsed.scheme or "https").lower()
+        host = (parsed.hostname or "").lower()
+        if parsed.port and parsed.port != {"http": 80, "https": 443}.get(scheme):
+            host = f"{host}:{parsed.port}"
+        path = parsed.path.rstrip("/") or "/"
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)))
+        return urllib.parse.urlunsplit((scheme, host, path, query, ""))
+
+    @classmethod
+    def cache_key(cls, url: str, strategy: str, categories) -> str:
+        raw = "|".join([cls.normalize_url(url), strategy, ",".join(sorted(categories))])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def analyze_page(self, url: str, strategy: str = "mobile", categories=None, cache_ttl=None, force_refresh: bool = False) -> dict:
+        """
+        Return the lighthouseResult for url. Results are served from cache for cache_ttl seconds
+        (LIGHTHOUSE_CACHE_TTL when None, no caching when 0); force_refresh skips the lookup.
+        """
         if categories is None:
             categories = ["performance"]
+        key = self.cache_key(url, strategy, categories)
+        if not force_refresh and cache_ttl != 0:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
         params = {
             'url': url,
             'key': self.api_key,
@@ -20,16 +143,69 @@ class PageSpeedService:
             'prettyPrint': 'false',
             'category': categories
         }
-        timeout = httpx.Timeout(300.0)
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                data = response.json()
+            for attempt in range(self.max_retries + 1):
+                await PAGESPEED_BUCKET.aacquire()
+                # Stream the body so screenshot blobs are dropped before the JSON is parsed.
+                async with self.http.get().stream("GET", self.base_url, params=params) as response:
+                    if response.status_code != 429 and response.status_code < 500 or attempt == self.max_retries:
+                        stripper = DataUrlStripper()
+                        async for chunk in response.aiter_bytes():
+                            stripper.feed(chunk)
+                        data = json.loads(stripper.getvalue())
+                        break
+                await asyncio.sleep(backoff_delay(attempt, base=2.0))
         except httpx.ReadTimeout:
             raise Exception("PageSpeed API timed out. Try again or increase the timeout.")
-        
+
         if 'lighthouseResult' not in data:
             api_error = data.get('error', {}).get('message', str(data))
             raise Exception(f"PageSpeed API response missing 'lighthouseResult': {api_error}")
-        
-        return data['lighthouseResult']
\ No newline at end of file
+
+        lighthouse = project_lighthouse(data.pop('lighthouseResult'))
+        del data
+        await self.cache.aset(key, lighthouse, cache_ttl)
+        return lighthouse
+
+    async def analyze_strategies(self, url: str, strategies=("mobile", "desktop"), categories=None, on_progress=None, **options) -> tuple[dict, dict]:
+        """
+        Run analyze_page for several strategies concurrently.
+        Returns (results, errors), both keyed by strategy. A failing strategy does not
+        cancel the others; cancelling the caller cancels every in-flight fetch.
+        on_progress(strategy, state, error) is called with state "running", "done" or "failed".
+        Extra options (cache_ttl, force_refresh) are passed to analyze_page.
+        """
+        def report(strategy, state, error=None):
+            if on_progress:
+                on_progress(strategy, state, error)
+
+        pending = {}
+        for strategy in strategies:
+            pending[asyncio.ensure_future(self.analyze_page(url, strategy, categories=categories, **options))] = strategy
+            report(strategy, "running")
+        results, errors = {}, {}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    strategy = pending.pop(fut)
+                    try:
+                        results[strategy] = fut.result()
+                        report(strategy, "done")
+                    except Exception as e:
+                        errors[strategy] = e
+                        report(strategy, "failed", e)
+        finally:
+            for fut in pending:
+                fut.cancel()
+            # Wait for the cancellations so pooled connections are released before returning.
+            await asyncio.gather(*pending, return_exceptions=True)
+        return results, errors
+
+    @classmethod
+    async def aclose(cls):
+        await cls.http.aclose()
+
+    @classmethod
+    def close_all(cls):
+        cls.http.close_all()
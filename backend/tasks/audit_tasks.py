@@ -5,8 +5,46 @@ from db.database import SessionLocal
 from services.AuditService import AuditService
 from db.models.Schemas import AuditRequest
 from db.models.project import Project
+from core.async_runtime import worker_runtime
 import traceback
 
+AUDIT_CATEGORIES = ["performance", "accessibility", "best-practices", "seo", "pwa"]
+
+def fetch_lighthouse_reports(task, pagespeed, url, **cache_options):
+    """
+    Fetch mobile and desktop Lighthouse reports concurrently, publishing per-strategy
+    progress on task. Failed strategies are retried once; returns (mobile, desktop).
+    """
+    strategy_states = {"mobile": "pending", "desktop": "pending"}
+    # A retried strategy goes back to "running"; progress never moves backwards.
+    progress = {"current": 20}
+    # Progress callbacks fire on the runtime thread, where task.request is not populated.
+    task_id = task.request.id
+    def on_strategy_progress(strategy, state, error=None):
+        strategy_states[strategy] = state
+        finished = sum(1 for s in strategy_states.values() if s in ("done", "failed"))
+        progress["current"] = max(progress["current"], 20 + finished * 25)
+        task.update_state(task_id=task_id, state="PROGRESS", meta={
+            "current": progress["current"],
+            "total": 100,
+            "status": f"{strategy.capitalize()} audit {state}...",
+            "strategies": dict(strategy_states),
+        })
+    task.update_state(state="PROGRESS", meta={"current": 20, "total": 100, "status": "Running mobile and desktop audits...", "strategies": dict(strategy_states)})
+    lighthouse, errors = worker_runtime.run(
+        pagespeed.analyze_strategies(url, ("mobile", "desktop"), categories=AUDIT_CATEGORIES, on_progress=on_strategy_progress, **cache_options)
+    )
+    if errors:
+        # Partial failure: retry only the strategies that failed, once.
+        retried, errors = worker_runtime.run(
+            pagespeed.analyze_strategies(url, tuple(errors), categories=AUDIT_CATEGORIES, on_progress=on_strategy_progress, **cache_options)
+        )
+        lighthouse.update(retried)
+    if errors:
+        failed = ", ".join(f"{strategy}: {error}" for strategy, error in errors.items())
+        raise Exception(f"PageSpeed audit failed for {failed}")
+    return lighthouse["mobile"], lighthouse["desktop"]
+
 @celery_app.task(bind=True)
 def generate_audit_task(self, audit_request_dict, user_id):
     print('generate_audit_task CALLED')
@@ -15,33 +53,63 @@ def generate_audit_task(self, audit_request_dict, user_id):
         self.update_state(state="PROGRESS", meta={"current": 0, "total": 100, "status": "Starting audit..."})
         request = AuditRequest(**audit_request_dict)
         audit_service = AuditService()
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            self.update_state(state="PROGRESS", meta={"current": 10, "total": 100, "status": "Fetching project info..."})
-            project = db.query(Project).filter(Project.id == request.project_id).first()
-            if not project:
-                raise Exception("Project not found")
-            categories = ["performance", "accessibility", "best-practices", "seo", "pwa"]
-            self.update_state(state="PROGRESS", meta={"current": 20, "total": 100, "status": "Running mobile audit..."})
-            mobile_lighthouse = loop.run_until_complete(
-                audit_service.pagespeed.analyze_page(str(project.website_url), "mobile", categories=categories)
-            )
-            self.update_state(state="PROGRESS", meta={"current": 50, "total": 100, "status": "Running desktop audit..."})
-            desktop_lighthouse = loop.run_until_complete(
-                audit_service.pagespeed.analyze_page(str(project.website_url), "desktop", categories=categories)
-            )
-            self.update_state(state="PROGRESS", meta={"current": 70, "total": 100, "status": "Processing results..."})
-            result = loop.run_until_complete(
-                audit_service.generate_audit(request, db, mobile_lighthouse=mobile_lighthouse, desktop_lighthouse=desktop_lighthouse)
-            )
-            self.update_state(state="PROGRESS", meta={"current": 100, "total": 100, "status": "Audit complete."})
-        finally:
-            loop.close()
+        self.update_state(state="PROGRESS", meta={"current": 10, "total": 100, "status": "Fetching project info..."})
+        project = db.query(Project).filter(Project.id == request.project_id).first()
+        if not project:
+            raise Exception("Project not found")
+        mobile_lighthouse, desktop_lighthouse = fetch_lighthouse_reports(
+            self, audit_service.pagespeed, str(project.website_url),
+            cache_ttl=project.audit_cache_ttl, force_refresh=request.force_refresh
+        )
+        self.update_state(state="PROGRESS", meta={"current": 70, "total": 100, "status": "Processing results..."})
+        # Only the network I/O runs on the shared runtime; the session stays in this thread.
+        result = audit_service.save_audit(request, db, mobile_lighthouse, desktop_lighthouse)
+        self.update_state(state="PROGRESS", meta={"current": 100, "total": 100, "status": "Audit complete."})
         return {"status": "SUCCESS", "result": result.dict(), "current": 100, "total": 100}
     except Exception as e:
         traceback.print_exc()
         return {"status": "FAILURE", "error": str(e)}
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+@celery_app.task(bind=True)
+def generate_batch_audit_task(self, audit_request_dict, project_ids, user_id):
+    """
+    Audit several projects that share one website URL: Lighthouse is fetched once
+    and a report is stored for every project. Used by the /audit/batch fan-out.
+    """
+    print(f'generate_batch_audit_task CALLED for {len(project_ids)} project(s)')
+    db = SessionLocal()
+    try:
+        self.update_state(state="PROGRESS", meta={"current": 0, "total": 100, "status": "Starting audit...", "project_ids": project_ids})
+        audit_service = AuditService()
+        results = {}
+        projects = db.query(Project).filter(Project.id.in_(project_ids)).all()
+        if not projects:
+            raise Exception("Project not found")
+        # Projects share the URL; the shortest TTL among them wins.
+        ttls = [p.audit_cache_ttl for p in projects if p.audit_cache_ttl is not None]
+        mobile_lighthouse, desktop_lighthouse = fetch_lighthouse_reports(
+            self, audit_service.pagespeed, str(projects[0].website_url),
+            cache_ttl=min(ttls) if ttls else None, force_refresh=audit_request_dict.get("force_refresh", False)
+        )
+        for i, project in enumerate(projects):
+            self.update_state(state="PROGRESS", meta={
+                "current": 70 + int(30 * i / len(projects)),
+                "total": 100,
+                "status": f"Processing results for project {i + 1}/{len(projects)}...",
+                "project_ids": project_ids,
+            })
+            request = AuditRequest(**{**audit_request_dict, "project_id": str(project.id)})
+            try:
+                result = audit_service.save_audit(request, db, mobile_lighthouse, desktop_lighthouse)
+                results[str(project.id)] = {"status": "SUCCESS", "overall_score": result.overall_score}
+            except Exception as e:
+                db.rollback()
+                results[str(project.id)] = {"status": "FAILURE", "error": str(e)}
+        return {"status": "SUCCESS", "results": results, "project_ids": project_ids, "current": 100, "total": 100}
+    except Exception as e:
+        traceback.print_exc()
+        return {"status": "FAILURE", "error": str(e), "project_ids": project_ids}
+    finally:
+        db.close()
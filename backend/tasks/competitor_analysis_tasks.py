@@ -1,25 +1,22 @@
 from celery_app import celery_app
 from services.CompetitorAnalysisService import CompetitorAnalysisService
+from core.async_runtime import worker_runtime
 
 @celery_app.task(name="scrape_competitor_keywords")
 def scrape_competitor_keywords(urls):
-    import asyncio
-    async def extract_all(urls):
-        from services.CompetitorAnalysisService import CompetitorAnalysisService
-        async def extract(url):
-            print(f"Extracting keywords for: {url}")
-            try:
-                keywords = await CompetitorAnalysisService.extract_keywords_from_url(url)
-                print(f"Keywords for {url}: {keywords}")
-                return url, keywords
-            except Exception as e:
-                print(f"Error extracting keywords for {url}: {e}")
-                return url, []
-        tasks = [extract(url) for url in urls]
-        results = await asyncio.gather(*tasks)
-        return dict(results)
-    return asyncio.run(extract_all(urls))
+    print(f"Extracting keywords for: {urls}")
+    # One batched LLM ranking request for all pages instead of one per URL.
+    results = worker_runtime.run(CompetitorAnalysisService.extract_keywords_for_urls(urls))
+    for url, keywords in results.items():
+        print(f"Keywords for {url}: {keywords}")
+    return results
 
 @celery_app.task(name="analyze_content_gap_task")
-def analyze_content_gap_task(user_keywords, competitor_keywords_dict):
-    return CompetitorAnalysisService.analyze_content_gap_and_recommend(user_keywords, competitor_keywords_dict) 
\ No newline at end of file
+def analyze_content_gap_task(user_keywords, competitor_keywords_dict, user_url=None, competitor_urls=None):
+    # Competitor pages were fetched by scrape_competitor_keywords; passing their URLs reuses those snapshots.
+    return worker_runtime.run(CompetitorAnalysisService.analyze_content_gap_and_recommend(
+        user_keywords,
+        competitor_keywords_dict,
+        user_url=user_url,
+        competitor_urls=competitor_urls or list(competitor_keywords_dict),
+    )) 
\ No newline at end of file
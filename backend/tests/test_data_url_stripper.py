@@ -0,0 +1,22 @@
+import json
+from services.PageSpeedService import DataUrlStripper
+
+def strip(chunks):
+    stripper = DataUrlStripper()
+    for chunk in chunks:
+        stripper.feed(chunk)
+    return json.loads(bytes(stripper.getvalue()))
+
+def test_svg_data_url_with_escaped_quotes_split_across_chunks():
+    raw = json.dumps({
+        "url": 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="1"></svg>',
+        "next": "kept",
+    }).encode()
+    # Split inside the escape sequence (between the backslash and the quote it escapes).
+    split = raw.index(b'\\"') + 1
+    for cut in (split, split + 1, raw.index(b"http")):
+        assert strip([raw[:cut], raw[cut:]]) == {"url": "", "next": "kept"}
+
+def test_base64_screenshot_dropped_byte_by_byte():
+    raw = json.dumps({"screenshot": {"data": "data:image/jpeg;base64,/9j/4AAQSkZJRg=="}, "score": 0.9}).encode()
+    assert strip([raw[i:i + 1] for i in range(len(raw))]) == {"screenshot": {"data": ""}, "score": 0.9}
@@ -0,0 +1,41 @@
+import pytest
+from core.html_extract import extract_bs4, extract_lxml, extract_stdlib
+
+FIXTURES = {
+    "basic": (
+        "<html><head><title>Acme shoes</title>"
+        "<meta name='description' content='Running shoes for everyone'></head>"
+        "<body><h1>Acme</h1><h2>Trail</h2><p>Light and fast.</p><h2>Road</h2></body></html>"
+    ),
+    "svg_titles": (
+        "<html><head><title>Acme shoes</title></head><body>"
+        "<svg><title>Facebook</title><path d='M0 0'/></svg><h1>Welcome</h1>"
+        "<p>Shop now</p><svg><title>Twitter</title></svg></body></html>"
+    ),
+    "unclosed_head": (
+        "<html><head><title>Blog &amp; news</title><META NAME='description' CONTENT='Latest posts'>"
+        "<body><h1>Posts</h1><script>var title = '<h1>no</h1>';</script><p>First post</p>"
+    ),
+    "nested_headings": (
+        "<html><head><title> Padded title </title></head><body>"
+        "<h1>Big <span>sale</span></h1><style>h2 { color: red }</style>"
+        "<h2>Men</h2><h2>Women</h2><noscript>Enable JS</noscript></body></html>"
+    ),
+    "no_head": "<h1>Only content</h1><p>No title or description.</p>",
+}
+
+def _structured(fields: dict) -> dict:
+    # bs4 keeps the original behaviour of including script/style/head strings in "text".
+    return {key: value for key, value in fields.items() if key != "text"}
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_backends_agree(name):
+    html = FIXTURES[name]
+    stdlib = extract_stdlib(html)
+    assert _structured(stdlib) == _structured(extract_bs4(html))
+    pytest.importorskip("lxml")
+    lxml = extract_lxml(html)
+    assert lxml == stdlib
+
+def test_svg_titles_do_not_leak_into_title():
+    assert extract_stdlib(FIXTURES["svg_titles"])["title"] == "Acme shoes"
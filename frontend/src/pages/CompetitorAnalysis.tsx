@@ -5,6 +5,29 @@ import ContentGapLoadingScreen from '../components/competitor-analysis/ContentGa
 import { useProjectStore } from '../store/projectStore';
 import { toast } from 'react-hot-toast';
 import { Link } from 'react-router-dom';
+import { watchTask } from '../taskProgress';
+import type { TaskEvent } from '../taskProgress';
+
+const TASK_TIMEOUT_SECONDS = 210;
+
+// Resolves with the task's final event, or null after TASK_TIMEOUT_SECONDS (the watch is then
+// stopped); onTick(i) runs every second.
+const followTask = (taskId: string, statusUrl: string, onTick: (i: number) => void): Promise<TaskEvent | null> => {
+  let i = 0;
+  onTick(i);
+  const controller = new AbortController();
+  const ticker = window.setInterval(() => onTick(Math.min(++i, TASK_TIMEOUT_SECONDS - 1)), 1000);
+  const timer = window.setTimeout(() => controller.abort(), TASK_TIMEOUT_SECONDS * 1000);
+  return watchTask(taskId, statusUrl, undefined, controller.signal)
+    .catch((err) => {
+      if (controller.signal.aborted) return null;
+      throw err;
+    })
+    .finally(() => {
+      clearInterval(ticker);
+      clearTimeout(timer);
+    });
+};
 
 const MAX_KEYWORDS = 5;
 const MAX_COMPETITORS = 10;
@@ -240,24 +263,14 @@ const CompetitorAnalysis: React.FC = () => {
       });
       if (!res1.ok) throw new Error('Failed to start competitor keyword extraction');
       const { task_id: keywordsTaskId } = await res1.json();
-      // Poll for result
-      let keywordsResult = null;
-      for (let i = 0; i < 210; i++) { // up to 210s
-        setLoadingScreen({ type: 'competitor', progress: Math.round((i / 210) * 100), message: `Extracting competitor keywords for ${competitorUrls.length} competitors... (${i + 1}s)` });
-        await new Promise(r => setTimeout(r, 1000));
-        const pollRes = await fetch(`${import.meta.env.VITE_BACKEND_URL}/competitor-analysis/keywords-task-status/${keywordsTaskId}`, {
-          headers: {
-            ...(token ? { 'Authorization': `Bearer ${token}` } : {})
-          }
-        });
-        const pollData = await pollRes.json();
-        if (pollData.status === 'SUCCESS') {
-          keywordsResult = pollData.result;
-          break;
-        } else if (pollData.status === 'FAILURE') {
-          throw new Error('Competitor keyword extraction failed');
-        }
-      }
+      // Wait for the result; the loading screen advances once a second meanwhile
+      const keywordsEvent = await followTask(
+        keywordsTaskId,
+        `${import.meta.env.VITE_BACKEND_URL}/competitor-analysis/keywords-task-status/${keywordsTaskId}`,
+        (i) => setLoadingScreen({ type: 'competitor', progress: Math.round((i / TASK_TIMEOUT_SECONDS) * 100), message: `Extracting competitor keywords for ${competitorUrls.length} competitors... (${i + 1}s)` }),
+      );
+      if (keywordsEvent && keywordsEvent.state === 'FAILURE') throw new Error('Competitor keyword extraction failed');
+      const keywordsResult = keywordsEvent ? keywordsEvent.result : null;
       if (!keywordsResult) throw new Error('Competitor keyword extraction timed out');
       setCompetitorKeywords(keywordsResult);
       setLoadingScreen({ type: 'gap', progress: 0, message: 'Analyzing content gaps and recommendations...' });
@@ -272,24 +285,14 @@ const CompetitorAnalysis: React.FC = () => {
       });
       if (!res2.ok) throw new Error('Failed to start content gap analysis');
       const { task_id: gapTaskId } = await res2.json();
-      // Poll for result
-      let gapResult = null;
-      for (let i = 0; i < 210; i++) { // up to 210s
-        setLoadingScreen({ type: 'gap', progress: Math.round((i / 210) * 100), message: `Analyzing content gaps and recommendations... (${i + 1}s)` });
-        await new Promise(r => setTimeout(r, 1000));
-        const pollRes = await fetch(`${import.meta.env.VITE_BACKEND_URL}/competitor-analysis/content-gap-task-status/${gapTaskId}`, {
-          headers: {
-            ...(token ? { 'Authorization': `Bearer ${token}` } : {})
-          }
-        });
-        const pollData = await pollRes.json();
-        if (pollData.status === 'SUCCESS') {
-          gapResult = pollData.result;
-          break;
-        } else if (pollData.status === 'FAILURE') {
-          throw new Error('Content gap analysis failed');
-        }
-      }
+      // Wait for the result; the loading screen advances once a second meanwhile
+      const gapEvent = await followTask(
+        gapTaskId,
+        `${import.meta.env.VITE_BACKEND_URL}/competitor-analysis/content-gap-task-status/${gapTaskId}`,
+        (i) => setLoadingScreen({ type: 'gap', progress: Math.round((i / TASK_TIMEOUT_SECONDS) * 100), message: `Analyzing content gaps and recommendations... (${i + 1}s)` }),
+      );
+      if (gapEvent && gapEvent.state === 'FAILURE') throw new Error('Content gap analysis failed');
+      const gapResult = gapEvent ? gapEvent.result : null;
       setLoadingScreen(null);
       // Defensive: If gapResult is empty or malformed, show fallback message and advance step
       if (!gapResult || typeof gapResult !== 'object' || (!gapResult.content_gaps && !gapResult.recommendations)) {
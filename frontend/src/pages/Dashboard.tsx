@@ -10,6 +10,8 @@ import NoAudits from './NoAudits';
 import { useNavigate } from 'react-router-dom';
 import DashboardLoadingScreen from '../components/AuditLoadingScreen';
 import AuditLoadingScreen from '../components/DashboardLoadingScreen';
+import { watchTask } from '../taskProgress';
+import type { TaskEvent } from '../taskProgress';
 
 const Dashboard: React.FC = () => {
   const [allAudits, setAllAudits] = useState<any[]>([]);
@@ -115,36 +117,29 @@ const Dashboard: React.FC = () => {
     }
   }, [selectedProject]);
 
-  // Poll audit task status
+  // Follow audit task progress
   useEffect(() => {
     if (!auditTaskId || !isPollingAudit) return;
     let isMounted = true;
-    let interval: number;
-    const poll = async () => {
-      try {
-        const token = localStorage.getItem('access_token');
-        const res = await fetch(`${import.meta.env.VITE_BACKEND_URL}/audit/task-status/${auditTaskId}`, {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json',
-          },
-        });
-        const data = await res.json();
+    const controller = new AbortController();
+    const onEvent = (data: TaskEvent) => {
+      if (!isMounted) return;
+      if (data.status) {
+        setAuditTaskStatus(data.status);
+      } else if (data.state) {
+        setAuditTaskStatus(data.state);
+      }
+      const progress = typeof data.current === 'number' ? data.current : (data.meta && typeof data.meta.current === 'number' ? data.meta.current : undefined);
+      const total = typeof data.total === 'number' ? data.total : (data.meta && typeof data.meta.total === 'number' ? data.meta.total : 100);
+      setAuditTaskProgress(
+        typeof progress === 'number' && typeof total === 'number'
+          ? Math.round((progress / total) * 100)
+          : 10
+      );
+    };
+    watchTask(auditTaskId, `${import.meta.env.VITE_BACKEND_URL}/audit/task-status/${auditTaskId}`, onEvent, controller.signal)
+      .then(async (data) => {
         if (!isMounted) return;
-        if (data.state === 'PROGRESS' && data.status) {
-          setAuditTaskStatus(data.status);
-        } else if (data.status) {
-          setAuditTaskStatus(data.status);
-        } else if (data.state) {
-          setAuditTaskStatus(data.state);
-        }
-        const progress = typeof data.current === 'number' ? data.current : (data.meta && typeof data.meta.current === 'number' ? data.meta.current : undefined);
-        const total = typeof data.total === 'number' ? data.total : (data.meta && typeof data.meta.total === 'number' ? data.meta.total : 100);
-        setAuditTaskProgress(
-          typeof progress === 'number' && typeof total === 'number'
-            ? Math.round((progress / total) * 100)
-            : 10
-        );
         if (data.state === 'SUCCESS') {
           setIsGeneratingAudit(false);
           setIsPollingAudit(false);
@@ -153,23 +148,21 @@ const Dashboard: React.FC = () => {
           if (selectedProject) {
             await fetchAudits(selectedProject.id);
           }
-        } else if (data.state === 'FAILURE') {
+        } else {
           setIsGeneratingAudit(false);
           setIsPollingAudit(false);
           setAuditTaskError(data.error || 'Audit failed.');
         }
-      } catch (e) {
+      })
+      .catch(() => {
         if (!isMounted) return;
         setAuditTaskError('Error polling audit status.');
         setIsGeneratingAudit(false);
         setIsPollingAudit(false);
-      }
-    };
-    interval = window.setInterval(poll, 2000);
-    poll();
+      });
     return () => {
       isMounted = false;
-      clearInterval(interval);
+      controller.abort();
     };
   }, [auditTaskId, isPollingAudit, selectedProject, fetchAudits]);
 
@@ -5,6 +5,7 @@ import ErrorMessage from '../components/generate-keywords/ErrorMessage';
 import LoadingOverlay from '../components/generate-keywords/KeywordLoadingScreen';
 import { useProjectStore } from '../store/projectStore';
 import { Link } from 'react-router-dom';
+import { watchTask } from '../taskProgress';
 
 interface KeywordSimpleObject {
   id: string;
@@ -76,38 +77,26 @@ const GenerateKeywords: React.FC = () => {
         throw new Error(errorData.message || 'Failed to start keyword generation');
       }
       const { task_id } = await startRes.json();
-      // Step 2: Poll for progress
-      let done = false;
-      while (!done) {
-        await new Promise(res => setTimeout(res, 1200));
-        const pollRes = await fetch(`${import.meta.env.VITE_BACKEND_URL}/keywords/task-status/${task_id}`, {
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`
-          }
-        });
-        if (!pollRes.ok) throw new Error('Failed to poll keyword generation status');
-        const data = await pollRes.json();
-        if (data.state === 'PENDING') {
+      // Step 2: Follow progress
+      const data = await watchTask(task_id, `${import.meta.env.VITE_BACKEND_URL}/keywords/task-status/${task_id}`, (event) => {
+        if (event.state === 'PENDING') {
           setCurrentStep(1);
           setProgressMsg('Queued...');
-        } else if (data.state === 'PROGRESS') {
-          setCurrentStep(data.current || 1);
-          setProgressMsg(data.status || 'In progress...');
-        } else if (data.state === 'SUCCESS') {
-          setCurrentStep(data.current || totalSteps);
-          setProgressMsg('Complete!');
-          setKeywords(data.result.keywords || []);
-          done = true;
-          setLoading(false);
-        } else if (data.state === 'FAILURE') {
-          setError(data.error || 'Keyword generation failed');
-          setLoading(false);
-          done = true;
-        } else {
+        } else if (event.state === 'PROGRESS') {
+          setCurrentStep(event.current || 1);
+          setProgressMsg(event.status || 'In progress...');
+        } else if (!['SUCCESS', 'FAILURE'].includes(event.state)) {
           setProgressMsg('Working...');
         }
+      });
+      if (data.state === 'SUCCESS') {
+        setCurrentStep(data.current || totalSteps);
+        setProgressMsg('Complete!');
+        setKeywords(data.result.keywords || []);
+      } else {
+        setError(data.error || 'Keyword generation failed');
       }
+      setLoading(false);
     } catch (err: any) {
       setError(err.message || 'Unknown error');
       setLoading(false);
@@ -0,0 +1,131 @@
+export interface TaskEvent {
+  task_id?: string;
+  state: string;
+  status?: string;
+  current?: number;
+  total?: number;
+  meta?: any;
+  result?: any;
+  error?: string;
+}
+
+const TERMINAL_STATES = ['SUCCESS', 'FAILURE', 'REVOKED'];
+const FALLBACK_POLL_INTERVAL = 2000;
+// The server sends the task state at least every TASK_PROGRESS_IDLE_TIMEOUT (15s); a socket that
+// stays silent much longer than that is treated as broken and the task is polled instead.
+const SOCKET_SILENCE_TIMEOUT = 60000;
+
+const progressSocketUrl = () => `${import.meta.env.VITE_BACKEND_URL.replace(/^http/, 'ws')}/tasks/ws`;
+
+const abortError = () => new DOMException('Task watch aborted', 'AbortError');
+
+// Resolves after ms, or rejects as soon as signal aborts.
+const sleep = (ms: number, signal?: AbortSignal) => new Promise<void>((resolve, reject) => {
+  const timer = setTimeout(() => {
+    signal?.removeEventListener('abort', onAbort);
+    resolve();
+  }, ms);
+  const onAbort = () => {
+    clearTimeout(timer);
+    reject(abortError());
+  };
+  signal?.addEventListener('abort', onAbort, { once: true });
+});
+
+// Used only when the progress socket is unavailable. The competitor-analysis status
+// endpoints report the state under "status", the others under "state".
+const pollTask = async (statusUrl: string, token: string | null, onEvent: (event: TaskEvent) => void, signal?: AbortSignal): Promise<TaskEvent> => {
+  while (true) {
+    if (signal?.aborted) throw abortError();
+    const res = await fetch(statusUrl, {
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+      signal,
+    });
+    if (!res.ok) throw new Error('Failed to poll task status');
+    const data = await res.json();
+    const event: TaskEvent = { ...data, state: data.state ?? data.status };
+    onEvent(event);
+    if (TERMINAL_STATES.includes(event.state)) return event;
+    await sleep(FALLBACK_POLL_INTERVAL, signal);
+  }
+};
+
+/**
+ * Follow a Celery task over the /tasks/ws push channel. onEvent receives every progress event
+ * (same shape as /audit/task-status); the promise resolves with the final SUCCESS or FAILURE
+ * event. Falls back to polling statusUrl if the socket cannot be used or goes silent. Aborting
+ * signal closes the socket or stops the polling, and rejects the promise with an AbortError.
+ */
+export const watchTask = (
+  taskId: string,
+  statusUrl: string,
+  onEvent: (event: TaskEvent) => void = () => {},
+  signal?: AbortSignal,
+): Promise<TaskEvent> => {
+  const token = localStorage.getItem('access_token');
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) {
+      reject(abortError());
+      return;
+    }
+    let settled = false;
+    let silence: ReturnType<typeof setTimeout> | undefined;
+    let socket: WebSocket | null = null;
+    const closeSocket = () => {
+      clearTimeout(silence);
+      if (!socket) return;
+      socket.onopen = socket.onmessage = socket.onerror = socket.onclose = null;
+      socket.close();
+      socket = null;
+    };
+    const finish = () => {
+      closeSocket();
+      signal?.removeEventListener('abort', onAbort);
+    };
+    const onAbort = () => {
+      finish();
+      if (settled) return;
+      settled = true;
+      reject(abortError());
+    };
+    signal?.addEventListener('abort', onAbort, { once: true });
+    const fallback = () => {
+      closeSocket();
+      if (settled) return;
+      settled = true;
+      pollTask(statusUrl, token, onEvent, signal).then(resolve, reject).finally(finish);
+    };
+    let ws: WebSocket;
+    try {
+      ws = new WebSocket(progressSocketUrl());
+    } catch {
+      fallback();
+      return;
+    }
+    socket = ws;
+    const resetSilence = () => {
+      clearTimeout(silence);
+      silence = setTimeout(fallback, SOCKET_SILENCE_TIMEOUT);
+    };
+    ws.onopen = () => {
+      ws.send(JSON.stringify({ token, subscribe: [taskId] }));
+      resetSilence();
+    };
+    ws.onmessage = (message) => {
+      resetSilence();
+      const event: TaskEvent = JSON.parse(message.data);
+      if (event.state === 'UNAVAILABLE') {
+        fallback();
+        return;
+      }
+      onEvent(event);
+      if (TERMINAL_STATES.includes(event.state)) {
+        settled = true;
+        finish();
+        resolve(event);
+      }
+    };
+    ws.onerror = () => fallback();
+    ws.onclose = () => fallback();
+  });
+};